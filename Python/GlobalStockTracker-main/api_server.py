@@ -0,0 +1,274 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any, Dict, Hashable, List, Optional, Tuple
+from urllib.parse import SplitResult, parse_qs, unquote, urlsplit
+import argparse
+import datetime
+import hashlib
+import importlib.util
+import io
+import json
+import math
+import time
+from market_core import HISTORY_PERIODS, MarketDataProvider
+from instrumentation import API_REQUEST_SECONDS, PROMETHEUS_TYPE, get_metrics
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Address the API listens on by default
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8502
+
+# Most symbols accepted by one /quotes request
+MAX_SYMBOLS = 200
+
+JSON_TYPE = "application/json"
+ARROW_TYPE = "application/vnd.apache.arrow.stream"
+
+# Top-level paths labelled individually in request metrics; others count as "other"
+ROUTES = {"health", "metrics", "quotes", "history"}
+
+
+class ApiError(Exception):
+    """
+    Raised by a route to answer with an HTTP error status
+    """
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _json_default(value: Any) -> Any:
+    """Encode NumPy and pandas scalars that json cannot handle"""
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        # pandas Timestamps are datetimes too
+        return value.isoformat()
+    if hasattr(value, "item"):
+        # NumPy scalars
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _encode_json(payload: Any) -> bytes:
+    return json.dumps(payload, default=_json_default, separators=(",", ":"), allow_nan=False).encode("utf-8")
+
+
+def _arrow_available() -> bool:
+    """Whether pyarrow is installed; it is only imported for Arrow requests"""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def _encode_arrow(frame: "pd.DataFrame") -> bytes:
+    import pyarrow as pa
+    import pyarrow.ipc
+
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def _clean(value: Any) -> Any:
+    """Map the provider's 'N/A' placeholders and NaN to null"""
+    if value == 'N/A' or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return value
+
+
+def _wants_arrow(query: Dict[str, List[str]], accept: str) -> bool:
+    requested = query.get("format", [""])[0].lower()
+    if requested:
+        return requested == "arrow"
+    return ARROW_TYPE in accept
+
+
+def _quotes_response(provider: MarketDataProvider, query: Dict[str, List[str]],
+                     arrow: bool) -> Tuple[bytes, str, str, List[Hashable]]:
+    symbols = [s.strip().upper() for s in ",".join(query.get("symbols", [])).split(",") if s.strip()]
+    if not symbols:
+        raise ApiError(400, "Query parameter 'symbols' is required")
+    if len(symbols) > MAX_SYMBOLS:
+        raise ApiError(400, f"At most {MAX_SYMBOLS} symbols per request")
+
+    quotes = provider.get_batch_quotes(symbols)
+    rows = [
+        {'symbol': symbol, **{key: _clean(value) for key, value in quotes[symbol].items() if key != 'symbol'}}
+        for symbol in symbols if symbol in quotes
+    ]
+
+    if arrow:
+        import pandas as pd
+        return _encode_arrow(pd.DataFrame(rows)), ARROW_TYPE, "current", list(quotes)
+
+    payload = {
+        "quotes": {row['symbol']: row for row in rows},
+        "missing": [symbol for symbol in symbols if symbol not in quotes]
+    }
+    return _encode_json(payload), JSON_TYPE, "current", list(quotes)
+
+
+def _history_response(provider: MarketDataProvider, symbol: str, query: Dict[str, List[str]],
+                      arrow: bool) -> Tuple[bytes, str, str, List[Hashable]]:
+    symbol = unquote(symbol).strip().upper()
+    period = query.get("period", ["1M"])[0]
+    if not symbol:
+        raise ApiError(400, "Symbol is required")
+    if period not in HISTORY_PERIODS:
+        raise ApiError(400, f"Unknown period '{period}'; use one of {', '.join(HISTORY_PERIODS)}")
+
+    hist = provider.get_historical_data(symbol, period)
+    if hist is None or hist.empty:
+        raise ApiError(404, f"No historical data for {symbol}")
+
+    frame = hist[['Open', 'High', 'Low', 'Close', 'Volume']].reset_index()
+    frame = frame.rename(columns={frame.columns[0]: 'Date'})
+
+    if arrow:
+        return _encode_arrow(frame), ARROW_TYPE, "history", [(symbol, period)]
+
+    # Columnar JSON keeps the payload small for long series
+    payload = {
+        "symbol": symbol,
+        "period": period,
+        "interval": provider.get_history_interval(period),
+        "bars": {
+            "Date": [ts.isoformat() for ts in frame['Date']],
+            **{column: frame[column].tolist() for column in ['Open', 'High', 'Low', 'Close', 'Volume']}
+        }
+    }
+    return _encode_json(payload), JSON_TYPE, "history", [(symbol, period)]
+
+
+class MarketDataHandler(BaseHTTPRequestHandler):
+    """
+    Serves quotes and history from the server's shared MarketDataProvider
+
+    Every response carries a strong ETag over its body and a Cache-Control
+    max-age of however long the oldest cache entry behind it stays fresh;
+    a body built from stale entries (served while they are refreshed) is
+    sent with no-cache. A request whose If-None-Match matches gets 304
+    Not Modified without a body.
+    """
+    server_version = "MarketDataAPI/1.0"
+
+    def _send(self, status: int, body: bytes, content_type: str = JSON_TYPE,
+              headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if status != 304 and self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _route(self, path: str, query: Dict[str, List[str]],
+               arrow: bool) -> Tuple[bytes, str, str, List[Hashable]]:
+        """Build a response body and name the data type and cache keys it came from"""
+        provider = self.server.provider
+        parts = [part for part in path.split("/") if part]
+
+        if parts == ["health"]:
+            return _encode_json({"status": "ok", "cache": provider.get_cache_stats()}), JSON_TYPE, "", []
+        if parts == ["metrics"]:
+            return get_metrics().render().encode("utf-8"), PROMETHEUS_TYPE, "", []
+        if parts == ["quotes"]:
+            return _quotes_response(provider, query, arrow)
+        if len(parts) == 2 and parts[0] == "history":
+            return _history_response(provider, parts[1], query, arrow)
+        raise ApiError(404, f"No route for {path}")
+
+    def do_GET(self) -> None:
+        start = time.perf_counter()
+        url = urlsplit(self.path)
+        route = next((part for part in url.path.split("/") if part), "")
+        status = self._respond(url)
+        get_metrics().histogram(API_REQUEST_SECONDS, "API request latency in seconds", ("route", "status")).observe(
+            time.perf_counter() - start, route=route if route in ROUTES else "other", status=status)
+
+    do_HEAD = do_GET
+
+    def _respond(self, url: SplitResult) -> int:
+        """Answer one request and return the HTTP status sent"""
+        query = parse_qs(url.query)
+        arrow = _wants_arrow(query, self.headers.get("Accept", ""))
+
+        try:
+            if arrow and not _arrow_available():
+                raise ApiError(406, "Arrow responses need pyarrow installed")
+            body, content_type, data_type, keys = self._route(url.path, query, arrow)
+        except ApiError as e:
+            self._send(e.status, _encode_json({"error": str(e)}))
+            return e.status
+        except Exception as e:
+            self._send(500, _encode_json({"error": f"Internal error: {e}"}))
+            return 500
+
+        etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        max_age = self._max_age(data_type, keys)
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"public, max-age={max_age}" if max_age else "no-cache",
+            "Vary": "Accept"
+        }
+
+        if etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+            self._send(304, b"", headers=headers)
+            return 304
+
+        self._send(200, body, content_type, headers)
+        return 200
+
+    def _max_age(self, data_type: str, keys: List[Hashable]) -> int:
+        """Seconds until the oldest cache entry behind a response goes stale, or 0"""
+        if not data_type:
+            return 0
+        cache = self.server.provider.cache
+        # Keys no longer cached count as just fetched
+        oldest = max((age for age in (cache.age(key, data_type) for key in keys) if age is not None), default=0.0)
+        return max(0, int(cache.ttl_for(data_type) - oldest))
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # Keep request logging quiet unless the server asks for it
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class MarketDataServer(ThreadingHTTPServer):
+    """
+    A threaded HTTP server that owns one MarketDataProvider
+
+    All requests share the provider's cache and in-flight coalescing, so
+    upstream is called at most once per TTL however many clients poll.
+    """
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], provider: Optional[MarketDataProvider] = None,
+                 verbose: bool = False):
+        super().__init__(address, MarketDataHandler)
+        self.provider = provider if provider is not None else MarketDataProvider()
+        self.verbose = verbose
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve market quotes and history over HTTP")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    server = MarketDataServer((args.host, args.port), verbose=args.verbose)
+    print(f"Serving market data on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,19 @@ import plotly.express as px
 from datetime import datetime, timedelta
 import time
 import asyncio
+import math
+import re
+import uuid
 from market_data import MarketDataProvider
-from utils import format_currency, format_percentage, get_market_status, get_color_for_change
+from market_core import SymbolRecord, get_symbol_index
+from market_poller import MarketPoller
+from indicators import AVAILABLE_INDICATORS, compute_indicators
+from charts import build_price_figure, build_line_figure, data_version, get_figure_cache
+from downsampling import downsample_for_chart
+from utils import format_currency, format_percentage, get_market_status, get_color_for_change, style_summary_frame
+from instrumentation import RerunProfile, start_metrics_server
+from diagnostics import diagnostics_enabled, render_diagnostics, save_profile
+from watchlists import SORT_COLUMNS, WatchlistStore, get_watchlist_table
 
 # Page configuration
 st.set_page_config(
@@ -16,12 +27,65 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Seconds to wait for the poller to fetch symbols it has not seen yet
+QUOTE_TIMEOUT = 15
+
+# Most listings suggested for a search query
+SUGGESTION_LIMIT = 10
+
+# Queries shaped like a ticker, which are tried upstream when the listing lacks them
+SYMBOL_PATTERN = re.compile(r"^[A-Z0-9^][A-Z0-9.=^-]{0,15}$")
+
+# Rows per page offered by the watchlist table
+WATCHLIST_PAGE_SIZES = [25, 50, 100, 200]
+
+# Label of the watchlist view; its symbols are only polled while it is shown
+WATCHLIST_VIEW = "📋 Watchlists"
+
+# Widgets inside views and their initial values (None lets the widget pick);
+# their state is kept while another view is shown
+VIEW_WIDGET_DEFAULTS = {
+    "chart_index": None,
+    "chart_time_range": "3M",
+    "chart_type": "Line",
+    "chart_overlays": [],
+    "search_time_range": "1M",
+    "watchlist_name": None,
+    "watchlist_filter": "",
+    "watchlist_sort": "Symbol",
+    "watchlist_descending": False,
+    "watchlist_page": 1,
+    "watchlist_page_size": 50
+}
+
+# Time spent in each part of this script run
+profile = RerunProfile("app")
+
 # Initialize market data provider
 @st.cache_resource
 def get_market_provider():
     return MarketDataProvider()
 
+# One background poller per process refreshes quotes for every session
+@st.cache_resource
+def get_market_poller():
+    return MarketPoller(get_market_provider()).start()
+
+# Saved watchlists, shared by every session
+@st.cache_resource
+def get_watchlist_store():
+    return WatchlistStore.open_default()
+
 market_provider = get_market_provider()
+market_poller = get_market_poller()
+watchlist_store = get_watchlist_store()
+figure_cache = get_figure_cache()
+
+# Serve /metrics on MARKET_METRICS_PORT when it is set
+start_metrics_server()
+
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 
 # Sidebar configuration
 st.sidebar.title("🌍 Global Markets")
@@ -58,34 +122,125 @@ selected_indices = st.sidebar.multiselect(
 
 # Search functionality
 st.sidebar.subheader("Search Stocks")
-search_symbol = st.sidebar.text_input("Enter Stock Symbol (e.g., AAPL, GOOGL)")
+search_query = st.sidebar.text_input("Symbol or company (e.g., AAPL, Apple)", key="search_query").strip()
+
+# Suggestions come from the local symbol index. The bundled listing only
+# holds the most traded symbols, so a ticker-shaped query it lacks is
+# unverified rather than unknown and is checked upstream as typed; without
+# a listing every query is used as typed
+symbol_index = get_symbol_index()
+search_symbol = ""
+if search_query and symbol_index is None:
+    search_symbol = search_query.upper()
+elif search_query:
+    suggestions = symbol_index.search(search_query, limit=SUGGESTION_LIMIT)
+    typed_symbol = search_query.upper()
+    if suggestions and SYMBOL_PATTERN.match(typed_symbol) and typed_symbol not in symbol_index:
+        # Name matches must not hide an unlisted ticker typed in full; it
+        # leads the options when typed in capitals, as tickers are
+        typed_record = SymbolRecord(typed_symbol, "", "", "")
+        if search_query == typed_symbol:
+            suggestions.insert(0, typed_record)
+        else:
+            suggestions.append(typed_record)
+    if suggestions:
+        search_symbol = st.sidebar.selectbox(
+            "Matches",
+            suggestions,
+            format_func=lambda record: (f"{record.symbol} · {record.name} ({record.exchange})" if record.name
+                                        else f"{record.symbol} · not in local listing")
+        ).symbol
+    elif SYMBOL_PATTERN.match(typed_symbol):
+        search_symbol = typed_symbol
+        st.sidebar.caption(f"{search_symbol} is not in the local listing; checking Yahoo")
+    else:
+        st.sidebar.error(f"No listed symbol or company matches '{search_query}'")
+
+# Tell the shared poller which symbols this session displays
+watched_symbols = [available_indices[index_name] for index_name in selected_indices]
+if search_symbol:
+    watched_symbols.append(search_symbol.upper())
+
+def active_watchlist_symbols():
+    if watchlist_store is None or st.session_state.get("active_view") != WATCHLIST_VIEW:
+        return []
+    name = st.session_state.get("watchlist_name")
+    return watchlist_store.get(name) if name else []
+
+def watch_session_symbols():
+    market_poller.watch(
+        st.session_state.session_id,
+        watched_symbols + active_watchlist_symbols(),
+        interval=refresh_interval if auto_refresh else None
+    )
+
+watch_session_symbols()
+
+# Live sections rerun on their own on this cadence instead of the whole script
+live_refresh_every = refresh_interval if auto_refresh else None
 
 # Main dashboard
 st.title("📈 Global Stock Market Dashboard")
 st.markdown("Real-time market data and interactive charts")
 
 # Last update time
-last_update_placeholder = st.empty()
+@st.fragment(run_every=live_refresh_every)
+def render_last_updated():
+    snapshot = market_poller.snapshot()
+    as_of = datetime.fromtimestamp(snapshot.as_of).strftime('%Y-%m-%d %H:%M:%S') if snapshot.as_of else "waiting for data"
+    
+    if auto_refresh:
+        st.info(f"Last updated: {as_of} | Auto-refresh: {refresh_interval}s")
+    else:
+        st.info(f"Last updated: {as_of} | Auto-refresh: Disabled")
 
-# Create tabs
-tab1, tab2, tab3 = st.tabs(["📊 Market Overview", "📈 Detailed Charts", "🔍 Stock Search"])
+render_last_updated()
 
-with tab1:
-    st.header("Major Global Indices")
+# Widgets of views that are not rendered would otherwise lose their
+# state; storing each value back keeps it for when the view returns
+for widget_key, default in VIEW_WIDGET_DEFAULTS.items():
+    if widget_key in st.session_state:
+        st.session_state[widget_key] = st.session_state[widget_key]
+    elif default is not None:
+        st.session_state[widget_key] = default
+
+# Overview cards, summary table and comparison chart; on a price tick only
+# this fragment reruns, so charts, search and the sidebar are not recomputed
+@st.fragment(run_every=live_refresh_every)
+def render_market_overview():
+    # Keep this session's symbols on the poller's watch list between full reruns
+    watch_session_symbols()
+    
+    # Fragment reruns are profiled on their own
+    overview_profile = RerunProfile("app.overview")
     
     if selected_indices:
         # Create progress bar for loading
         progress_bar = st.progress(0)
         status_text = st.empty()
         
-        # Fetch data for selected indices
-        indices_data = []
-        for i, index_name in enumerate(selected_indices):
-            symbol = available_indices[index_name]
-            status_text.text(f"Loading {index_name}...")
-            
-            try:
-                data = market_provider.get_current_price(symbol)
+        # Quotes come from the shared poller; wait for symbols it has not
+        # fetched yet and advance progress as they show up in the snapshot
+        symbols = [available_indices[index_name] for index_name in selected_indices]
+        deadline = time.time() + QUOTE_TIMEOUT
+        
+        with overview_profile.section("fetch"):
+            while True:
+                snapshot = market_poller.wait_for(symbols, timeout=0.25)
+                loaded = sum(1 for symbol in symbols if snapshot.get(symbol) is not None)
+                progress_bar.progress(loaded / len(symbols))
+                status_text.text(f"Loaded {loaded} of {len(symbols)} indices...")
+                
+                if loaded == len(symbols) or time.time() >= deadline or market_poller.has_polled(symbols):
+                    break
+        
+        quotes = snapshot.quotes
+        
+        with overview_profile.section("frames"):
+            indices_data = []
+            for index_name in selected_indices:
+                symbol = available_indices[index_name]
+                data = quotes.get(symbol)
                 if data:
                     market_status = get_market_status(symbol)
                     indices_data.append({
@@ -95,12 +250,9 @@ with tab1:
                         'Change': data['change'],
                         'Change %': data['change_percent'],
                         'Volume': data.get('volume', 'N/A'),
-                        'Market Status': market_status
+                        'Market Status': market_status,
+                        'As Of Close': data.get('as_of_close', False)
                     })
-            except Exception as e:
-                st.error(f"Error loading {index_name}: {str(e)}")
-            
-            progress_bar.progress((i + 1) / len(selected_indices))
         
         progress_bar.empty()
         status_text.empty()
@@ -122,44 +274,48 @@ with tab1:
                     
                     st.caption(f"Volume: {data['Volume']}")
                     st.caption(f"Status: {data['Market Status']}")
+                    if data['As Of Close']:
+                        # Closed markets are not polled, so this is the closing quote
+                        st.caption("Price as of close")
             
             # Create summary table
             st.subheader("Summary Table")
-            df = pd.DataFrame(indices_data)
             
-            # Format the dataframe for better display
-            df_display = df.copy()
-            df_display['Price'] = df_display['Price'].apply(format_currency)
-            df_display['Change'] = df_display['Change'].apply(format_currency)
-            df_display['Change %'] = df_display['Change %'].apply(format_percentage)
+            # Format whole columns at once and colour the changes
+            with overview_profile.section("frames"):
+                df = pd.DataFrame(indices_data)
+                summary_table = style_summary_frame(df[['Index', 'Price', 'Change', 'Change %', 'Market Status']])
             
-            st.dataframe(
-                df_display[['Index', 'Price', 'Change', 'Change %', 'Market Status']],
-                use_container_width=True,
-                hide_index=True
-            )
+            st.dataframe(summary_table, use_container_width=True, hide_index=True)
             
             # Market performance chart
             st.subheader("Daily Performance Comparison")
-            fig = px.bar(
-                df,
-                x='Index',
-                y='Change %',
-                color='Change %',
-                color_continuous_scale=['red', 'white', 'green'],
-                title="Daily Change Percentage by Index"
-            )
-            fig.update_layout(height=400)
+            with overview_profile.section("figures"):
+                fig = px.bar(
+                    df,
+                    x='Index',
+                    y='Change %',
+                    color='Change %',
+                    color_continuous_scale=['red', 'white', 'green'],
+                    title="Daily Change Percentage by Index"
+                )
+                fig.update_layout(height=400)
             st.plotly_chart(fig, use_container_width=True)
     
     else:
         st.info("Please select at least one index from the sidebar to display market data.")
+    
+    save_profile("app.overview", overview_profile)
 
-with tab2:
+def render_overview_view():
+    st.header("Major Global Indices")
+    render_market_overview()
+
+def render_charts_view():
     st.header("Historical Charts")
     
     if selected_indices:
-        chart_index = st.selectbox("Select Index for Detailed Chart", selected_indices)
+        chart_index = st.selectbox("Select Index for Detailed Chart", selected_indices, key="chart_index")
         
         if chart_index:
             symbol = available_indices[chart_index]
@@ -168,58 +324,54 @@ with tab2:
             time_range = st.selectbox(
                 "Select Time Range",
                 ["1D", "5D", "1M", "3M", "6M", "1Y", "2Y", "5Y"],
-                index=3
+                key="chart_time_range"
             )
             
             # Chart type selection
             chart_type = st.selectbox(
                 "Chart Type",
                 ["Line", "Candlestick", "OHLC"],
-                index=0
+                key="chart_type"
+            )
+            
+            selected_overlays = st.multiselect(
+                "Indicators",
+                list(AVAILABLE_INDICATORS),
+                key="chart_overlays"
             )
             
             try:
-                with st.spinner(f"Loading historical data for {chart_index}..."):
+                with st.spinner(f"Loading historical data for {chart_index}..."), profile.section("fetch"):
                     historical_data = market_provider.get_historical_data(symbol, time_range)
                 
                 if historical_data is not None and not historical_data.empty:
-                    fig = go.Figure()
-                    
-                    if chart_type == "Line":
-                        fig.add_trace(go.Scatter(
-                            x=historical_data.index,
-                            y=historical_data['Close'],
-                            mode='lines',
-                            name='Close Price',
-                            line=dict(color='blue', width=2)
-                        ))
-                    
-                    elif chart_type == "Candlestick":
-                        fig.add_trace(go.Candlestick(
-                            x=historical_data.index,
-                            open=historical_data['Open'],
-                            high=historical_data['High'],
-                            low=historical_data['Low'],
-                            close=historical_data['Close'],
-                            name=chart_index
-                        ))
-                    
-                    elif chart_type == "OHLC":
-                        fig.add_trace(go.Ohlc(
-                            x=historical_data.index,
-                            open=historical_data['Open'],
-                            high=historical_data['High'],
-                            low=historical_data['Low'],
-                            close=historical_data['Close'],
-                            name=chart_index
-                        ))
+                    def build_detailed_chart():
+                        with profile.section("frames"):
+                            # Indicators update incrementally from the last bar seen for this series
+                            indicator_values = compute_indicators(
+                                symbol,
+                                market_provider.get_history_interval(time_range),
+                                historical_data,
+                                selected_overlays
+                            )
+                            
+                            # Only send as many points as the chart can show; stats below use the full data
+                            plot_data, plot_indicators = downsample_for_chart(historical_data, chart_type, indicator_values)
+                        
+                        with profile.section("figures"):
+                            return build_price_figure(
+                                plot_data,
+                                title=f"{chart_index} - {time_range} Chart",
+                                chart_type=chart_type,
+                                name=chart_index,
+                                indicators=plot_indicators
+                            )
                     
-                    fig.update_layout(
-                        title=f"{chart_index} - {time_range} Chart",
-                        xaxis_title="Date",
-                        yaxis_title="Price",
-                        height=600,
-                        showlegend=True
+                    # Reruns with the same inputs and data reuse the figure built last time
+                    fig = figure_cache.get_or_build(
+                        ("detail", symbol, time_range, chart_type, tuple(selected_overlays),
+                         data_version(historical_data)),
+                        build_detailed_chart
                     )
                     
                     st.plotly_chart(fig, use_container_width=True)
@@ -249,13 +401,16 @@ with tab2:
     else:
         st.info("Please select an index from the Market Overview tab to view detailed charts.")
 
-with tab3:
+def set_search_query(symbol):
+    st.session_state.search_query = symbol
+
+def render_search_view():
     st.header("Stock Search")
     
     if search_symbol:
         try:
-            with st.spinner(f"Searching for {search_symbol.upper()}..."):
-                stock_data = market_provider.get_current_price(search_symbol.upper())
+            with st.spinner(f"Searching for {search_symbol.upper()}..."), profile.section("fetch"):
+                stock_data = market_poller.wait_for([search_symbol.upper()], timeout=QUOTE_TIMEOUT).get(search_symbol.upper())
                 
             if stock_data:
                 st.success(f"Found data for {search_symbol.upper()}")
@@ -274,33 +429,30 @@ with tab3:
                     if 'volume' in stock_data:
                         st.metric("Volume", f"{stock_data['volume']:,}")
                 
+                if stock_data.get('as_of_close'):
+                    st.caption("Market closed: price as of close")
+                
                 # Get historical data for the searched stock
                 time_range_search = st.selectbox(
                     "Time Range for Chart",
                     ["1D", "5D", "1M", "3M", "6M", "1Y"],
-                    index=2,
                     key="search_time_range"
                 )
                 
-                historical_search = market_provider.get_historical_data(search_symbol.upper(), time_range_search)
+                with profile.section("fetch"):
+                    historical_search = market_provider.get_historical_data(search_symbol.upper(), time_range_search)
                 
                 if historical_search is not None and not historical_search.empty:
                     # Create line chart
-                    fig = go.Figure()
-                    fig.add_trace(go.Scatter(
-                        x=historical_search.index,
-                        y=historical_search['Close'],
-                        mode='lines',
-                        name=search_symbol.upper(),
-                        line=dict(color='blue', width=2)
-                    ))
-                    
-                    fig.update_layout(
-                        title=f"{search_symbol.upper()} - {time_range_search} Price Chart",
-                        xaxis_title="Date",
-                        yaxis_title="Price",
-                        height=400
-                    )
+                    with profile.section("figures"):
+                        fig = figure_cache.get_or_build(
+                            ("search", search_symbol.upper(), time_range_search, data_version(historical_search)),
+                            lambda: build_line_figure(
+                                downsample_for_chart(historical_search)[0],
+                                title=f"{search_symbol.upper()} - {time_range_search} Price Chart",
+                                name=search_symbol.upper()
+                            )
+                        )
                     
                     st.plotly_chart(fig, use_container_width=True)
                 
@@ -311,7 +463,10 @@ with tab3:
             st.error(f"Error searching for {search_symbol.upper()}: {str(e)}")
     
     else:
-        st.info("Enter a stock symbol in the sidebar to search for specific stock data.")
+        if search_query:
+            st.warning(f"No listed symbol or company matches '{search_query}'.")
+        else:
+            st.info("Enter a stock symbol in the sidebar to search for specific stock data.")
         
         # Popular stocks suggestions
         st.subheader("Popular Stocks")
@@ -319,29 +474,146 @@ with tab3:
         
         cols = st.columns(4)
         for i, stock in enumerate(popular_stocks):
-            if cols[i % 4].button(stock):
-                st.session_state.search_symbol = stock
-                st.rerun()
+            cols[i % 4].button(stock, on_click=set_search_query, args=(stock,))
 
-# Auto-refresh functionality
-if auto_refresh:
-    last_update_placeholder.info(f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} | Auto-refresh: {refresh_interval}s")
+def save_watchlist():
+    """Apply the watchlist editor form, keeping symbols the listing does not know but naming them"""
+    name = st.session_state.watchlist_edit_name.strip()
+    symbols = [symbol.upper() for symbol in re.split(r"[\s,;]+", st.session_state.watchlist_edit_symbols) if symbol]
+    if st.session_state.watchlist_edit_listing and symbol_index is not None:
+        symbols += [record.symbol for record in symbol_index]
     
-    # Auto-refresh after specified interval
-    time.sleep(0.1)  # Small delay to prevent immediate refresh
+    # The bundled listing is far from complete, so unlisted symbols are
+    # saved anyway and are simply left without a name or quote if invalid
+    unknown = list(dict.fromkeys(
+        symbol for symbol in symbols if symbol_index is not None and symbol not in symbol_index
+    ))
     
-    # Use JavaScript to refresh the page after the interval
-    if 'last_refresh' not in st.session_state:
-        st.session_state.last_refresh = time.time()
+    try:
+        if st.session_state.watchlist_edit_mode == "Replace":
+            saved = watchlist_store.save(name, symbols)
+        else:
+            saved = watchlist_store.add(name, symbols)
+    except ValueError as e:
+        st.session_state.watchlist_message = ("error", str(e))
+        return
     
-    if time.time() - st.session_state.last_refresh > refresh_interval:
-        st.session_state.last_refresh = time.time()
-        st.rerun()
+    st.session_state.watchlist_name = name
+    st.session_state.watchlist_page = 1
+    message = f"Saved {name} with {len(saved)} symbols."
+    if unknown:
+        shown = ", ".join(unknown[:10]) + (f" and {len(unknown) - 10} more" if len(unknown) > 10 else "")
+        st.session_state.watchlist_message = ("warning", f"{message} Not in the local listing, kept unverified: {shown}")
+    else:
+        st.session_state.watchlist_message = ("success", message)
+
+def delete_watchlist():
+    name = st.session_state.get("watchlist_name")
+    if name:
+        watchlist_store.delete(name)
+        st.session_state.watchlist_name = None
+        st.session_state.watchlist_message = ("success", f"Deleted {name}.")
+
+# Paging, sorting and filtering rerun only this fragment. The table is
+# built once per list and poll, and only the visible page is formatted.
+@st.fragment(run_every=live_refresh_every)
+def render_watchlist_table():
+    watch_session_symbols()
+    
+    watchlist_profile = RerunProfile("app.watchlist")
+    names = watchlist_store.names()
+    if st.session_state.get("watchlist_name") not in names:
+        st.session_state.watchlist_name = names[0]
+    
+    col1, col2, col3, col4 = st.columns([2, 2, 2, 1])
+    with col1:
+        name = st.selectbox("Watchlist", names, key="watchlist_name")
+    with col2:
+        filter_text = st.text_input("Filter", key="watchlist_filter", placeholder="Symbol or company")
+    with col3:
+        sort_by = st.selectbox("Sort by", SORT_COLUMNS, key="watchlist_sort")
+    with col4:
+        descending = st.checkbox("Descending", key="watchlist_descending")
+    
+    symbols = watchlist_store.get(name)
+    if not symbols:
+        st.info(f"{name} is empty. Add symbols with the editor below.")
+        save_profile("app.watchlist", watchlist_profile)
+        return
+    
+    # The poller fetches the list in batched chunks; wait for its first round
+    with st.spinner(f"Loading {len(symbols)} quotes..."), watchlist_profile.section("fetch"):
+        snapshot = market_poller.wait_for(symbols, timeout=QUOTE_TIMEOUT)
+    
+    page_size = st.session_state.watchlist_page_size
+    with watchlist_profile.section("frames"):
+        table = get_watchlist_table(symbols, snapshot.quotes, snapshot.version, symbol_index)
+        page_frame, matched = table.query(filter_text, sort_by, descending,
+                                          st.session_state.watchlist_page - 1, page_size)
+        pages = max(1, math.ceil(matched / page_size))
+        st.session_state.watchlist_page = min(st.session_state.watchlist_page, pages)
+        page_table = style_summary_frame(page_frame)
+    
+    st.caption(f"{matched:,} of {len(table):,} symbols match · quotes for {table.loaded:,} loaded")
+    st.dataframe(page_table, use_container_width=True, hide_index=True)
+    
+    col1, col2, _ = st.columns([1, 1, 3])
+    with col1:
+        st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, step=1, key="watchlist_page")
+    with col2:
+        st.selectbox("Rows per page", WATCHLIST_PAGE_SIZES, key="watchlist_page_size")
+    
+    save_profile("app.watchlist", watchlist_profile)
 
-else:
-    last_update_placeholder.info(f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} | Auto-refresh: Disabled")
+def render_watchlist_view():
+    st.header("Watchlists")
+    
+    if watchlist_store is None:
+        st.error("Watchlists are unavailable: the local watchlist store could not be opened.")
+        return
+    
+    message = st.session_state.pop("watchlist_message", None)
+    if message:
+        getattr(st, message[0])(message[1])
     
-    # Manual refresh button
+    names = watchlist_store.names()
+    if names:
+        render_watchlist_table()
+    else:
+        st.info("Create a watchlist to track hundreds of symbols in one paged table.")
+    
+    with st.expander("Create or edit a watchlist", expanded=not names):
+        with st.form("watchlist_editor", clear_on_submit=True):
+            st.text_input("Name", value=st.session_state.get("watchlist_name") or "", key="watchlist_edit_name")
+            st.text_area("Symbols", placeholder="AAPL, MSFT, 7203.T ... separated by commas, spaces or lines",
+                         key="watchlist_edit_symbols")
+            st.radio("Mode", ["Add", "Replace"], horizontal=True, key="watchlist_edit_mode")
+            st.checkbox("Include every symbol in the listing", key="watchlist_edit_listing",
+                        disabled=symbol_index is None)
+            st.form_submit_button("Save watchlist", on_click=save_watchlist)
+        
+        if names:
+            st.button(f"Delete {st.session_state.get('watchlist_name')}", on_click=delete_watchlist)
+
+def render_diagnostics_view():
+    render_diagnostics(profile)
+
+# Only the selected view runs, so a rerun fetches and builds nothing for
+# the others; the diagnostics view only appears with ?diagnostics=1
+views = {
+    "📊 Market Overview": render_overview_view,
+    "📈 Detailed Charts": render_charts_view,
+    "🔍 Stock Search": render_search_view,
+    WATCHLIST_VIEW: render_watchlist_view
+}
+if diagnostics_enabled():
+    views["🩺 Diagnostics"] = render_diagnostics_view
+
+active_view = st.radio("View", list(views), horizontal=True, key="active_view", label_visibility="collapsed")
+views[active_view]()
+
+# Manual refresh when auto-refresh is off
+if not auto_refresh:
     if st.button("🔄 Refresh Data"):
         st.rerun()
 
@@ -356,3 +628,5 @@ st.markdown(
     """,
     unsafe_allow_html=True
 )
+
+save_profile("app", profile)
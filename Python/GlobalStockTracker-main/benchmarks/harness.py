@@ -0,0 +1,148 @@
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Optional
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+
+@dataclass
+class BenchmarkResult:
+    """
+    Timing percentiles in milliseconds and allocation counts for one case
+    """
+    name: str
+    runs: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    mean_ms: float
+    peak_kib: float        # Peak traced memory during one run
+    allocated_kib: float   # Memory still allocated after one run
+    allocations: int       # Blocks allocated by one run
+
+
+def run_case(name: str, fn: Callable[[], Any], runs: int = 50, warmup: int = 3,
+             setup: Optional[Callable[[], Any]] = None) -> BenchmarkResult:
+    """
+    Time fn over runs iterations and trace the allocations of one more
+
+    setup runs before every iteration, outside the timed region, so cases
+    can reset caches to measure cold paths. Tracing is done on a separate
+    run because tracemalloc slows allocation-heavy code down.
+    """
+    for _ in range(warmup):
+        if setup:
+            setup()
+        fn()
+
+    timings = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(runs):
+            if setup:
+                setup()
+            start = time.perf_counter_ns()
+            fn()
+            timings.append((time.perf_counter_ns() - start) / 1e6)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    if setup:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    diff = after.compare_to(before, "filename")
+    p50, p95, p99 = np.percentile(timings, [50, 95, 99])
+    return BenchmarkResult(
+        name=name,
+        runs=runs,
+        p50_ms=float(p50),
+        p95_ms=float(p95),
+        p99_ms=float(p99),
+        mean_ms=float(np.mean(timings)),
+        peak_kib=peak / 1024,
+        allocated_kib=sum(stat.size_diff for stat in diff) / 1024,
+        allocations=sum(max(stat.count_diff, 0) for stat in diff)
+    )
+
+
+def environment() -> Dict[str, str]:
+    """Versions that affect the numbers, stored alongside a baseline"""
+    import pandas as pd
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+    }
+
+
+def save_baseline(path: str, results: Dict[str, BenchmarkResult]) -> None:
+    """Write results and the environment to a baseline JSON file"""
+    payload = {
+        "environment": environment(),
+        "results": {name: asdict(result) for name, result in results.items()}
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+
+
+def load_baseline(path: str) -> Dict[str, Dict[str, Any]]:
+    """Read the results of a baseline JSON file"""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def format_report(results: Dict[str, BenchmarkResult], baseline: Optional[Dict[str, Dict[str, Any]]] = None,
+                  threshold: float = 1.25) -> str:
+    """
+    Render results as a fixed-width table
+
+    With a baseline, each row shows p50 relative to it and is flagged when
+    the ratio exceeds threshold.
+    """
+    header = f"{'case':<34} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'peak KiB':>10} {'allocs':>8}"
+    if baseline is not None:
+        header += f" {'vs base':>9}"
+    lines = [header, "-" * len(header)]
+
+    for name, result in results.items():
+        line = (f"{name:<34} {result.p50_ms:>10.3f} {result.p95_ms:>10.3f} {result.p99_ms:>10.3f} "
+                f"{result.peak_kib:>10.1f} {result.allocations:>8d}")
+        if baseline is not None:
+            base = baseline.get(name)
+            if base and base["p50_ms"] > 0:
+                ratio = result.p50_ms / base["p50_ms"]
+                line += f" {ratio:>8.2f}x" + (" !" if ratio > threshold else "")
+            else:
+                line += f" {'new':>9}"
+        lines.append(line)
+
+    return "\n".join(lines)
+
+
+def regressions(results: Dict[str, BenchmarkResult], baseline: Dict[str, Dict[str, Any]],
+                threshold: float = 1.25) -> Dict[str, float]:
+    """Cases whose p50 grew by more than threshold times the baseline"""
+    slower = {}
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base and base["p50_ms"] > 0 and result.p50_ms / base["p50_ms"] > threshold:
+            slower[name] = result.p50_ms / base["p50_ms"]
+    return slower
@@ -0,0 +1,115 @@
+"""
+Cold-start cost of the market data core for non-UI consumers
+
+Each target is imported in a fresh interpreter, several times, and the
+import wall time, resident memory growth and modules loaded are
+reported. --check fails if a UI-free target pulls in a heavy module
+such as streamlit, pandas or yfinance. Usage, from the project directory:
+
+    python benchmarks/import_benchmark.py
+    python benchmarks/import_benchmark.py --check
+"""
+from typing import Dict, List
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules a UI-free consumer should not pay for until it needs them
+HEAVY_MODULES = ("streamlit", "plotly", "yfinance", "pandas", "numpy", "pyarrow")
+
+# Name -> (statement to time, whether heavy modules are allowed)
+TARGETS = {
+    "market_core": ("import market_core", False),
+    "market_core.MarketDataProvider": ("from market_core import MarketDataProvider", False),
+    "provider.construct": (
+        "from market_core import MarketDataProvider\n"
+        "MarketDataProvider(persist_history=False)",
+        False
+    ),
+    "market_poller": ("import market_poller", False),
+    "api_server": ("import api_server", False),
+    "market_data (Streamlit adapter)": ("import market_data", True)
+}
+
+# Runs in the child interpreter: time the statement and report what it loaded
+# (the peak RSS is inherited from the parent across exec, so read the current one)
+_CHILD = """
+import json, resource, sys, time
+def rss_kib():
+    try:
+        with open("/proc/self/status") as f:
+            return next(int(line.split()[1]) for line in f if line.startswith("VmRSS:"))
+    except (OSError, StopIteration):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+before_modules = set(sys.modules)
+before_rss = rss_kib()
+start = time.perf_counter()
+exec(compile(sys.argv[1], "<target>", "exec"))
+elapsed = time.perf_counter() - start
+loaded = set(sys.modules) - before_modules
+print(json.dumps({
+    "ms": elapsed * 1000,
+    "rss_kib": rss_kib() - before_rss,
+    "modules": len(loaded),
+    "heavy": sorted(name for name in loaded if name.split(".")[0] in %r and "." not in name)
+}))
+""" % (HEAVY_MODULES,)
+
+
+def measure(statement: str, runs: int) -> Dict[str, object]:
+    """Import statement in runs fresh interpreters and summarize the samples"""
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", _CHILD, statement],
+            cwd=PROJECT_DIR,
+            env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    times = [sample["ms"] for sample in samples]
+    return {
+        "p50_ms": float(np.percentile(times, 50)),
+        "p95_ms": float(np.percentile(times, 95)),
+        "rss_mib": float(np.median([sample["rss_kib"] for sample in samples])) / 1024,
+        "modules": samples[-1]["modules"],
+        "heavy": samples[-1]["heavy"]
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure cold import cost of the market data core")
+    parser.add_argument("--runs", type=int, default=7, help="Fresh interpreters per target")
+    parser.add_argument("--check", action="store_true",
+                        help="Exit non-zero if a UI-free target imports a heavy module")
+    args = parser.parse_args()
+
+    header = f"{'target':<34} {'p50 ms':>9} {'p95 ms':>9} {'RSS MiB':>9} {'modules':>8}  heavy"
+    print(header)
+    print("-" * len(header))
+
+    violations: List[str] = []
+    for name, (statement, heavy_allowed) in TARGETS.items():
+        result = measure(statement, args.runs)
+        print(f"{name:<34} {result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} {result['rss_mib']:>9.1f} "
+              f"{result['modules']:>8d}  {', '.join(result['heavy']) or '-'}")
+        if result['heavy'] and not heavy_allowed:
+            violations.append(f"{name} imports {', '.join(result['heavy'])}")
+
+    if args.check and violations:
+        print("\n" + "\n".join(violations))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+"""
+Benchmarks for the market-data and metrics hot paths
+
+Every case runs offline against the replay backend, so numbers are
+repeatable and need no network. Usage, from the project directory:
+
+    python benchmarks/run_benchmarks.py                  # run and print
+    python benchmarks/run_benchmarks.py --save           # also write the baseline
+    python benchmarks/run_benchmarks.py --compare        # flag regressions vs the baseline
+    python benchmarks/run_benchmarks.py -k history       # only cases containing "history"
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from harness import BenchmarkResult, format_report, load_baseline, regressions, run_case, save_baseline
+from market_core import MarketDataProvider, SymbolIndex
+from market_core.symbols import DEFAULT_LISTING_PATH, compile_listing
+from ohlcv_store import OHLCVStore
+from providers import ReplayBackend
+from quote_cache import TTLCache
+from rate_limiter import AdaptiveLimiter
+from watchlists import WatchlistTable
+import utils
+
+# Where --save writes and --compare reads by default
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# p50 slowdown beyond which --compare reports a regression
+DEFAULT_THRESHOLD = 1.25
+
+SUMMARY_SIZES = (10, 100, 1000)
+WATCHLIST_SIZES = (500, 2000)
+HISTORY_PERIODS = ("1D", "5D", "1M", "3M", "6M", "1Y", "2Y", "5Y")
+
+# A case is (name, fn, setup, runs)
+Case = Tuple[str, Callable[[], Any], Optional[Callable[[], Any]], int]
+
+
+def _symbols(count: int) -> List[str]:
+    return [f"SYM{i:04d}" for i in range(count)]
+
+
+def provider_cases(workdir: str) -> List[Case]:
+    """Cases for MarketDataProvider backed by a replay backend and a scratch store"""
+    store = OHLCVStore(os.path.join(workdir, "bench.sqlite"))
+    provider = MarketDataProvider(
+        cache=TTLCache(max_size=10_000),
+        stale_while_revalidate=False,
+        store=store,
+        backend=ReplayBackend(seed=42)
+    )
+    clear = provider.cache.clear
+
+    # An uncontended limiter, to time the permit taken around every upstream call
+    limiter = AdaptiveLimiter("bench", max_rate=1e9, burst=10**9)
+
+    def permit():
+        with limiter.permit():
+            pass
+
+    cases = [
+        ("quote.hit", lambda: provider.get_current_price("AAPL"), None, 2000),
+        ("quote.miss", lambda: provider.get_current_price("AAPL"), clear, 200),
+        ("rate_limiter.permit", permit, None, 2000)
+    ]
+
+    for size in SUMMARY_SIZES:
+        symbols = _symbols(size)
+        runs = 20 if size >= 1000 else 50
+        cases.append((f"summary.cold.{size}", lambda s=symbols: provider.get_market_summary(s), clear, runs))
+        cases.append((f"summary.warm.{size}", lambda s=symbols: provider.get_market_summary(s), None, runs))
+
+    for period in HISTORY_PERIODS:
+        # The store is warm after the first run, so this times the incremental path
+        cases.append((f"history.{period}", lambda p=period: provider.get_historical_data("AAPL", p), clear, 30))
+
+    return cases
+
+
+def metrics_cases() -> List[Case]:
+    """Cases for the performance metric helpers in utils"""
+    backend = ReplayBackend(seed=42)
+    daily = backend.fetch_history("AAPL", "1d", "5y")
+    histories = {symbol: backend.fetch_history(symbol, "1d", "1y") for symbol in _symbols(100)}
+    stacked = utils.stack_history_frames(histories)
+
+    return [
+        ("metrics.single.5y", lambda: utils.calculate_performance_metrics(daily), None, 200),
+        ("metrics.batch.100x1y", lambda: utils.calculate_batch_performance_metrics(
+            stacked['close'], stacked['high'], stacked['low'], stacked['volume']), None, 100)
+    ]
+
+
+def symbol_cases(workdir: str) -> List[Case]:
+    """Cases for compiling, opening and searching the bundled symbol index"""
+    index_path = os.path.join(workdir, "listings.idx")
+    index = SymbolIndex.open(DEFAULT_LISTING_PATH, index_path)
+
+    return [
+        ("symbols.compile", lambda: compile_listing(DEFAULT_LISTING_PATH, index_path), None, 50),
+        ("symbols.open", lambda: SymbolIndex.open(DEFAULT_LISTING_PATH, index_path).close(), None, 200),
+        ("symbols.lookup", lambda: index.lookup("MSFT"), None, 2000),
+        ("symbols.search.prefix", lambda: index.search("GO"), None, 2000),
+        ("symbols.search.name", lambda: index.search("bank america"), None, 2000),
+        ("symbols.search.fuzzy", lambda: index.search("mircosoft"), None, 500)
+    ]
+
+
+def watchlist_cases() -> List[Case]:
+    """Cases for building watchlist tables and styling one page of them"""
+    backend = ReplayBackend(seed=42)
+    cases = []
+    for size in WATCHLIST_SIZES:
+        symbols = _symbols(size)
+        quotes = backend.fetch_quotes(symbols)
+        table = WatchlistTable(symbols, quotes)
+        cases.append((f"watchlist.build.{size}", lambda s=symbols, q=quotes: WatchlistTable(s, q), None, 50))
+        cases.append((f"watchlist.page.{size}", lambda t=table: utils.style_summary_frame(
+            t.query(sort_by="Change %", descending=True, page=3, page_size=50)[0]).to_html(), None, 100))
+        cases.append((f"watchlist.filter.{size}", lambda t=table: t.query("SYM1", sort_by="Price"), None, 200))
+    return cases
+
+
+def formatting_cases() -> List[Case]:
+    """Cases comparing per-cell and column-wise formatting of 1000 values"""
+    rng = np.random.default_rng(42)
+    prices = rng.lognormal(5, 3, 1000)
+    changes = rng.normal(0, 2, 1000)
+    volumes = rng.lognormal(13, 2, 1000)
+    frame = pd.DataFrame({
+        'Index': _symbols(1000),
+        'Price': prices,
+        'Change': prices * changes / 100,
+        'Change %': changes,
+        'Volume': volumes
+    })
+
+    return [
+        ("format.currency.loop.1000", lambda: [utils.format_currency(v) for v in prices], None, 200),
+        ("format.currency.array.1000", lambda: utils.format_currency_array(prices), None, 200),
+        ("format.percentage.loop.1000", lambda: [utils.format_percentage(v) for v in changes], None, 200),
+        ("format.percentage.array.1000", lambda: utils.format_percentage_array(changes), None, 200),
+        ("format.volume.loop.1000", lambda: [utils.format_volume(v) for v in volumes], None, 200),
+        ("format.volume.array.1000", lambda: utils.format_volume_array(volumes), None, 200),
+        ("format.summary_frame.1000", lambda: utils.style_summary_frame(frame).to_html(), None, 20)
+    ]
+
+
+def run(selected: Optional[str] = None, scale: float = 1.0) -> Dict[str, BenchmarkResult]:
+    """Run every case whose name contains selected, scaling run counts by scale"""
+    workdir = tempfile.mkdtemp(prefix="market-bench-")
+    try:
+        cases = provider_cases(workdir) + metrics_cases() + symbol_cases(workdir) + watchlist_cases() + formatting_cases()
+        results = {}
+        for name, fn, setup, runs in cases:
+            if selected and selected not in name:
+                continue
+            results[name] = run_case(name, fn, runs=max(3, int(runs * scale)), setup=setup)
+            print(f"  {name}: p50 {results[name].p50_ms:.3f} ms", file=sys.stderr)
+        return results
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark market-data and metrics hot paths")
+    parser.add_argument("-k", dest="selected", help="Only run cases whose name contains this")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every case's run count")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON path")
+    parser.add_argument("--save", action="store_true", help="Write results to the baseline")
+    parser.add_argument("--compare", action="store_true", help="Compare against the baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="p50 ratio above which a case counts as a regression")
+    args = parser.parse_args()
+
+    results = run(args.selected, args.scale)
+
+    baseline = None
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"No baseline at {args.baseline}; run with --save first", file=sys.stderr)
+            return 2
+        baseline = load_baseline(args.baseline)
+
+    print(format_report(results, baseline, args.threshold))
+
+    if args.save:
+        save_baseline(args.baseline, results)
+        print(f"\nBaseline written to {args.baseline}")
+
+    if baseline is not None:
+        slower = regressions(results, baseline, args.threshold)
+        if slower:
+            print(f"\n{len(slower)} regression(s): " + ", ".join(f"{name} {ratio:.2f}x" for name, ratio in slower.items()))
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
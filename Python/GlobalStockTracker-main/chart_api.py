@@ -0,0 +1,126 @@
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, Optional
+from urllib.parse import quote
+from http_transport import HttpTransport, get_shared_transport
+from rate_limiter import ThrottledError, get_rate_limiter
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Yahoo Finance chart endpoint; the symbol is appended to the path
+CHART_API_URL = "https://query1.finance.yahoo.com/v8/finance/chart/"
+
+# Rate limiter shared by everything calling the chart endpoint, yfinance included
+CHART_ENDPOINT = "chart"
+
+# Status Yahoo answers with when it throttles a client
+THROTTLED_STATUS = 429
+
+
+def parse_chart_quote(payload: Dict[str, Any], symbol: str) -> Optional[Dict[str, Any]]:
+    """
+    Build a quote dict from a chart API response, or None if it has no result
+    """
+    if 'chart' not in payload or not payload['chart'].get('result'):
+        return None
+
+    meta = payload['chart']['result'][0]['meta']
+
+    current_price = meta.get('regularMarketPrice', 0)
+    previous_close = meta.get('previousClose', meta.get('chartPreviousClose', current_price))
+
+    change = current_price - previous_close
+    change_percent = (change / previous_close) * 100 if previous_close != 0 else 0
+
+    return {
+        'symbol': symbol,
+        'price': current_price,
+        'change': change,
+        'change_percent': change_percent,
+        'volume': meta.get('regularMarketVolume', 'N/A'),
+        'previous_close': previous_close,
+        'market_cap': 'N/A',
+        'currency': meta.get('currency', 'USD'),
+        'market_state': meta.get('marketState', 'UNKNOWN')
+    }
+
+
+def fetch_chart_quote(symbol: str, transport: Optional[HttpTransport] = None) -> Optional[Dict[str, Any]]:
+    """
+    Fetch a quote from the chart API over a pooled transport
+
+    Returns None when Yahoo answers without data; raises ThrottledError on
+    a 429 and TransportError on transport errors.
+    """
+    transport = transport or get_shared_transport()
+    with get_rate_limiter(CHART_ENDPOINT).permit():
+        response = transport.get(CHART_API_URL + quote(symbol, safe=""))
+        if response.status_code == THROTTLED_STATUS:
+            raise ThrottledError(f"Yahoo throttled the chart request for {symbol}")
+
+    if response.status_code != 200:
+        return None
+
+    return parse_chart_quote(response.json(), symbol)
+
+
+def parse_chart_history(payload: Dict[str, Any]) -> Optional["pd.DataFrame"]:
+    """
+    Build an OHLCV frame from a chart API response, or None if it has no bars
+
+    The index is named 'Date' and is in the exchange's timezone, like
+    yfinance's Ticker.history.
+    """
+    if 'chart' not in payload or not payload['chart'].get('result'):
+        return None
+
+    result = payload['chart']['result'][0]
+    timestamps = result.get('timestamp')
+    bars = (result.get('indicators', {}).get('quote') or [{}])[0]
+    if not timestamps or not bars:
+        return None
+
+    import pandas as pd
+
+    index = pd.to_datetime(timestamps, unit='s', utc=True)
+    timezone = result.get('meta', {}).get('exchangeTimezoneName')
+    if timezone:
+        index = index.tz_convert(timezone)
+
+    frame = pd.DataFrame({
+        'Open': bars.get('open'),
+        'High': bars.get('high'),
+        'Low': bars.get('low'),
+        'Close': bars.get('close'),
+        'Volume': bars.get('volume')
+    }, index=pd.DatetimeIndex(index, name='Date'), dtype=float)
+    return frame
+
+
+def fetch_chart_history(symbol: str, interval: str, period: Optional[str] = None, start: Optional[Any] = None,
+                        transport: Optional[HttpTransport] = None) -> Optional["pd.DataFrame"]:
+    """
+    Fetch OHLCV bars from the chart API for a period or from a start time onwards
+
+    period takes yfinance codes such as 5d or 1y. Returns None when Yahoo
+    answers without data; raises ThrottledError on a 429 and
+    TransportError on transport errors.
+    """
+    transport = transport or get_shared_transport()
+    params = {'interval': interval}
+    if start is not None:
+        import pandas as pd
+        params['period1'] = int(pd.Timestamp(start).timestamp())
+        params['period2'] = int(datetime.now().timestamp())
+    else:
+        params['range'] = period or "1mo"
+
+    with get_rate_limiter(CHART_ENDPOINT).permit():
+        response = transport.get(CHART_API_URL + quote(symbol, safe=""), params=params)
+        if response.status_code == THROTTLED_STATUS:
+            raise ThrottledError(f"Yahoo throttled the chart request for {symbol}")
+
+    if response.status_code != 200:
+        return None
+
+    return parse_chart_history(response.json())
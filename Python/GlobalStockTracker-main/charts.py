@@ -0,0 +1,246 @@
+from collections import OrderedDict
+from typing import Callable, Hashable, List, Optional
+import hashlib
+import threading
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.basedatatypes import BaseTraceType
+from plotly.subplots import make_subplots
+from instrumentation import Sample, get_metrics
+
+# Line colours for price overlays, by indicator column
+OVERLAY_COLORS = {
+    "SMA 20": "orange",
+    "SMA 50": "purple",
+    "EMA 20": "teal",
+    "BB Upper": "gray",
+    "BB Middle": "gray",
+    "BB Lower": "gray",
+    "VWAP": "brown"
+}
+
+# Line series longer than this are drawn with WebGL (Scattergl) instead of SVG
+WEBGL_THRESHOLD = 1000
+
+# Maximum number of built figures kept for reuse across reruns
+MAX_CACHED_FIGURES = 64
+
+# Indicator columns drawn in their own panel below the price chart
+PANEL_COLUMNS = {
+    "RSI": ["RSI 14"],
+    "MACD": ["MACD", "MACD Signal", "MACD Hist"]
+}
+
+
+def _scatter_type(points: int):
+    """Scatter trace class for a line with this many points"""
+    return go.Scattergl if points > WEBGL_THRESHOLD else go.Scatter
+
+
+def _price_trace(hist: pd.DataFrame, chart_type: str, name: str) -> BaseTraceType:
+    """Build the main price trace for a chart type"""
+    if chart_type == "Candlestick":
+        return go.Candlestick(
+            x=hist.index,
+            open=hist['Open'],
+            high=hist['High'],
+            low=hist['Low'],
+            close=hist['Close'],
+            name=name
+        )
+
+    if chart_type == "OHLC":
+        return go.Ohlc(
+            x=hist.index,
+            open=hist['Open'],
+            high=hist['High'],
+            low=hist['Low'],
+            close=hist['Close'],
+            name=name
+        )
+
+    return _scatter_type(len(hist))(
+        x=hist.index,
+        y=hist['Close'],
+        mode='lines',
+        name='Close Price',
+        line=dict(color='blue', width=2)
+    )
+
+
+def build_price_figure(hist: pd.DataFrame, title: str, chart_type: str = "Line", name: str = "",
+                       indicators: Optional[pd.DataFrame] = None, height: int = 600) -> go.Figure:
+    """
+    Build a price chart with optional indicator overlays
+
+    indicators is the output of indicators.compute_indicators for hist.
+    Moving averages, Bollinger Bands and VWAP are drawn over the price;
+    RSI and MACD each get a panel underneath sharing the x axis.
+    """
+    panels = []
+    if indicators is not None:
+        panels = [panel for panel, columns in PANEL_COLUMNS.items() if columns[0] in indicators.columns]
+
+    rows = 1 + len(panels)
+    row_heights = [1.0] if not panels else [0.6] + [0.4 / len(panels)] * len(panels)
+    fig = make_subplots(rows=rows, cols=1, shared_xaxes=True, vertical_spacing=0.04, row_heights=row_heights)
+
+    fig.add_trace(_price_trace(hist, chart_type, name), row=1, col=1)
+
+    scatter = _scatter_type(len(indicators) if indicators is not None else 0)
+    if indicators is not None:
+        for column in indicators.columns:
+            if column not in OVERLAY_COLORS:
+                continue
+            fig.add_trace(scatter(
+                x=indicators.index,
+                y=indicators[column],
+                mode='lines',
+                name=column,
+                line=dict(color=OVERLAY_COLORS[column], width=1,
+                          dash='dot' if column.startswith("BB ") else None)
+            ), row=1, col=1)
+
+    for row, panel in enumerate(panels, start=2):
+        if panel == "RSI":
+            column = PANEL_COLUMNS["RSI"][0]
+            fig.add_trace(scatter(
+                x=indicators.index, y=indicators[column], mode='lines', name=column,
+                line=dict(color='purple', width=1)
+            ), row=row, col=1)
+            for level in (30, 70):
+                fig.add_hline(y=level, line=dict(color='gray', width=1, dash='dash'), row=row, col=1)
+            fig.update_yaxes(title_text="RSI", range=[0, 100], row=row, col=1)
+
+        elif panel == "MACD":
+            fig.add_trace(go.Bar(
+                x=indicators.index, y=indicators["MACD Hist"], name="MACD Hist",
+                marker_color=['green' if value >= 0 else 'red' for value in indicators["MACD Hist"].fillna(0)]
+            ), row=row, col=1)
+            fig.add_trace(scatter(
+                x=indicators.index, y=indicators["MACD"], mode='lines', name="MACD",
+                line=dict(color='blue', width=1)
+            ), row=row, col=1)
+            fig.add_trace(scatter(
+                x=indicators.index, y=indicators["MACD Signal"], mode='lines', name="MACD Signal",
+                line=dict(color='orange', width=1)
+            ), row=row, col=1)
+            fig.update_yaxes(title_text="MACD", row=row, col=1)
+
+    fig.update_layout(
+        title=title,
+        height=height + 150 * len(panels),
+        showlegend=True
+    )
+    if panels:
+        # The range slider would sit between the price chart and the panels
+        fig.update_layout(xaxis_rangeslider_visible=False)
+    fig.update_xaxes(title_text="Date", row=rows, col=1)
+    fig.update_yaxes(title_text="Price", row=1, col=1)
+
+    return fig
+
+
+def build_line_figure(hist: pd.DataFrame, title: str, name: str, height: int = 400) -> go.Figure:
+    """Build a plain closing-price line chart"""
+    fig = go.Figure()
+    fig.add_trace(_scatter_type(len(hist))(
+        x=hist.index,
+        y=hist['Close'],
+        mode='lines',
+        name=name,
+        line=dict(color='blue', width=2)
+    ))
+
+    fig.update_layout(
+        title=title,
+        xaxis_title="Date",
+        yaxis_title="Price",
+        height=height
+    )
+
+    return fig
+
+
+def data_version(hist: Optional[pd.DataFrame]) -> str:
+    """
+    Fingerprint of a history frame's index and values
+
+    Changes whenever any bar is added or revised, so it can be part of a
+    figure cache key.
+    """
+    if hist is None or hist.empty:
+        return ""
+    row_hashes = pd.util.hash_pandas_object(hist, index=True).to_numpy()
+    return hashlib.blake2b(row_hashes.tobytes(), digest_size=8).hexdigest()
+
+
+class FigureCache:
+    """
+    A bounded LRU of built figures shared by every session
+
+    Keys should cover every input of the figure, including a data_version
+    of the underlying history, so a hit is always safe to reuse. Figures
+    are never mutated after they are cached.
+    """
+
+    def __init__(self, max_size: int = MAX_CACHED_FIGURES):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._figures = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_build(self, key: Hashable, build: Callable[[], go.Figure]) -> go.Figure:
+        """Get the figure cached under key, building and caching it on a miss"""
+        with self._lock:
+            fig = self._figures.get(key)
+            if fig is not None:
+                self._figures.move_to_end(key)
+                self.hits += 1
+                return fig
+            self.misses += 1
+
+        # Build outside the lock so one slow figure does not block others
+        fig = build()
+
+        with self._lock:
+            self._figures[key] = fig
+            self._figures.move_to_end(key)
+            while len(self._figures) > self.max_size:
+                self._figures.popitem(last=False)
+                self.evictions += 1
+        return fig
+
+    def clear(self) -> None:
+        """Drop every cached figure"""
+        with self._lock:
+            self._figures.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._figures)
+
+    def collect_metrics(self) -> List[Sample]:
+        """Get hit, miss and eviction counts as metric samples"""
+        with self._lock:
+            return [
+                ("market_cache_lookups_total", "counter", "Cache lookups by result",
+                 {'cache': "figure", 'result': "hit"}, self.hits),
+                ("market_cache_lookups_total", "counter", "Cache lookups by result",
+                 {'cache': "figure", 'result': "miss"}, self.misses),
+                ("market_cache_evictions_total", "counter", "Entries evicted from a cache",
+                 {'cache': "figure"}, self.evictions),
+                ("market_cache_entries", "gauge", "Entries held by a cache",
+                 {'cache': "figure"}, len(self._figures))
+            ]
+
+
+_figure_cache = FigureCache()
+get_metrics().register_collector("figure_cache", _figure_cache.collect_metrics)
+
+
+def get_figure_cache() -> FigureCache:
+    """Get the process-wide figure cache"""
+    return _figure_cache
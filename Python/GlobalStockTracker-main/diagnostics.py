@@ -0,0 +1,142 @@
+from typing import Dict, List, Optional
+import pandas as pd
+import streamlit as st
+from instrumentation import (RerunProfile, SECTION_SECONDS, UPSTREAM_IN_FLIGHT, UPSTREAM_SECONDS,
+                             get_metrics)
+
+# Query parameter that reveals the diagnostics view, e.g. ?diagnostics=1
+DIAGNOSTICS_PARAM = "diagnostics"
+
+# Session state key holding the last finished profile of each script or fragment
+PROFILES_KEY = "rerun_profiles"
+
+
+def diagnostics_enabled() -> bool:
+    """Whether the page was opened with the diagnostics query parameter"""
+    return st.query_params.get(DIAGNOSTICS_PARAM, "").lower() in ("1", "true", "yes", "on")
+
+
+def save_profile(name: str, profile: RerunProfile) -> None:
+    """Finish a profile and keep it for the next diagnostics render"""
+    st.session_state.setdefault(PROFILES_KEY, {})[name] = profile.finish()
+
+
+def _histogram_frame(metric_name: str, label_columns: List[str]) -> pd.DataFrame:
+    """One row per label set of a histogram with its count and latency percentiles in ms"""
+    histogram = get_metrics().get(metric_name)
+    if histogram is None:
+        return pd.DataFrame()
+
+    rows = []
+    for labels in histogram.labels():
+        summary = histogram.summary(**labels)
+        rows.append({
+            **{column.title(): labels[column] for column in label_columns},
+            'Count': summary['count'],
+            'Mean ms': summary['mean'] * 1000,
+            'p50 ms': summary['p50'] * 1000,
+            'p95 ms': summary['p95'] * 1000,
+            'p99 ms': summary['p99'] * 1000
+        })
+    return pd.DataFrame(rows).sort_values(label_columns[0].title()) if rows else pd.DataFrame()
+
+
+def _cache_frame() -> pd.DataFrame:
+    """Hits, misses, evictions and size per cache from the registered collectors"""
+    caches: Dict[str, Dict[str, float]] = {}
+    for name, _, _, labels, value in get_metrics().collect():
+        cache = labels.get('cache')
+        if cache is None:
+            continue
+        row = caches.setdefault(cache, {'Cache': cache, 'hit': 0, 'stale': 0, 'miss': 0, 'Evictions': 0, 'Entries': 0})
+        if name == "market_cache_lookups_total":
+            row[labels['result']] = value
+        elif name == "market_cache_evictions_total":
+            row['Evictions'] = value
+        elif name == "market_cache_entries":
+            row['Entries'] = value
+
+    frame = pd.DataFrame(list(caches.values()))
+    if frame.empty:
+        return frame
+    lookups = frame['hit'] + frame['stale'] + frame['miss']
+    frame['Hit rate'] = ((frame['hit'] + frame['stale']) / lookups.where(lookups > 0)).fillna(0.0)
+    return frame.rename(columns={'hit': 'Hits', 'stale': 'Stale hits', 'miss': 'Misses'})
+
+
+def _rate_limit_frame() -> pd.DataFrame:
+    """Current rate, concurrency and throttle counts per upstream endpoint"""
+    columns = {
+        "market_rate_limit_rate": 'Rate /s',
+        "market_rate_limit_concurrency": 'Concurrency',
+        "market_rate_limit_in_flight": 'In flight',
+        "market_rate_limit_requests_total": 'Requests',
+        "market_rate_limit_throttles_total": 'Throttles',
+        "market_rate_limit_timeouts_total": 'Timeouts',
+        "market_rate_limit_wait_seconds_total": 'Waited s'
+    }
+    endpoints: Dict[str, Dict[str, float]] = {}
+    for name, _, _, labels, value in get_metrics().collect():
+        if name in columns:
+            endpoints.setdefault(labels['endpoint'], {'Endpoint': labels['endpoint']})[columns[name]] = value
+    return pd.DataFrame(list(endpoints.values()))
+
+
+def render_diagnostics(current: Optional[RerunProfile] = None) -> None:
+    """
+    Show rerun timings, upstream latency, cache efficiency and in-flight work
+
+    Timings of the rerun in progress are partial, so the last finished
+    profile of each script and fragment is shown next to them.
+    """
+    st.subheader("Rerun sections")
+    profiles = dict(st.session_state.get(PROFILES_KEY, {}))
+    columns = {f"{name} (last)": profile for name, profile in profiles.items()}
+    if current is not None:
+        columns[f"{current.app} (so far)"] = current
+
+    if columns:
+        sections = sorted({section for profile in columns.values() for section in profile.sections})
+        table = pd.DataFrame(
+            {label: [profile.sections.get(section, 0.0) * 1000 for section in sections] + [
+                (profile.total if profile.total is not None else float("nan")) * 1000]
+             for label, profile in columns.items()},
+            index=sections + ["total"]
+        )
+        st.dataframe(table.style.format("{:.1f} ms", na_rep="–"), use_container_width=True)
+    else:
+        st.caption("No rerun has been profiled yet.")
+
+    st.caption("Section timings across all sessions")
+    st.dataframe(_histogram_frame(SECTION_SECONDS, ["app", "section"]), use_container_width=True, hide_index=True)
+
+    st.subheader("Upstream latency")
+    upstream = _histogram_frame(UPSTREAM_SECONDS, ["backend", "endpoint", "outcome"])
+    if upstream.empty:
+        st.caption("No upstream calls recorded in this process yet.")
+    else:
+        st.dataframe(upstream, use_container_width=True, hide_index=True)
+
+    in_flight = get_metrics().get(UPSTREAM_IN_FLIGHT)
+    running = sum(in_flight.value(**labels) for labels in in_flight.labels()) if in_flight else 0
+    coalesced = sum(value for name, _, _, _, value in get_metrics().collect() if name == "market_coalesced_in_flight")
+    col1, col2 = st.columns(2)
+    col1.metric("Upstream requests in flight", int(running))
+    col2.metric("Coalesced keys in flight", int(coalesced))
+
+    st.caption("Adaptive rate limits per upstream endpoint")
+    limits = _rate_limit_frame()
+    if limits.empty:
+        st.caption("No upstream endpoint has been rate limited yet.")
+    else:
+        st.dataframe(limits, use_container_width=True, hide_index=True)
+
+    st.subheader("Caches")
+    caches = _cache_frame()
+    if caches.empty:
+        st.caption("No caches are registered in this process.")
+    else:
+        st.dataframe(caches, use_container_width=True, hide_index=True)
+
+    with st.expander("Prometheus metrics"):
+        st.code(get_metrics().render(), language="text")
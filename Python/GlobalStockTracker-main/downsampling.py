@@ -0,0 +1,138 @@
+from typing import Optional, Tuple
+import math
+import numpy as np
+import pandas as pd
+
+# Assumed plot width in pixels when the caller does not know better
+DEFAULT_CHART_WIDTH = 1200
+
+# Pixels each candlestick or OHLC bar needs to stay readable
+PIXELS_PER_CANDLE = 4
+
+# Bounds on the number of points sent to the browser for one trace
+MIN_POINTS = 100
+MAX_POINTS = 4000
+
+
+def target_points(width: int = DEFAULT_CHART_WIDTH, chart_type: str = "Line") -> int:
+    """
+    Number of points worth plotting for a chart of the given pixel width
+
+    Lines gain nothing from more than about one point per pixel; candles
+    need a few pixels each.
+    """
+    points = width if chart_type == "Line" else width // PIXELS_PER_CANDLE
+    return int(min(MAX_POINTS, max(MIN_POINTS, points)))
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Pick threshold points from a series with Largest-Triangle-Three-Buckets
+
+    Returns positions into x and y rather than values, so other series on
+    the same index can be sampled at exactly the same rows. The first and
+    last points are always kept. NaNs in y are treated as zero area.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.nan_to_num(np.asarray(y, dtype=float))
+
+    # Bucket edges for the n - 2 interior points
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+
+        # Average of the next bucket is the third triangle vertex
+        next_start = end
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a]) -
+            (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return selected
+
+
+def _index_as_float(index: pd.Index) -> np.ndarray:
+    """Numeric x values for an index, using nanoseconds for datetimes"""
+    if isinstance(index, pd.DatetimeIndex):
+        return index.as_unit("ns").asi8.astype(float)
+    return np.arange(len(index), dtype=float)
+
+
+def downsample_line(hist: pd.DataFrame, max_points: int, column: str = 'Close') -> np.ndarray:
+    """
+    Row positions of hist to plot as a line of at most max_points points
+    """
+    return lttb_indices(_index_as_float(hist.index), hist[column].to_numpy(), max_points)
+
+
+def downsample_ohlc(hist: pd.DataFrame, max_bars: int) -> Tuple[pd.DataFrame, np.ndarray]:
+    """
+    Merge consecutive bars into at most max_bars buckets
+
+    Each bucket keeps the first open, highest high, lowest low, last close
+    and total volume, so the candles still show the true range. Buckets
+    are labelled with their last row's timestamp, the row their close
+    comes from, and the positions of those rows are returned for sampling
+    other series at the same timestamps.
+    """
+    n = len(hist)
+    if n <= max_bars:
+        return hist, np.arange(n)
+
+    size = math.ceil(n / max_bars)
+    starts = np.arange(0, n, size)
+    ends = np.minimum(starts + size, n) - 1
+
+    merged = pd.DataFrame({
+        'Open': hist['Open'].to_numpy()[starts],
+        'High': np.maximum.reduceat(hist['High'].to_numpy(), starts),
+        'Low': np.minimum.reduceat(hist['Low'].to_numpy(), starts),
+        'Close': hist['Close'].to_numpy()[ends],
+        'Volume': np.add.reduceat(hist['Volume'].to_numpy(), starts)
+    }, index=hist.index[ends])
+
+    return merged, ends
+
+
+def downsample_for_chart(hist: pd.DataFrame, chart_type: str = "Line",
+                         indicators: Optional[pd.DataFrame] = None,
+                         width: int = DEFAULT_CHART_WIDTH) -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+    """
+    Reduce a history frame and its indicators to what a chart can show
+
+    Line charts keep the rows LTTB picks from the close; candlestick and
+    OHLC charts merge bars into buckets. Indicators are sampled at the
+    same rows (the last row of each bucket for candles) so overlays line
+    up with the price trace.
+    """
+    if hist is None or hist.empty:
+        return hist, indicators
+
+    max_points = target_points(width, chart_type)
+
+    if chart_type == "Line":
+        positions = downsample_line(hist, max_points)
+        sampled = hist.iloc[positions]
+        if indicators is not None:
+            indicators = indicators.iloc[positions]
+        return sampled, indicators
+
+    sampled, positions = downsample_ohlc(hist, max_points)
+    if indicators is not None:
+        indicators = indicators.iloc[positions].set_axis(sampled.index)
+    return sampled, indicators
@@ -0,0 +1,234 @@
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+import threading
+import time
+
+# Default number of fetches allowed to run at the same time
+DEFAULT_MAX_WORKERS = 8
+
+# Default number of seconds a single fetch may run before it is abandoned
+DEFAULT_TIMEOUT = 10.0
+
+
+class FetchTimeoutError(TimeoutError):
+    """
+    Raised in place of a result when a fetch runs past its timeout
+    """
+
+
+def chunked(items: Iterable[Any], size: int) -> List[Tuple[Any, ...]]:
+    """
+    Split items into tuples of at most size elements
+    """
+    items = list(items)
+    return [tuple(items[start:start + size]) for start in range(0, len(items), size)]
+
+
+def iter_completed(
+    fetch_fn: Callable[[Hashable], Any],
+    keys: Iterable[Hashable],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    timeout: Optional[float] = DEFAULT_TIMEOUT
+) -> Iterator[Tuple[Hashable, Any, Optional[BaseException]]]:
+    """
+    Run fetch_fn for every key on a bounded thread pool
+
+    Yields (key, result, error) tuples in completion order, so callers can
+    update progress as each result arrives. A fetch that raises yields its
+    exception as error; a fetch that has been running longer than timeout
+    seconds yields a FetchTimeoutError and no longer holds up the others.
+    The timeout clock starts when the fetch starts running, not when it
+    is queued.
+    """
+    keys = list(dict.fromkeys(keys))
+    if not keys:
+        return
+
+    started = {}
+
+    def run(key):
+        started[key] = time.monotonic()
+        return fetch_fn(key)
+
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(keys))),
+        thread_name_prefix="fetch"
+    )
+
+    try:
+        futures = {executor.submit(run, key): key for key in keys}
+        pending = set(futures)
+
+        while pending:
+            # Sleep until something finishes or the oldest running fetch expires
+            wait_for = None
+            if timeout is not None:
+                deadlines = [
+                    started[futures[future]] + timeout
+                    for future in pending
+                    if futures[future] in started
+                ]
+                wait_for = max(0.0, min(deadlines) - time.monotonic()) if deadlines else timeout
+
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                key = futures[future]
+                try:
+                    yield key, future.result(), None
+                except Exception as e:
+                    yield key, None, e
+
+            if timeout is None:
+                continue
+
+            now = time.monotonic()
+            for future in list(pending):
+                key = futures[future]
+                if key in started and now - started[key] >= timeout:
+                    pending.discard(future)
+                    future.cancel()
+                    yield key, None, FetchTimeoutError(f"Fetch for {key} timed out after {timeout:g}s")
+
+    finally:
+        # Never wait on abandoned fetches; they finish in the background
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one in-flight call
+
+    The first caller for a key runs the work; callers that arrive while it
+    is still running wait for it and receive the same result (or the same
+    exception) instead of starting an identical upstream request.
+
+    A call running longer than timeout seconds is abandoned, like a fetch
+    in iter_completed: its waiters get a FetchTimeoutError and the next
+    caller for the key starts a new call instead of waiting on it. The
+    abandoned call still finishes in the background, but its result is
+    only returned to the caller that ran it.
+    """
+
+    def __init__(self, timeout: Optional[float] = DEFAULT_TIMEOUT):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        # key -> (future, monotonic deadline or None) of the call running for it
+        self._calls = {}
+
+    def in_flight(self) -> int:
+        """Number of keys currently being fetched"""
+        with self._lock:
+            return len(self._calls)
+
+    def _claim(self, key: Hashable) -> Tuple[Future, Optional[float], bool]:
+        """
+        Join the call running for key or start one; call with the lock held
+
+        Returns the call's future and deadline, and whether the caller
+        started it and must run the work.
+        """
+        now = time.monotonic()
+        call = self._calls.get(key)
+        if call is not None:
+            future, deadline = call
+            if deadline is None or now < deadline:
+                return future, deadline, False
+            self._abandon(key, future)
+
+        future = Future()
+        deadline = now + self.timeout if self.timeout is not None else None
+        self._calls[key] = (future, deadline)
+        return future, deadline, True
+
+    def _abandon(self, key: Hashable, future: Future) -> None:
+        """Fail a call's waiters and free its key for a new call; call with the lock held"""
+        if not future.done():
+            future.set_exception(FetchTimeoutError(f"Fetch for {key} timed out after {self.timeout:g}s"))
+        call = self._calls.get(key)
+        if call is not None and call[0] is future:
+            del self._calls[key]
+
+    def _wait(self, key: Hashable, future: Future, deadline: Optional[float]) -> Any:
+        """Wait for a joined call, abandoning it at its deadline"""
+        try:
+            return future.result(timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+        except FuturesTimeoutError:
+            with self._lock:
+                self._abandon(key, future)
+            return future.result()
+
+    def _finish(self, owned: Dict[Hashable, Future], values: Optional[Dict[Hashable, Any]] = None,
+                error: Optional[BaseException] = None) -> None:
+        """Pass a finished call's outcome to its waiters and free its keys"""
+        with self._lock:
+            for key, future in owned.items():
+                if not future.done():
+                    if error is not None:
+                        future.set_exception(error)
+                    else:
+                        future.set_result(values.get(key))
+                call = self._calls.get(key)
+                if call is not None and call[0] is future:
+                    del self._calls[key]
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn for key, or wait for the call already running for key
+
+        Raises FetchTimeoutError if the joined call runs out of time.
+        """
+        with self._lock:
+            future, deadline, leader = self._claim(key)
+
+        if not leader:
+            return self._wait(key, future, deadline)
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish({key: future}, error=e)
+            raise
+        self._finish({key: future}, {key: result})
+        return result
+
+    def do_many(self, keys: Iterable[Hashable],
+                fn: Callable[[List[Hashable]], Dict[Hashable, Any]]) -> Dict[Hashable, Any]:
+        """
+        Batch variant of do()
+
+        Keys nobody is fetching are claimed and passed to fn in one call,
+        which returns a dict of results; keys already in flight are waited
+        on. Keys missing from fn's result map to None, as do keys whose
+        in-flight call failed elsewhere or ran out of time. If fn raises,
+        the exception is passed to every caller waiting on the claimed keys
+        and re-raised.
+        """
+        owned = {}
+        waiting = {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                future, deadline, leader = self._claim(key)
+                if leader:
+                    owned[key] = future
+                else:
+                    waiting[key] = (future, deadline)
+
+        results = {}
+        if owned:
+            try:
+                values = fn(list(owned))
+            except BaseException as e:
+                self._finish(owned, error=e)
+                raise
+            self._finish(owned, values)
+            results.update((key, values.get(key)) for key in owned)
+
+        for key, (future, deadline) in waiting.items():
+            try:
+                results[key] = self._wait(key, future, deadline)
+            except Exception:
+                results[key] = None
+
+        return results
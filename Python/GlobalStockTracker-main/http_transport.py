@@ -0,0 +1,182 @@
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Mapping, Optional
+import json
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+# Headers sent with every request unless overridden
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'application/json'
+}
+
+# Status codes worth retrying: transient server errors. 429 is returned to
+# the caller, since retrying a throttled request only adds to the load
+RETRY_STATUSES = {500, 502, 503, 504}
+
+# Largest response body accepted, in bytes
+DEFAULT_MAX_RESPONSE_BYTES = 5 * 1024 * 1024
+
+# Longest Retry-After honoured; a server asking for a longer wait gets its response returned
+DEFAULT_RETRY_AFTER_MAX = 30.0
+
+
+class TransportError(Exception):
+    """
+    Raised when a request cannot be completed
+    """
+
+
+class ResponseTooLargeError(TransportError):
+    """
+    Raised when a response body exceeds the transport's size limit
+    """
+
+
+@dataclass
+class HttpResponse:
+    """
+    A fully read HTTP response
+    """
+    status_code: int
+    content: bytes
+    headers: Mapping[str, str] = field(default_factory=dict)
+    attempts: int = 1
+
+    def json(self) -> Any:
+        """Decode the body as JSON"""
+        return json.loads(self.content)
+
+
+class HttpTransport:
+    """
+    A pooled HTTP client with keep-alive, bounded retries and size limits
+
+    One requests.Session is shared by every caller, so repeated requests to
+    the same host reuse open connections instead of paying DNS, TCP and TLS
+    setup each time. Connection errors, timeouts and RETRY_STATUSES are
+    retried up to max_retries times with full-jitter exponential backoff,
+    or after the wait a Retry-After header asks for when there is one.
+    """
+
+    def __init__(self, pool_size: int = 16, max_retries: int = 3, backoff_base: float = 0.25,
+                 backoff_max: float = 4.0, timeout: float = 10,
+                 max_response_bytes: int = DEFAULT_MAX_RESPONSE_BYTES,
+                 headers: Optional[Dict[str, str]] = None,
+                 retry_after_max: float = DEFAULT_RETRY_AFTER_MAX):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_after_max = retry_after_max
+        self.timeout = timeout
+        self.max_response_bytes = max_response_bytes
+
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS if headers is None else headers)
+
+        # Retries are handled here so backoff and Retry-After are under our control
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _backoff(self, attempt: int) -> float:
+        """Seconds to sleep before the next attempt"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    @staticmethod
+    def _retry_after(value: Optional[str]) -> Optional[float]:
+        """Seconds a Retry-After header (delay or HTTP date) asks to wait, or None"""
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def _read(self, response: requests.Response) -> bytes:
+        """Read a streamed body, refusing anything over max_response_bytes"""
+        declared = response.headers.get('Content-Length')
+        if declared and declared.isdigit() and int(declared) > self.max_response_bytes:
+            raise ResponseTooLargeError(f"Response of {declared} bytes exceeds {self.max_response_bytes} byte limit")
+
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            size += len(chunk)
+            if size > self.max_response_bytes:
+                raise ResponseTooLargeError(f"Response exceeds {self.max_response_bytes} byte limit")
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None,
+            headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None) -> HttpResponse:
+        """
+        Send a GET request and return the fully read response
+
+        Non-retryable statuses are returned as-is for the caller to check.
+        If every attempt fails with a retryable status the last response is
+        returned, as is one whose Retry-After exceeds retry_after_max; if
+        every attempt fails to connect TransportError is raised.
+        """
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self.session.get(url, params=params, headers=headers,
+                                      timeout=timeout or self.timeout, stream=True) as response:
+                    content = self._read(response)
+                    result = HttpResponse(response.status_code, content, dict(response.headers), attempt + 1)
+            except ResponseTooLargeError:
+                raise
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_error = e
+                if attempt < self.max_retries:
+                    time.sleep(self._backoff(attempt))
+                continue
+
+            if result.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                return result
+
+            retry_after = self._retry_after(result.headers.get('Retry-After'))
+            if retry_after is None:
+                time.sleep(self._backoff(attempt))
+            elif retry_after <= self.retry_after_max:
+                time.sleep(retry_after)
+            else:
+                return result
+
+        raise TransportError(f"GET {url} failed after {self.max_retries + 1} attempts: {last_error}")
+
+    def get_json(self, url: str, params: Optional[Dict[str, Any]] = None,
+                 headers: Optional[Dict[str, str]] = None, timeout: Optional[float] = None) -> Any:
+        """Send a GET request and decode a 200 response as JSON"""
+        response = self.get(url, params=params, headers=headers, timeout=timeout)
+        if response.status_code != 200:
+            raise TransportError(f"GET {url} returned HTTP {response.status_code}")
+        return response.json()
+
+    def close(self) -> None:
+        """Close every pooled connection"""
+        self.session.close()
+
+
+_shared_transport = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_transport() -> HttpTransport:
+    """
+    Get the process-wide transport, creating it on first use
+    """
+    global _shared_transport
+    with _shared_lock:
+        if _shared_transport is None:
+            _shared_transport = HttpTransport()
+        return _shared_transport
@@ -0,0 +1,389 @@
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+import math
+import threading
+import numpy as np
+import pandas as pd
+
+# Maximum number of (symbol, interval, indicator set, first bar) engines kept in memory
+MAX_ENGINES = 256
+
+# Bar columns the indicators read, kept by engines to recognise the series they hold
+_INPUT_COLUMNS = ('High', 'Low', 'Close', 'Volume')
+
+# Intervals whose bars belong to a trading day; VWAP restarts every day
+INTRADAY_INTERVALS = {"1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h"}
+
+
+class Indicator:
+    """
+    Base class for indicators that update in O(1) per bar
+
+    update() consumes one bar and returns one value per output column.
+    get_state()/set_state() snapshot the running state so the engine can
+    roll back and re-apply a bar that was revised upstream.
+    """
+    columns: Tuple[str, ...] = ()
+    overlay = True  # Drawn on the price chart rather than in its own panel
+
+    def update(self, ts: int, high: float, low: float, close: float, volume: float) -> Tuple[float, ...]:
+        raise NotImplementedError
+
+    def get_state(self) -> Any:
+        raise NotImplementedError
+
+    def set_state(self, state: Any) -> None:
+        raise NotImplementedError
+
+
+class SMA(Indicator):
+    """Simple moving average of the close"""
+
+    def __init__(self, window: int = 20):
+        self.window = window
+        self.columns = (f"SMA {window}",)
+        self._values = deque()
+        self._sum = 0.0
+
+    def update(self, ts, high, low, close, volume):
+        self._values.append(close)
+        self._sum += close
+        if len(self._values) > self.window:
+            self._sum -= self._values.popleft()
+        return (self._sum / self.window if len(self._values) == self.window else math.nan,)
+
+    def get_state(self):
+        return tuple(self._values), self._sum
+
+    def set_state(self, state):
+        values, self._sum = state
+        self._values = deque(values)
+
+
+class EMA(Indicator):
+    """Exponential moving average of the close, seeded with the first close"""
+
+    def __init__(self, span: int = 20, column: Optional[str] = None):
+        self.span = span
+        self.alpha = 2 / (span + 1)
+        self.columns = (column or f"EMA {span}",)
+        self.value = None
+
+    def step(self, x: float) -> float:
+        self.value = x if self.value is None else self.value + self.alpha * (x - self.value)
+        return self.value
+
+    def update(self, ts, high, low, close, volume):
+        return (self.step(close),)
+
+    def get_state(self):
+        return self.value
+
+    def set_state(self, state):
+        self.value = state
+
+
+class RSI(Indicator):
+    """Relative strength index with Wilder smoothing"""
+    overlay = False
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.columns = (f"RSI {period}",)
+        self._prev_close = None
+        self._avg_gain = 0.0
+        self._avg_loss = 0.0
+        self._count = 0
+
+    def update(self, ts, high, low, close, volume):
+        if self._prev_close is None:
+            self._prev_close = close
+            return (math.nan,)
+
+        change = close - self._prev_close
+        self._prev_close = close
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        self._count += 1
+
+        if self._count <= self.period:
+            # Seed with a simple average of the first period changes
+            self._avg_gain += gain / self.period
+            self._avg_loss += loss / self.period
+            if self._count < self.period:
+                return (math.nan,)
+        else:
+            self._avg_gain = (self._avg_gain * (self.period - 1) + gain) / self.period
+            self._avg_loss = (self._avg_loss * (self.period - 1) + loss) / self.period
+
+        if self._avg_loss == 0:
+            return (100.0 if self._avg_gain > 0 else 50.0,)
+        return (100 - 100 / (1 + self._avg_gain / self._avg_loss),)
+
+    def get_state(self):
+        return self._prev_close, self._avg_gain, self._avg_loss, self._count
+
+    def set_state(self, state):
+        self._prev_close, self._avg_gain, self._avg_loss, self._count = state
+
+
+class MACD(Indicator):
+    """MACD line, signal line and histogram"""
+    overlay = False
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.columns = ("MACD", "MACD Signal", "MACD Hist")
+        self._fast = EMA(fast)
+        self._slow = EMA(slow)
+        self._signal = EMA(signal)
+
+    def update(self, ts, high, low, close, volume):
+        macd = self._fast.step(close) - self._slow.step(close)
+        signal = self._signal.step(macd)
+        return macd, signal, macd - signal
+
+    def get_state(self):
+        return self._fast.value, self._slow.value, self._signal.value
+
+    def set_state(self, state):
+        self._fast.value, self._slow.value, self._signal.value = state
+
+
+class BollingerBands(Indicator):
+    """Moving average of the close with bands num_std standard deviations away"""
+
+    def __init__(self, window: int = 20, num_std: float = 2.0):
+        self.window = window
+        self.num_std = num_std
+        self.columns = ("BB Upper", "BB Middle", "BB Lower")
+        self._values = deque()
+        self._sum = 0.0
+        self._sum_sq = 0.0
+
+    def update(self, ts, high, low, close, volume):
+        self._values.append(close)
+        self._sum += close
+        self._sum_sq += close * close
+        if len(self._values) > self.window:
+            old = self._values.popleft()
+            self._sum -= old
+            self._sum_sq -= old * old
+
+        if len(self._values) < self.window:
+            return math.nan, math.nan, math.nan
+
+        mean = self._sum / self.window
+        std = math.sqrt(max(self._sum_sq / self.window - mean * mean, 0.0))
+        return mean + self.num_std * std, mean, mean - self.num_std * std
+
+    def get_state(self):
+        return tuple(self._values), self._sum, self._sum_sq
+
+    def set_state(self, state):
+        values, self._sum, self._sum_sq = state
+        self._values = deque(values)
+
+
+class VWAP(Indicator):
+    """Volume-weighted average price, restarting each trading day for intraday bars"""
+
+    def __init__(self, daily_reset: bool = True, utc_offset_seconds: int = 0):
+        self.columns = ("VWAP",)
+        self.daily_reset = daily_reset
+        self.utc_offset_seconds = utc_offset_seconds
+        self._day = None
+        self._pv = 0.0
+        self._volume = 0.0
+
+    def update(self, ts, high, low, close, volume):
+        if self.daily_reset:
+            day = (ts // 1_000_000_000 + self.utc_offset_seconds) // 86400
+            if day != self._day:
+                self._day = day
+                self._pv = 0.0
+                self._volume = 0.0
+
+        typical = (high + low + close) / 3
+        self._pv += typical * volume
+        self._volume += volume
+        return (self._pv / self._volume if self._volume > 0 else typical,)
+
+    def get_state(self):
+        return self._day, self._pv, self._volume
+
+    def set_state(self, state):
+        self._day, self._pv, self._volume = state
+
+
+# Indicators selectable in the dashboard, by display name
+AVAILABLE_INDICATORS: Dict[str, Callable[..., Indicator]] = {
+    "SMA 20": lambda **_: SMA(20),
+    "SMA 50": lambda **_: SMA(50),
+    "EMA 20": lambda **_: EMA(20),
+    "Bollinger Bands": lambda **_: BollingerBands(20, 2.0),
+    "VWAP": lambda daily_reset=True, utc_offset_seconds=0, **_: VWAP(daily_reset, utc_offset_seconds),
+    "RSI 14": lambda **_: RSI(14),
+    "MACD": lambda **_: MACD(12, 26, 9)
+}
+
+
+class _Column:
+    """A growable float64 buffer so appends stay O(1) amortized"""
+
+    def __init__(self, capacity: int = 256):
+        self.data = np.empty(capacity)
+        self.size = 0
+
+    def append(self, value: float) -> None:
+        if self.size == len(self.data):
+            self.data = np.concatenate([self.data, np.empty(len(self.data))])
+        self.data[self.size] = value
+        self.size += 1
+
+    def pop(self) -> None:
+        self.size -= 1
+
+    def view(self) -> np.ndarray:
+        return self.data[:self.size]
+
+
+class IndicatorEngine:
+    """
+    Running indicator state for one (symbol, interval) series
+
+    update() takes the latest output of get_historical_data and only feeds
+    bars newer than the last one seen through the indicators, so each new
+    bar costs O(1) regardless of how long the series is. The last bar is
+    re-applied from a saved state because it may still have been forming
+    when it was last seen. That only happens when the frame extends the
+    exact bars the engine holds; any other frame (a different start, or
+    bars that changed, as after a split) is recomputed from scratch, so
+    the values only ever depend on the frame passed in.
+    """
+
+    def __init__(self, names: Sequence[str], daily_reset: bool = True):
+        self.names = tuple(names)
+        self.daily_reset = daily_reset
+        self._lock = threading.Lock()
+        self._reset(0)
+
+    def _reset(self, utc_offset_seconds: int) -> None:
+        self.indicators = [
+            AVAILABLE_INDICATORS[name](daily_reset=self.daily_reset, utc_offset_seconds=utc_offset_seconds)
+            for name in self.names
+        ]
+        self.columns = [column for indicator in self.indicators for column in indicator.columns]
+        self.overlay_columns = [c for indicator in self.indicators if indicator.overlay for c in indicator.columns]
+        self._times = _Column()
+        self._inputs = {column: _Column() for column in _INPUT_COLUMNS}
+        self._outputs = {column: _Column() for column in self.columns}
+        self._state_before_last = None
+        self._utc_offset_seconds = utc_offset_seconds
+
+    def _apply(self, ts: int, high: float, low: float, close: float, volume: float) -> None:
+        self._state_before_last = [indicator.get_state() for indicator in self.indicators]
+        self._times.append(ts)
+        for column, value in zip(_INPUT_COLUMNS, (high, low, close, volume)):
+            self._inputs[column].append(value)
+        for indicator in self.indicators:
+            for column, value in zip(indicator.columns, indicator.update(ts, high, low, close, volume)):
+                self._outputs[column].append(value)
+
+    def _rollback_last(self) -> None:
+        for indicator, state in zip(self.indicators, self._state_before_last):
+            indicator.set_state(state)
+        self._times.pop()
+        for column in (*self._inputs.values(), *self._outputs.values()):
+            column.pop()
+
+    def _extends(self, times: np.ndarray, inputs: Dict[str, np.ndarray], offset: int) -> bool:
+        """
+        Whether a frame holds every bar seen so far, unchanged, plus maybe newer ones
+
+        The last seen bar only has to match its timestamp, since it may
+        still have been forming.
+        """
+        seen = self._times.view()
+        count = len(seen)
+        if count == 0 or len(times) < count or offset != self._utc_offset_seconds:
+            return False
+        if not np.array_equal(times[:count], seen):
+            return False
+        return all(
+            np.array_equal(values[:count - 1], self._inputs[column].view()[:count - 1], equal_nan=True)
+            for column, values in inputs.items()
+        )
+
+    def update(self, hist: pd.DataFrame) -> pd.DataFrame:
+        """
+        Bring the indicators up to date with hist and return their values
+
+        The result is indexed like hist, with one column per indicator output.
+        """
+        if hist is None or hist.empty:
+            return pd.DataFrame(columns=self.columns)
+
+        index = hist.index
+        times = index.as_unit("ns").asi8 if isinstance(index, pd.DatetimeIndex) else np.asarray(index, dtype="int64")
+        offset = 0
+        if isinstance(index, pd.DatetimeIndex) and index.tz is not None:
+            offset = int(index[-1].utcoffset().total_seconds())
+
+        inputs = {column: hist[column].to_numpy(dtype=float) for column in _INPUT_COLUMNS}
+
+        with self._lock:
+            if self._extends(times, inputs, offset):
+                start = self._times.size - 1
+                self._rollback_last()
+            else:
+                self._reset(offset)
+                start = 0
+
+            high, low, close, volume = (inputs[column] for column in _INPUT_COLUMNS)
+            for i in range(start, len(times)):
+                if len(self._times.view()) and times[i] <= self._times.view()[-1]:
+                    continue
+                self._apply(int(times[i]), high[i], low[i], close[i], volume[i])
+
+            # Pick out the rows of hist; repeated timestamps share one bar
+            positions = np.searchsorted(self._times.view(), times)
+            positions = np.clip(positions, 0, max(self._times.size - 1, 0))
+            return pd.DataFrame(
+                {column: self._outputs[column].view()[positions] for column in self.columns},
+                index=index
+            )
+
+
+_engines = OrderedDict()
+_engines_lock = threading.Lock()
+
+
+def get_indicator_engine(symbol: str, interval: str, names: Sequence[str],
+                         first_bar: Optional[int] = None) -> IndicatorEngine:
+    """
+    Get the shared engine for a series and set of indicators, creating it on first use
+
+    first_bar (the series' first timestamp) keeps periods of one symbol
+    that start at different bars apart, so switching between them does
+    not recompute each from scratch. Engines are kept in a bounded LRU so
+    memory does not grow with the number of symbols charted.
+    """
+    key = (symbol, interval, tuple(sorted(names)), first_bar)
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = IndicatorEngine(key[2], daily_reset=interval in INTRADAY_INTERVALS)
+            _engines[key] = engine
+            while len(_engines) > MAX_ENGINES:
+                _engines.popitem(last=False)
+        _engines.move_to_end(key)
+        return engine
+
+
+def compute_indicators(symbol: str, interval: str, hist: pd.DataFrame, names: Sequence[str]) -> Optional[pd.DataFrame]:
+    """
+    Get indicator values for hist, updating the series' engine incrementally
+    """
+    if not names or hist is None or hist.empty:
+        return None
+    first_bar = hist.index[0].value if isinstance(hist.index, pd.DatetimeIndex) else int(hist.index[0])
+    return get_indicator_engine(symbol, interval, names, first_bar).update(hist)
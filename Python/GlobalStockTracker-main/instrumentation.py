@@ -0,0 +1,420 @@
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import bisect
+import os
+import threading
+import time
+import weakref
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Port of the standalone metrics endpoint started by start_metrics_server
+METRICS_PORT_ENV = "MARKET_METRICS_PORT"
+
+# Interface it binds to; only local scrapers can reach it unless this is
+# set, e.g. to 0.0.0.0 for a Prometheus running elsewhere
+METRICS_HOST_ENV = "MARKET_METRICS_HOST"
+DEFAULT_METRICS_HOST = "127.0.0.1"
+
+# Content type of the Prometheus text exposition format
+PROMETHEUS_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Metric names shared by the provider, the dashboards and the API server
+UPSTREAM_SECONDS = "market_upstream_request_seconds"
+UPSTREAM_IN_FLIGHT = "market_upstream_in_flight"
+SECTION_SECONDS = "dashboard_section_seconds"
+RERUN_SECONDS = "dashboard_rerun_seconds"
+API_REQUEST_SECONDS = "api_request_seconds"
+
+# A sample is (metric name, type, help, labels, value); collectors return lists of them
+Sample = Tuple[str, str, str, Dict[str, str], float]
+
+
+def _label_key(labelnames: Tuple[str, ...], labels: Dict[str, Any]) -> Tuple[str, ...]:
+    if set(labels) != set(labelnames):
+        raise ValueError(f"Expected labels {labelnames}, got {tuple(labels)}")
+    return tuple(str(labels[name]) for name in labelnames)
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        f'{name}="' + value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') + '"'
+        for name, value in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    if value != value:
+        return "NaN"
+    if value in (float("inf"), float("-inf")):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class _Metric:
+    """
+    A named family of values, one per combination of label values
+    """
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def labels(self) -> List[Dict[str, str]]:
+        """Every label combination recorded so far"""
+        with self._lock:
+            return [dict(zip(self.labelnames, key)) for key in self._values]
+
+
+class Counter(_Metric):
+    """
+    A value that only goes up
+    """
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(_label_key(self.labelnames, labels), 0)
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            return [(self.name + "_total", self.kind, self.help, dict(zip(self.labelnames, key)), value)
+                    for key, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    """
+    A value that goes up and down
+    """
+    kind = "gauge"
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels: Any) -> float:
+        with self._lock:
+            return self._values.get(_label_key(self.labelnames, labels), 0)
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            return [(self.name, self.kind, self.help, dict(zip(self.labelnames, key)), value)
+                    for key, value in self._values.items()]
+
+
+class Histogram(_Metric):
+    """
+    Observations counted into fixed buckets, plus their count and sum
+
+    Observing is a bisect and two additions under a lock, cheap enough
+    for every upstream call and every rerun section.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = _label_key(self.labelnames, labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # Per-bucket counts (the last one is +Inf), count and sum
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0, 0.0]
+            entry[0][index] += 1
+            entry[1] += 1
+            entry[2] += value
+
+    def summary(self, **labels: Any) -> Dict[str, float]:
+        """Count, sum, mean and bucket-interpolated p50/p95/p99 for one label set"""
+        with self._lock:
+            entry = self._values.get(_label_key(self.labelnames, labels))
+            if entry is None:
+                return {'count': 0, 'sum': 0.0, 'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0}
+            counts, count, total = list(entry[0]), entry[1], entry[2]
+
+        def quantile(q):
+            rank = q * count
+            seen = 0
+            for index, bucket_count in enumerate(counts):
+                if seen + bucket_count >= rank and bucket_count:
+                    lower = self.buckets[index - 1] if index else 0.0
+                    upper = self.buckets[index] if index < len(self.buckets) else self.buckets[-1]
+                    return lower + (upper - lower) * (rank - seen) / bucket_count
+                seen += bucket_count
+            return self.buckets[-1]
+
+        return {
+            'count': count,
+            'sum': total,
+            'mean': total / count,
+            'p50': quantile(0.5),
+            'p95': quantile(0.95),
+            'p99': quantile(0.99)
+        }
+
+    def samples(self) -> List[Sample]:
+        samples = []
+        with self._lock:
+            items = [(key, list(entry[0]), entry[1], entry[2]) for key, entry in self._values.items()]
+        for key, counts, count, total in items:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                samples.append((self.name + "_bucket", self.kind, self.help,
+                                {**labels, 'le': _format_value(bound)}, cumulative))
+            samples.append((self.name + "_count", self.kind, self.help, labels, count))
+            samples.append((self.name + "_sum", self.kind, self.help, labels, total))
+        return samples
+
+
+class MetricsRegistry:
+    """
+    Process-wide metrics and the collectors that read live state at scrape time
+
+    Counters already kept elsewhere (cache hits, in-flight keys) are not
+    duplicated on the hot path; their owners register a collector that
+    turns them into samples when the metrics are read. Collectors that are
+    bound methods are held weakly, so registering does not keep the owner
+    alive.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._collectors = {}
+
+    def _get_or_create(self, cls: type, name: str, help: str, labelnames: Iterable[str], **kwargs: Any) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, labelnames, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        with self._lock:
+            return self._metrics.get(name)
+
+    def register_collector(self, name: str, collect: Callable[[], List[Sample]]) -> None:
+        """Register or replace the collector stored under name"""
+        ref = weakref.WeakMethod(collect) if hasattr(collect, "__self__") else (lambda: collect)
+        with self._lock:
+            self._collectors[name] = ref
+
+    def unregister_collector(self, name: str) -> None:
+        with self._lock:
+            self._collectors.pop(name, None)
+
+    def collect(self) -> List[Sample]:
+        """Every sample from every metric and live collector"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors.items())
+
+        samples = []
+        for metric in metrics:
+            samples.extend(metric.samples())
+
+        for name, ref in collectors:
+            collect = ref()
+            if collect is None:
+                self.unregister_collector(name)
+                continue
+            try:
+                samples.extend(collect())
+            except Exception:
+                # A failing collector must not take the endpoint down
+                continue
+
+        return samples
+
+    def render(self) -> str:
+        """Every sample in the Prometheus text exposition format"""
+        families = {}
+        for name, kind, help, labels, value in self.collect():
+            family = name
+            if kind == "histogram":
+                family = name.rsplit("_", 1)[0]
+            elif kind == "counter" and name.endswith("_total"):
+                family = name[:-len("_total")]
+            families.setdefault(family, (kind, help, []))[2].append((name, labels, value))
+
+        lines = []
+        for family, (kind, help, rows) in families.items():
+            lines.append(f"# HELP {family} {help}")
+            lines.append(f"# TYPE {family} {kind}")
+            for name, labels, value in rows:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Get the process-wide metrics registry"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = MetricsRegistry()
+        return _registry
+
+
+@contextmanager
+def track_upstream(backend: str, endpoint: str) -> Iterator[None]:
+    """
+    Time one upstream call into the latency histogram
+
+    The call counts as in flight while the block runs and is labelled
+    outcome="error" if it raises.
+    """
+    metrics = get_metrics()
+    in_flight = metrics.gauge(UPSTREAM_IN_FLIGHT, "Upstream requests currently running", ("backend", "endpoint"))
+    latency = metrics.histogram(UPSTREAM_SECONDS, "Upstream request latency in seconds",
+                                ("backend", "endpoint", "outcome"))
+
+    in_flight.inc(backend=backend, endpoint=endpoint)
+    outcome = "ok"
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        latency.observe(time.perf_counter() - start, backend=backend, endpoint=endpoint, outcome=outcome)
+        in_flight.dec(backend=backend, endpoint=endpoint)
+
+
+class RerunProfile:
+    """
+    Wall time spent in each section of one dashboard script run
+
+    Sections with the same name add up, so a section can wrap several
+    separate blocks of a rerun. finish() observes each section's total
+    and the whole run into the process-wide histograms, labelled with the
+    app name.
+    """
+
+    def __init__(self, app: str):
+        self.app = app
+        self.started = time.perf_counter()
+        self.sections = {}
+        self.total = None
+
+    @contextmanager
+    def section(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sections[name] = self.sections.get(name, 0.0) + time.perf_counter() - start
+
+    def finish(self) -> "RerunProfile":
+        """Stop the clock and record the sections and the whole run, once"""
+        if self.total is None:
+            self.total = time.perf_counter() - self.started
+            metrics = get_metrics()
+            sections = metrics.histogram(SECTION_SECONDS, "Time spent per dashboard rerun section in seconds",
+                                         ("app", "section"))
+            for name, elapsed in self.sections.items():
+                sections.observe(elapsed, app=self.app, section=name)
+            metrics.histogram(RERUN_SECONDS, "Dashboard rerun wall time in seconds",
+                              ("app",)).observe(self.total, app=self.app)
+        return self
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = get_metrics().render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", PROMETHEUS_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+# Standalone metrics endpoint for processes without the API server
+_metrics_server = None
+
+
+def start_metrics_server(port: Optional[int] = None, host: Optional[str] = None) -> Optional[ThreadingHTTPServer]:
+    """
+    Serve /metrics from a daemon thread, once per process
+
+    The port defaults to MARKET_METRICS_PORT; without either nothing is
+    started. The host defaults to MARKET_METRICS_HOST, or loopback when
+    that is unset. Returns the running server, or None if none was started.
+    """
+    global _metrics_server
+    with _registry_lock:
+        if _metrics_server is not None:
+            return _metrics_server
+
+        if port is None:
+            try:
+                port = int(os.environ.get(METRICS_PORT_ENV, ""))
+            except ValueError:
+                return None
+
+        if host is None:
+            host = os.environ.get(METRICS_HOST_ENV) or DEFAULT_METRICS_HOST
+
+        try:
+            server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        except OSError:
+            # Another process already serves this port
+            return None
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+        _metrics_server = server
+        return server
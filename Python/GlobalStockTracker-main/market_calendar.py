@@ -0,0 +1,556 @@
+from bisect import bisect_right
+from dataclasses import dataclass, field, replace
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import threading
+import pytz
+
+# Session states reported by ExchangeCalendar.state()
+OPEN = "OPEN"
+PRE = "PRE"
+POST = "POST"
+BREAK = "BREAK"     # Lunch break between a morning and an afternoon session
+CLOSED = "CLOSED"
+UNKNOWN = "UNKNOWN"  # The exchange's holidays for that year are not known yet
+
+# Years on either side of the current one to precompute
+YEARS_BEHIND = 1
+YEARS_AHEAD = 2
+
+
+@dataclass(frozen=True)
+class Exchange:
+    """
+    Static trading rules for one exchange, in local time
+
+    sessions lists the regular trading sessions of a normal day; more than
+    one means a lunch break. On half days trading stops at half_day_close.
+    holidays_known tells whether holidays(year) is complete for a year.
+    """
+    code: str
+    name: str
+    timezone: str
+    sessions: Tuple[Tuple[time, time], ...]
+    holidays: Callable[[int], Set[date]]
+    half_days: Callable[[int], Set[date]] = lambda year: set()
+    half_day_close: Optional[time] = None
+    pre_market: Optional[time] = None    # Start of pre-market; it ends at the regular open
+    post_market: Optional[time] = None   # End of post-market; it starts at the regular close
+    holidays_known: Callable[[int], bool] = lambda year: True
+
+
+# --- Holiday rules ---------------------------------------------------------
+
+def _easter(year: int) -> date:
+    """Western Easter Sunday (anonymous Gregorian algorithm)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """The nth given weekday of a month; n = -1 for the last one"""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + (month == 12), month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed_nearest(day: date) -> date:
+    """US rule: Saturday holidays move to Friday, Sunday holidays to Monday"""
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def _observed_following(days: List[date]) -> Set[date]:
+    """UK/AU rule: weekend holidays move to the next free weekday, in order"""
+    observed = set()
+    for day in days:
+        while day.weekday() >= 5 or day in observed:
+            day += timedelta(days=1)
+        observed.add(day)
+    return observed
+
+
+def _nyse_holidays(year: int) -> Set[date]:
+    holidays = {
+        _nth_weekday(year, 1, 0, 3),     # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),     # Washington's Birthday
+        _easter(year) - timedelta(days=2),
+        _nth_weekday(year, 5, 0, -1),    # Memorial Day
+        _observed_nearest(date(year, 7, 4)),
+        _nth_weekday(year, 9, 0, 1),     # Labor Day
+        _nth_weekday(year, 11, 3, 4),    # Thanksgiving
+        _observed_nearest(date(year, 12, 25))
+    }
+    # A Saturday New Year's Day is not moved back into the previous year
+    if date(year, 1, 1).weekday() != 5:
+        holidays.add(_observed_nearest(date(year, 1, 1)))
+    if year >= 2022:
+        holidays.add(_observed_nearest(date(year, 6, 19)))
+    return holidays
+
+
+def _nyse_half_days(year: int) -> Set[date]:
+    holidays = _nyse_holidays(year)
+    candidates = {
+        date(year, 7, 3),
+        _nth_weekday(year, 11, 3, 4) + timedelta(days=1),
+        date(year, 12, 24)
+    }
+    return {day for day in candidates if day.weekday() < 5 and day not in holidays}
+
+
+def _lse_holidays(year: int) -> Set[date]:
+    easter = _easter(year)
+    return _observed_following([date(year, 1, 1)]) | _observed_following([date(year, 12, 25), date(year, 12, 26)]) | {
+        easter - timedelta(days=2),
+        easter + timedelta(days=1),
+        _nth_weekday(year, 5, 0, 1),     # Early May bank holiday
+        _nth_weekday(year, 5, 0, -1),    # Spring bank holiday
+        _nth_weekday(year, 8, 0, -1)     # Summer bank holiday
+    }
+
+
+def _christmas_eve_and_nye(year: int) -> Set[date]:
+    return {day for day in (date(year, 12, 24), date(year, 12, 31)) if day.weekday() < 5}
+
+
+def _xetra_holidays(year: int) -> Set[date]:
+    easter = _easter(year)
+    return {
+        date(year, 1, 1), easter - timedelta(days=2), easter + timedelta(days=1), date(year, 5, 1),
+        date(year, 12, 24), date(year, 12, 25), date(year, 12, 26), date(year, 12, 31)
+    }
+
+
+def _euronext_holidays(year: int) -> Set[date]:
+    easter = _easter(year)
+    return {
+        date(year, 1, 1), easter - timedelta(days=2), easter + timedelta(days=1), date(year, 5, 1),
+        date(year, 12, 25), date(year, 12, 26)
+    }
+
+
+def _asx_holidays(year: int) -> Set[date]:
+    easter = _easter(year)
+    return _observed_following([date(year, 1, 1)]) | _observed_following([date(year, 1, 26)]) | \
+        _observed_following([date(year, 12, 25), date(year, 12, 26)]) | {
+            easter - timedelta(days=2),
+            easter + timedelta(days=1),
+            date(year, 4, 25),               # Anzac Day, not moved when on a weekend
+            _nth_weekday(year, 6, 0, 2)      # King's Birthday
+        }
+
+
+def _tsx_holidays(year: int) -> Set[date]:
+    easter = _easter(year)
+    may_24 = date(year, 5, 24)
+    return _observed_following([date(year, 1, 1)]) | _observed_following([date(year, 7, 1)]) | \
+        _observed_following([date(year, 12, 25), date(year, 12, 26)]) | {
+            _nth_weekday(year, 2, 0, 3),                 # Family Day
+            easter - timedelta(days=2),
+            may_24 - timedelta(days=may_24.weekday()),   # Victoria Day
+            _nth_weekday(year, 8, 0, 1),                 # Civic Holiday
+            _nth_weekday(year, 9, 0, 1),                 # Labour Day
+            _nth_weekday(year, 10, 0, 2)                 # Thanksgiving
+        }
+
+
+def _six_holidays(year: int) -> Set[date]:
+    easter = _easter(year)
+    return {
+        date(year, 1, 1), date(year, 1, 2), easter - timedelta(days=2), easter + timedelta(days=1),
+        date(year, 5, 1), easter + timedelta(days=39), easter + timedelta(days=50), date(year, 8, 1),
+        date(year, 12, 24), date(year, 12, 25), date(year, 12, 26), date(year, 12, 31)
+    }
+
+
+def _japan_holidays(year: int) -> Set[date]:
+    offset = year - 1980
+    vernal = int(20.8431 + 0.242194 * offset - offset // 4)
+    autumnal = int(23.2488 + 0.242194 * offset - offset // 4)
+
+    national = {
+        date(year, 1, 1),
+        _nth_weekday(year, 1, 0, 2),     # Coming of Age Day
+        date(year, 2, 11),
+        date(year, 2, 23),
+        date(year, 3, vernal),
+        date(year, 4, 29),
+        date(year, 5, 3), date(year, 5, 4), date(year, 5, 5),
+        _nth_weekday(year, 7, 0, 3),     # Marine Day
+        date(year, 8, 11),
+        _nth_weekday(year, 9, 0, 3),     # Respect for the Aged Day
+        date(year, 9, autumnal),
+        _nth_weekday(year, 10, 0, 2),    # Sports Day
+        date(year, 11, 3),
+        date(year, 11, 23)
+    }
+
+    # A day sandwiched between two holidays is itself a holiday
+    for day in sorted(national):
+        between = day + timedelta(days=1)
+        if between not in national and between + timedelta(days=1) in national and between.weekday() < 6:
+            national.add(between)
+
+    # Sunday holidays are observed on the next day that is not already one
+    for day in sorted(national):
+        if day.weekday() == 6:
+            substitute = day + timedelta(days=1)
+            while substitute in national:
+                substitute += timedelta(days=1)
+            national.add(substitute)
+
+    # The exchange also closes for the year-end break
+    return national | {date(year, 1, 2), date(year, 1, 3), date(year, 12, 31)}
+
+
+# Lunar-calendar holidays cannot be derived by rule; these follow the
+# exchanges' published calendars and need extending each year. Years
+# missing here report UNKNOWN instead of guessing at the sessions.
+LUNAR_HOLIDAYS = {
+    "XHKG": {
+        2025: ["2025-01-29", "2025-01-30", "2025-01-31", "2025-04-04", "2025-05-05",
+               "2025-10-07", "2025-10-29"],
+        2026: ["2026-02-17", "2026-02-18", "2026-02-19", "2026-04-07", "2026-05-25", "2026-06-19",
+               "2026-09-26", "2026-10-19"],
+        2027: ["2027-02-08", "2027-02-09", "2027-04-05", "2027-05-13", "2027-06-09", "2027-09-16",
+               "2027-10-08"],
+        2028: ["2028-01-26", "2028-01-27", "2028-01-28", "2028-04-04", "2028-05-02", "2028-05-29",
+               "2028-10-04", "2028-10-26"]
+    },
+    "XSHG": {
+        2025: ["2025-01-28", "2025-01-29", "2025-01-30", "2025-01-31", "2025-02-03", "2025-02-04",
+               "2025-04-04", "2025-05-02", "2025-05-05", "2025-06-02", "2025-10-06", "2025-10-07",
+               "2025-10-08"],
+        2026: ["2026-02-16", "2026-02-17", "2026-02-18", "2026-02-19", "2026-02-20", "2026-02-23",
+               "2026-04-06", "2026-05-04", "2026-05-05", "2026-06-19", "2026-09-25", "2026-10-05",
+               "2026-10-06", "2026-10-07"]
+    }
+}
+
+
+def _lunar(code: str, year: int) -> Set[date]:
+    return {date.fromisoformat(day) for day in LUNAR_HOLIDAYS.get(code, {}).get(year, [])}
+
+
+def _lunar_known(code: str) -> Callable[[int], bool]:
+    return lambda year: year in LUNAR_HOLIDAYS.get(code, {})
+
+
+def _hkex_holidays(year: int) -> Set[date]:
+    easter = _easter(year)
+    fixed = {date(year, 1, 1), date(year, 5, 1), date(year, 7, 1), date(year, 10, 1),
+             date(year, 12, 25), date(year, 12, 26)}
+    # Sunday holidays move to Monday
+    observed = {day + timedelta(days=1) if day.weekday() == 6 else day for day in fixed}
+    return observed | {easter - timedelta(days=2), easter + timedelta(days=1)} | _lunar("XHKG", year)
+
+
+def _hkex_half_days(year: int) -> Set[date]:
+    return _christmas_eve_and_nye(year) - _hkex_holidays(year)
+
+
+def _sse_holidays(year: int) -> Set[date]:
+    fixed = {date(year, 1, 1), date(year, 5, 1), date(year, 10, 1), date(year, 10, 2), date(year, 10, 3)}
+    return fixed | _lunar("XSHG", year)
+
+
+EXCHANGES: Dict[str, Exchange] = {
+    "XNYS": Exchange("XNYS", "New York Stock Exchange", "America/New_York",
+                     ((time(9, 30), time(16, 0)),), _nyse_holidays, _nyse_half_days, time(13, 0),
+                     pre_market=time(4, 0), post_market=time(20, 0)),
+    "XLON": Exchange("XLON", "London Stock Exchange", "Europe/London",
+                     ((time(8, 0), time(16, 30)),), _lse_holidays,
+                     lambda year: _christmas_eve_and_nye(year) - _lse_holidays(year), time(12, 30)),
+    "XETR": Exchange("XETR", "Xetra", "Europe/Berlin",
+                     ((time(9, 0), time(17, 30)),), _xetra_holidays),
+    "XPAR": Exchange("XPAR", "Euronext Paris", "Europe/Paris",
+                     ((time(9, 0), time(17, 30)),), _euronext_holidays,
+                     lambda year: _christmas_eve_and_nye(year) - _euronext_holidays(year), time(14, 5)),
+    "XTKS": Exchange("XTKS", "Tokyo Stock Exchange", "Asia/Tokyo",
+                     ((time(9, 0), time(11, 30)), (time(12, 30), time(15, 30))), _japan_holidays),
+    "XHKG": Exchange("XHKG", "Hong Kong Exchange", "Asia/Hong_Kong",
+                     ((time(9, 30), time(12, 0)), (time(13, 0), time(16, 0))), _hkex_holidays,
+                     _hkex_half_days, time(12, 0), holidays_known=_lunar_known("XHKG")),
+    "XSHG": Exchange("XSHG", "Shanghai Stock Exchange", "Asia/Shanghai",
+                     ((time(9, 30), time(11, 30)), (time(13, 0), time(15, 0))), _sse_holidays,
+                     holidays_known=_lunar_known("XSHG")),
+    "XTSE": Exchange("XTSE", "Toronto Stock Exchange", "America/Toronto",
+                     ((time(9, 30), time(16, 0)),), _tsx_holidays),
+    "XSWX": Exchange("XSWX", "SIX Swiss Exchange", "Europe/Zurich",
+                     ((time(9, 0), time(17, 30)),), _six_holidays),
+    "XASX": Exchange("XASX", "Australian Securities Exchange", "Australia/Sydney",
+                     ((time(10, 0), time(16, 0)),), _asx_holidays,
+                     lambda year: _christmas_eve_and_nye(year) - _asx_holidays(year), time(14, 10))
+}
+
+# Exchange for each dashboard index; indices are only calculated during the
+# regular session, so they use the exchange's calendar without extended hours
+SYMBOL_EXCHANGES = {
+    '^GSPC': "XNYS",
+    '^IXIC': "XNYS",
+    '^DJI': "XNYS",
+    '^FTSE': "XLON",
+    '^N225': "XTKS",
+    '^GDAXI': "XETR",
+    '^FCHI': "XPAR",
+    '^HSI': "XHKG",
+    '000001.SS': "XSHG",
+    '^AXJO': "XASX"
+}
+
+# Exchange for Yahoo ticker suffixes; symbols without one trade in the US.
+# Euronext markets share one holiday calendar and trading hours
+SUFFIX_EXCHANGES = {
+    '.L': "XLON",
+    '.DE': "XETR",
+    '.F': "XETR",
+    '.PA': "XPAR",
+    '.AS': "XPAR",
+    '.BR': "XPAR",
+    '.TO': "XTSE",
+    '.SW': "XSWX",
+    '.T': "XTKS",
+    '.HK': "XHKG",
+    '.SS': "XSHG",
+    '.SZ': "XSHG",
+    '.AX': "XASX"
+}
+
+
+# Yahoo suffixes of instruments that trade around the clock or without an
+# exchange session: currencies, futures and crypto pairs
+UNSCHEDULED_SUFFIXES = ('=X', '=F', '-USD', '-USDT', '-EUR', '-GBP', '-JPY', '-BTC', '-ETH')
+
+
+def exchange_for_symbol(symbol: str) -> Optional[str]:
+    """
+    Get the exchange code a symbol trades on, or None if it has no known calendar
+
+    None covers unknown indices, currencies, futures, crypto pairs and
+    exchange suffixes without a calendar here; such symbols are always
+    treated as open.
+    """
+    if symbol in SYMBOL_EXCHANGES:
+        return SYMBOL_EXCHANGES[symbol]
+    symbol = symbol.upper()
+    if symbol.startswith('^') or symbol.endswith(UNSCHEDULED_SUFFIXES):
+        return None
+    for suffix, code in SUFFIX_EXCHANGES.items():
+        if symbol.endswith(suffix):
+            return code
+    # Yahoo marks every non-US listing with a dot suffix
+    if '.' in symbol:
+        return None
+    return "XNYS"
+
+
+@dataclass(frozen=True)
+class _Schedule:
+    """Sorted UTC epoch seconds of every session in the precomputed years"""
+    first_year: int
+    last_year: int
+    valid_from: float = 0.0     # Lookups in [valid_from, valid_to) need no rebuild
+    valid_to: float = 0.0
+    opens: List[int] = field(default_factory=list)
+    closes: List[int] = field(default_factory=list)
+    pre_opens: List[int] = field(default_factory=list)
+    post_closes: List[int] = field(default_factory=list)
+    day_opens: List[int] = field(default_factory=list)    # Open of the first session of each day
+    day_closes: List[int] = field(default_factory=list)   # Close of the last session of each day
+    unknown: List[Tuple[int, int]] = field(default_factory=list)  # Start and end of years without holidays
+
+
+class ExchangeCalendar:
+    """
+    Precomputed trading sessions for one exchange
+
+    Every session of the covered years is stored as UTC open and close
+    instants at minute resolution, so "is it open?" and "when does it next
+    open or close?" are bisect lookups. Years outside the covered range
+    are added on demand. Years whose holidays are not known yet are laid
+    out as if every weekday traded, but state() reports them as UNKNOWN.
+    """
+
+    def __init__(self, exchange: Exchange, first_year: Optional[int] = None, last_year: Optional[int] = None):
+        self.exchange = exchange
+        self.tz = pytz.timezone(exchange.timezone)
+        this_year = datetime.now(pytz.utc).year
+        self._lock = threading.Lock()
+        self._schedule = self._build(
+            first_year if first_year is not None else this_year - YEARS_BEHIND,
+            last_year if last_year is not None else this_year + YEARS_AHEAD
+        )
+
+    def _instant(self, day: date, at: time) -> int:
+        """UTC epoch seconds of a local wall-clock time"""
+        return int(self.tz.localize(datetime.combine(day, at)).timestamp())
+
+    def _build(self, first_year: int, last_year: int) -> _Schedule:
+        exchange = self.exchange
+        # Keep a year of margin so next_open/next_close never run off the end
+        schedule = _Schedule(
+            first_year, last_year,
+            valid_from=self._instant(date(first_year + 1, 1, 1), time(0, 0)),
+            valid_to=self._instant(date(last_year, 1, 1), time(0, 0))
+        )
+
+        for year in range(first_year, last_year + 1):
+            if not exchange.holidays_known(year):
+                schedule.unknown.append((self._instant(date(year, 1, 1), time(0, 0)),
+                                         self._instant(date(year + 1, 1, 1), time(0, 0))))
+            holidays = exchange.holidays(year)
+            half_days = exchange.half_days(year)
+            day = date(year, 1, 1)
+            while day.year == year:
+                if day.weekday() < 5 and day not in holidays:
+                    sessions = exchange.sessions
+                    if day in half_days and exchange.half_day_close:
+                        # Drop sessions after the early close and cut the one it falls in
+                        sessions = tuple(
+                            (start, min(end, exchange.half_day_close))
+                            for start, end in sessions if start < exchange.half_day_close
+                        )
+                    for start, end in sessions:
+                        schedule.opens.append(self._instant(day, start))
+                        schedule.closes.append(self._instant(day, end))
+                    schedule.day_opens.append(schedule.opens[-len(sessions)])
+                    schedule.day_closes.append(schedule.closes[-1])
+
+                    if exchange.pre_market:
+                        schedule.pre_opens.append(self._instant(day, exchange.pre_market))
+                    if exchange.post_market:
+                        # Post-market keeps its usual length after an early close
+                        regular_close = datetime.combine(day, exchange.sessions[-1][1])
+                        length = datetime.combine(day, exchange.post_market) - regular_close
+                        schedule.post_closes.append(schedule.closes[-1] + int(length.total_seconds()))
+                day += timedelta(days=1)
+
+        return schedule
+
+    def _schedule_for(self, ts: float) -> _Schedule:
+        """Get a schedule covering ts, extending the precomputed years if needed"""
+        schedule = self._schedule
+        if schedule.valid_from <= ts < schedule.valid_to:
+            return schedule
+
+        year = datetime.fromtimestamp(ts, self.tz).year
+        with self._lock:
+            schedule = self._schedule
+            first = min(schedule.first_year, year - 1)
+            last = max(schedule.last_year, year + 1)
+            if (first, last) != (schedule.first_year, schedule.last_year):
+                self._schedule = schedule = self._build(first, last)
+        return schedule
+
+    @staticmethod
+    def _now(ts: Optional[float]) -> float:
+        return datetime.now(pytz.utc).timestamp() if ts is None else ts
+
+    def is_open(self, ts: Optional[float] = None) -> bool:
+        """Check whether a regular session is in progress at ts (default now)"""
+        ts = self._now(ts)
+        schedule = self._schedule_for(ts)
+        i = bisect_right(schedule.opens, ts) - 1
+        return i >= 0 and ts < schedule.closes[i]
+
+    def state(self, ts: Optional[float] = None) -> str:
+        """
+        Get the session state at ts: OPEN, PRE, POST, BREAK or CLOSED
+
+        UNKNOWN means the exchange's holidays for that year are not known,
+        so callers should treat the market as possibly open.
+        """
+        ts = self._now(ts)
+        schedule = self._schedule_for(ts)
+        if any(start <= ts < end for start, end in schedule.unknown):
+            return UNKNOWN
+
+        i = bisect_right(schedule.opens, ts) - 1
+        if i >= 0 and ts < schedule.closes[i]:
+            return OPEN
+
+        # The trading day in progress or coming up next
+        day = bisect_right(schedule.day_closes, ts)
+        if day < len(schedule.day_opens):
+            if schedule.day_opens[day] <= ts:
+                return BREAK
+            if schedule.pre_opens and schedule.pre_opens[day] <= ts:
+                return PRE
+
+        if schedule.post_closes and day > 0 and ts < schedule.post_closes[day - 1]:
+            return POST
+
+        return CLOSED
+
+    def next_open(self, ts: Optional[float] = None) -> datetime:
+        """Start of the next regular session after ts, in UTC"""
+        ts = self._now(ts)
+        schedule = self._schedule_for(ts)
+        i = bisect_right(schedule.opens, ts)
+        if i == len(schedule.opens):
+            schedule = self._schedule_for(ts + 366 * 86400)
+            i = bisect_right(schedule.opens, ts)
+        return datetime.fromtimestamp(schedule.opens[i], pytz.utc)
+
+    def next_close(self, ts: Optional[float] = None) -> datetime:
+        """End of the current session, or of the next one if closed, in UTC"""
+        ts = self._now(ts)
+        schedule = self._schedule_for(ts)
+        i = bisect_right(schedule.closes, ts)
+        if i == len(schedule.closes):
+            schedule = self._schedule_for(ts + 366 * 86400)
+            i = bisect_right(schedule.closes, ts)
+        return datetime.fromtimestamp(schedule.closes[i], pytz.utc)
+
+    def last_close(self, ts: Optional[float] = None) -> Optional[datetime]:
+        """End of the most recent trading day that finished before ts, in UTC"""
+        ts = self._now(ts)
+        schedule = self._schedule_for(ts)
+        i = bisect_right(schedule.day_closes, ts) - 1
+        return datetime.fromtimestamp(schedule.day_closes[i], pytz.utc) if i >= 0 else None
+
+
+_calendars: Dict[Tuple[str, bool], ExchangeCalendar] = {}
+_calendars_lock = threading.Lock()
+
+
+def get_calendar(code: str, regular_only: bool = False) -> ExchangeCalendar:
+    """
+    Get the shared calendar for an exchange code, building it on first use
+
+    regular_only drops pre- and post-market, for instruments such as cash
+    indices that do not trade outside the regular session.
+    """
+    with _calendars_lock:
+        calendar = _calendars.get((code, regular_only))
+        if calendar is None:
+            exchange = EXCHANGES[code]
+            if regular_only:
+                exchange = replace(exchange, pre_market=None, post_market=None)
+            calendar = _calendars[(code, regular_only)] = ExchangeCalendar(exchange)
+        return calendar
+
+
+def calendar_for_symbol(symbol: str) -> Optional[ExchangeCalendar]:
+    """
+    Get the calendar of the exchange a symbol trades on, if known
+
+    Indices get the regular session only.
+    """
+    code = exchange_for_symbol(symbol)
+    return get_calendar(code, regular_only=symbol in SYMBOL_EXCHANGES or symbol.startswith('^')) if code else None
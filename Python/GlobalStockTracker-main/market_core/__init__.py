@@ -0,0 +1,44 @@
+"""
+Market data core, independent of any UI
+
+Importing the package is cheap: each public name is loaded from its
+submodule on first access, and pandas and yfinance are only imported
+once history or a yfinance download is actually requested. The symbol
+index is compiled and mapped on first use. Workers, CLIs and the API
+server use this directly; market_data wraps it for Streamlit.
+"""
+from typing import TYPE_CHECKING, Any, List
+import importlib
+
+# Public name -> submodule defining it
+_EXPORTS = {
+    "MarketDataProvider": "provider",
+    "BATCH_CHUNK_SIZE": "provider",
+    "HISTORY_PERIODS": "provider",
+    "FetchResult": "results",
+    "BatchResult": "results",
+    "SymbolIndex": "symbols",
+    "SymbolRecord": "symbols",
+    "get_symbol_index": "symbols"
+}
+
+__all__ = list(_EXPORTS)
+
+if TYPE_CHECKING:
+    from .provider import BATCH_CHUNK_SIZE, HISTORY_PERIODS, MarketDataProvider
+    from .results import BatchResult, FetchResult
+    from .symbols import SymbolIndex, SymbolRecord, get_symbol_index
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,552 @@
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import threading
+from quote_cache import TTLCache, FRESH, STALE
+from fetch_engine import SingleFlight
+from ohlcv_store import OHLCVStore
+from http_transport import HttpTransport
+from providers import MarketDataBackend, create_backend
+from instrumentation import Sample, get_metrics, track_upstream
+from .results import BatchResult, FetchResult
+from .symbols import SymbolIndex, get_symbol_index
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Maximum number of symbols requested in a single batched download
+BATCH_CHUNK_SIZE = 50
+
+# Number of background threads refreshing stale cache entries
+REFRESH_WORKERS = 4
+
+# yfinance period for each dashboard period code
+HISTORY_PERIODS = {
+    "1D": "1d",
+    "5D": "5d",
+    "1M": "1mo",
+    "3M": "3mo",
+    "6M": "6mo",
+    "1Y": "1y",
+    "2Y": "2y",
+    "5Y": "5y"
+}
+
+# Bar interval for intraday periods; every other period uses daily bars
+INTRADAY_INTERVALS = {
+    "1d": "5m",
+    "5d": "15m"
+}
+
+# Trading days covered by each intraday period
+INTRADAY_SESSIONS = {
+    "1d": 1,
+    "5d": 5
+}
+
+# Yahoo only serves 5m/15m bars for about the last 60 days
+INTRADAY_LOOKBACK_DAYS = 55
+
+# How many months back each daily period reaches
+PERIOD_MONTHS = {
+    "1mo": 1,
+    "3mo": 3,
+    "6mo": 6,
+    "1y": 12,
+    "2y": 24,
+    "5y": 60,
+    "10y": 120
+}
+
+class MarketDataProvider:
+    """
+    A class to handle all market data operations
+    
+    Data is fetched through a MarketDataBackend (yfinance by default, or
+    whatever MARKET_DATA_BACKEND selects) and cached, coalesced and
+    persisted here.
+    
+    Nothing here touches a UI: quote(), history() and batch_quotes()
+    report failures as FetchResult/BatchResult errors, and the get_*
+    methods return None or leave symbols out instead. pandas is only
+    imported once history is first requested.
+    """
+    
+    def __init__(self, cache: Optional[TTLCache] = None, stale_while_revalidate: bool = True,
+                 store: Optional[OHLCVStore] = None, persist_history: bool = True,
+                 transport: Optional[HttpTransport] = None, backend: Optional[MarketDataBackend] = None,
+                 symbol_index: Optional[SymbolIndex] = None):
+        # One bounded cache for quotes and history, shared by every session
+        self.cache = cache if cache is not None else TTLCache()
+        
+        # Persistent bar store so restarts only download bars newer than the
+        # last stored one
+        self.store = store
+        if self.store is None and persist_history:
+            self.store = OHLCVStore.open_default()
+        
+        # Serve expired entries inside the cache's stale grace window and
+        # refresh them in the background instead of blocking the caller
+        self.stale_while_revalidate = stale_while_revalidate
+        self._refresh_executor = ThreadPoolExecutor(max_workers=REFRESH_WORKERS, thread_name_prefix="refresh")
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+        
+        # Concurrent requests for the same key share one upstream call
+        self._flights = {data_type: SingleFlight() for data_type in ("current", "history")}
+        
+        # Where quotes and bars come from; network backends share the pooled transport
+        self.backend = backend if backend is not None else create_backend(transport=transport)
+        
+        # Known symbols, so searches for unlisted ones never reach upstream;
+        # the bundled listing is opened on the first search when not given
+        self.symbol_index = symbol_index
+        
+        # Cache and in-flight counts are read from their owners when metrics are scraped
+        get_metrics().register_collector("market_data", self.collect_metrics)
+    
+    def _get_from_cache(self, symbol: str, data_type: str = "current") -> Optional[Any]:
+        """Get data from cache if valid"""
+        return self.cache.get(symbol, data_type)
+    
+    def _set_cache(self, symbol: str, data: Any, data_type: str = "current") -> None:
+        """Set data in cache with timestamp"""
+        self.cache.set(symbol, data, data_type)
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get hit, miss and eviction counts for the data cache
+        """
+        return self.cache.stats()
+    
+    def collect_metrics(self) -> List[Sample]:
+        """
+        Get cache and in-flight counts as metric samples
+        """
+        stats = self.cache.stats()
+        samples = [
+            ("market_cache_lookups_total", "counter", "Cache lookups by result",
+             {'cache': "data", 'result': result}, stats[key])
+            for key, result in (('hits', "hit"), ('stale_hits', "stale"), ('misses', "miss"))
+        ]
+        samples.append(("market_cache_evictions_total", "counter", "Entries evicted from a cache",
+                        {'cache': "data"}, stats['evictions']))
+        samples.append(("market_cache_entries", "gauge", "Entries held by a cache",
+                        {'cache': "data"}, stats['size']))
+        
+        for data_type, flight in self._flights.items():
+            samples.append(("market_coalesced_in_flight", "gauge", "Keys with an upstream load in flight",
+                            {'data_type': data_type}, flight.in_flight()))
+        
+        with self._refresh_lock:
+            refreshing = len(self._refreshing)
+        samples.append(("market_refresh_pending", "gauge", "Stale keys queued or running for background refresh",
+                        {}, refreshing))
+        return samples
+    
+    def _load(self, key: Hashable, data_type: str, loader: Callable[[Hashable], Any]) -> Any:
+        """
+        Load one key upstream and cache it
+        
+        Concurrent loads of the same key share a single upstream request.
+        """
+        def load():
+            value = loader(key)
+            if value is not None:
+                self.cache.set(key, value, data_type)
+            return value
+        
+        return self._flights[data_type].do(key, load)
+    
+    def _load_many(self, keys: List[Hashable], data_type: str,
+                   loader: Callable[[List[Hashable]], Dict[Hashable, Any]]) -> Dict[Hashable, Any]:
+        """
+        Load keys upstream in one batch and cache them
+        
+        Keys another caller is already loading are waited on rather than
+        requested again; keys with no data map to None.
+        """
+        def load(owned):
+            values = loader(owned)
+            for key, value in values.items():
+                if value is not None:
+                    self.cache.set(key, value, data_type)
+            return values
+        
+        return self._flights[data_type].do_many(keys, load)
+    
+    def _refresh_in_background(self, keys: List[Hashable], data_type: str,
+                               loader: Callable[[List[Hashable]], Dict[Hashable, Any]]) -> None:
+        """Reload stale keys on the refresh pool, skipping keys already being refreshed"""
+        with self._refresh_lock:
+            keys = [key for key in keys if (data_type, key) not in self._refreshing]
+            self._refreshing.update((data_type, key) for key in keys)
+        
+        if not keys:
+            return
+        
+        def refresh():
+            try:
+                self._load_many(keys, data_type, loader)
+            except Exception:
+                # Keep serving the stale entries; the next lookup retries
+                pass
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.difference_update((data_type, key) for key in keys)
+        
+        self._refresh_executor.submit(refresh)
+    
+    def _get_cached(self, key: Hashable, data_type: str, loader: Callable[[Hashable], Any]) -> FetchResult:
+        """
+        Get a value through the cache, loading it on a miss
+        
+        Stale entries are returned immediately and refreshed in the
+        background; only missing or fully expired entries block on loader.
+        A loader that raises is reported as the result's error.
+        """
+        value, state = self.cache.lookup(key, data_type, allow_stale=self.stale_while_revalidate)
+        if state == FRESH:
+            return FetchResult(value)
+        
+        if state == STALE:
+            self._refresh_in_background([key], data_type, lambda keys: {keys[0]: loader(keys[0])})
+            return FetchResult(value, stale=True)
+        
+        try:
+            return FetchResult(self._load(key, data_type, loader))
+        except Exception as e:
+            return FetchResult(error=str(e))
+    
+    def _fetch_current_price(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Fetch a quote from the backend, bypassing the cache"""
+        with track_upstream(self.backend.name, "quote"):
+            return self.backend.fetch_quote(symbol)
+    
+    def quote(self, symbol: str) -> FetchResult:
+        """
+        Get current price and basic info for a symbol as a FetchResult
+        """
+        return self._get_cached(symbol, "current", self._fetch_current_price)
+    
+    def get_current_price(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """
+        Get current price and basic info for a symbol, or None
+        """
+        return self.quote(symbol).value
+    
+    def _download_quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch quotes for one chunk of symbols with a single backend call
+        
+        Batched downloads only return bars, so quotes without a currency
+        take the one the symbol index lists.
+        """
+        with track_upstream(self.backend.name, "quotes"):
+            quotes = self.backend.fetch_quotes(symbols)
+        
+        index = self.symbol_index if self.symbol_index is not None else get_symbol_index()
+        if index is None:
+            return quotes
+        for symbol, data in quotes.items():
+            if data and not data.get('currency'):
+                record = index.lookup(symbol)
+                if record is not None and record.currency:
+                    quotes[symbol] = dict(data, currency=record.currency)
+        return quotes
+    
+    def _download_quotes_chunked(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch quotes chunk by chunk, skipping chunks that fail"""
+        results = {}
+        for start in range(0, len(symbols), BATCH_CHUNK_SIZE):
+            try:
+                results.update(self._download_quotes(symbols[start:start + BATCH_CHUNK_SIZE]))
+            except Exception:
+                continue
+        return results
+    
+    def batch_quotes(self, symbols: List[str]) -> BatchResult:
+        """
+        Get current prices for many symbols with one batched download per chunk
+        
+        Values are the same per-symbol dicts as get_current_price. Symbols
+        that are still cached are served from the cache; symbols with no
+        data are left out, and symbols in a chunk that failed are listed
+        in errors.
+        """
+        results = {}
+        errors = {}
+        missing = []
+        stale = []
+        
+        for symbol in dict.fromkeys(symbols):
+            cached_data, state = self.cache.lookup(symbol, "current", allow_stale=self.stale_while_revalidate)
+            if state is None:
+                missing.append(symbol)
+                continue
+            
+            results[symbol] = cached_data
+            if state == STALE:
+                stale.append(symbol)
+        
+        if stale:
+            self._refresh_in_background(stale, "current", self._download_quotes_chunked)
+        
+        for start in range(0, len(missing), BATCH_CHUNK_SIZE):
+            chunk = missing[start:start + BATCH_CHUNK_SIZE]
+            try:
+                chunk_quotes = self._load_many(chunk, "current", self._download_quotes)
+            except Exception as e:
+                errors.update((symbol, str(e)) for symbol in chunk)
+                continue
+            
+            results.update((symbol, data) for symbol, data in chunk_quotes.items() if data)
+        
+        return BatchResult(results, errors)
+    
+    def get_batch_quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get current prices for many symbols, leaving out symbols without data
+        """
+        return self.batch_quotes(symbols).values
+    
+    def refresh_quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Download fresh quotes for symbols, bypassing and then updating the cache
+        
+        Raises if the batched download fails, so pollers can keep their
+        previous values.
+        """
+        results = {}
+        symbols = list(dict.fromkeys(symbols))
+        for start in range(0, len(symbols), BATCH_CHUNK_SIZE):
+            chunk_quotes = self._load_many(symbols[start:start + BATCH_CHUNK_SIZE], "current", self._download_quotes)
+            results.update((symbol, data) for symbol, data in chunk_quotes.items() if data)
+        return results
+    
+    @staticmethod
+    def _resolve_period(period: str) -> Tuple[str, Optional[str]]:
+        """Map a dashboard period code to a yfinance period and bar interval"""
+        yf_period = HISTORY_PERIODS.get(period, period.lower())
+        
+        # For very short periods, use interval parameter
+        return yf_period, INTRADAY_INTERVALS.get(yf_period, "1d")
+    
+    @staticmethod
+    def _clean_history(hist: Optional["pd.DataFrame"]) -> Optional["pd.DataFrame"]:
+        """Drop incomplete rows and reject frames without OHLCV columns"""
+        if hist is None or hist.empty:
+            return None
+        
+        # Clean the data
+        hist = hist.dropna()
+        
+        # Ensure we have the required columns
+        required_columns = ['Open', 'High', 'Low', 'Close', 'Volume']
+        if hist.empty or not all(col in hist.columns for col in required_columns):
+            return None
+        
+        return hist
+    
+    @staticmethod
+    def _last_sessions(hist: "pd.DataFrame", sessions: int) -> Tuple["pd.DataFrame", int]:
+        """Keep the bars of the last N trading days and report how many were found"""
+        days = hist.index.normalize()
+        unique_days = days.unique().sort_values()
+        if len(unique_days) > sessions:
+            hist = hist[days >= unique_days[-sessions]]
+        return hist, min(len(unique_days), sessions)
+    
+    def _retain_intraday(self, symbol: str, interval: str) -> Optional["pd.DataFrame"]:
+        """
+        Drop stored intraday bars no period needs any more and return the rest
+
+        A series keeps the trading days of the longest period using its
+        interval; incremental updates would otherwise grow it forever.
+        """
+        hist = self.store.read(symbol, interval)
+        if hist is None:
+            return None
+        sessions = max(INTRADAY_SESSIONS[period] for period, used in INTRADAY_INTERVALS.items()
+                       if used == interval)
+        hist, _ = self._last_sessions(hist, sessions)
+        self.store.trim(symbol, interval, int(hist.index[0].timestamp()))
+        return hist
+    
+    def _download_history(self, symbol: str, interval: str, period: Optional[str] = None,
+                          start: Optional[Any] = None) -> Optional["pd.DataFrame"]:
+        """Download bars from the backend for a period or from a start time onwards"""
+        with track_upstream(self.backend.name, "history"):
+            hist = self.backend.fetch_history(symbol, interval, period=period, start=start)
+        return self._clean_history(hist)
+    
+    @staticmethod
+    def _has_corporate_action(hist: "pd.DataFrame", since: "pd.Timestamp") -> bool:
+        """Whether a frame has a dividend or split on a bar at or after the given time"""
+        actions = [col for col in ('Dividends', 'Stock Splits') if col in hist.columns]
+        if not actions:
+            return False
+        newer = hist.loc[hist.index >= since, actions]
+        return bool((newer.fillna(0) != 0).to_numpy().any())
+    
+    def _fetch_stored_history(self, symbol: str, yf_period: str, interval: str) -> Optional["pd.DataFrame"]:
+        """
+        Serve a period from the local store, downloading only what is missing
+        
+        When the stored series already covers the period, only bars from the
+        last stored one onwards are downloaded and upserted (the last bar is
+        re-fetched because it may still have been forming). Otherwise the
+        whole period is downloaded once and stored.
+        
+        Bars are split and dividend adjusted as of their download, so a
+        split or dividend from the last stored bar onwards makes every
+        stored bar before it stale; the whole period is then downloaded
+        again and replaces the series instead of being appended to it. The
+        re-fetched last bar is included because the stored copy may predate
+        the event.
+        """
+        import pandas as pd
+        
+        now = pd.Timestamp.now(tz="UTC")
+        info = self.store.get_series_info(symbol, interval)
+        
+        def incremental_update() -> bool:
+            last_bar = pd.Timestamp(info['last_ts'], unit='s', tz="UTC").tz_convert(info['tz'] or "UTC")
+            start = last_bar if interval in INTRADAY_INTERVALS.values() else last_bar.strftime("%Y-%m-%d")
+            hist = self._download_history(symbol, interval, start=start)
+            if hist is not None and self._has_corporate_action(hist, last_bar):
+                return False
+            self.store.write(symbol, interval, hist)
+            return True
+        
+        if yf_period in INTRADAY_SESSIONS:
+            sessions = INTRADAY_SESSIONS[yf_period]
+            
+            if info and now.timestamp() - info['last_ts'] < INTRADAY_LOOKBACK_DAYS * 86400 and incremental_update():
+                hist = self._retain_intraday(symbol, interval)
+                if hist is not None:
+                    hist, found = self._last_sessions(hist, sessions)
+                    if found >= sessions:
+                        return hist
+            
+            # Intraday bars older than the lookback are gone upstream, so a
+            # full download replaces the series instead of leaving a gap
+            hist = self._download_history(symbol, interval, period=yf_period)
+            if hist is None:
+                return None
+            self.store.write(symbol, interval, hist, replace=True)
+            return self._last_sessions(self._retain_intraday(symbol, interval), sessions)[0]
+        
+        window_start = int((now - pd.DateOffset(months=PERIOD_MONTHS[yf_period])).timestamp())
+        
+        covered = bool(info) and info['covered_from'] <= window_start
+        if not (covered and incremental_update()):
+            hist = self._download_history(symbol, interval, period=yf_period)
+            if hist is None:
+                return None
+            # A covered series only gets here after a split or dividend, and is re-adjusted
+            self.store.write(symbol, interval, hist, replace=covered, covered_from=window_start)
+        
+        return self.store.read(symbol, interval, start_ts=window_start)
+    
+    def _fetch_historical_data(self, symbol: str, period: str) -> Optional["pd.DataFrame"]:
+        """Fetch historical bars, bypassing the in-memory cache"""
+        yf_period, interval = self._resolve_period(period)
+        
+        if self.store is not None and (yf_period in PERIOD_MONTHS or yf_period in INTRADAY_SESSIONS):
+            return self._fetch_stored_history(symbol, yf_period, interval)
+        
+        # Periods like ytd or max are not kept in the store
+        return self._download_history(symbol, interval, period=yf_period)
+    
+    def get_history_interval(self, period: str) -> str:
+        """Get the bar interval get_historical_data uses for a period"""
+        return self._resolve_period(period)[1]
+    
+    def history(self, symbol: str, period: str) -> FetchResult:
+        """
+        Get historical data for a symbol as a FetchResult
+        
+        Parameters:
+        symbol: Stock symbol
+        period: Time period (1D, 5D, 1M, 3M, 6M, 1Y, 2Y, 5Y, or a yfinance code such as ytd or max)
+        """
+        return self._get_cached((symbol, period), "history", lambda key: self._fetch_historical_data(*key))
+    
+    def get_historical_data(self, symbol: str, period: str) -> Optional["pd.DataFrame"]:
+        """
+        Get historical data for a symbol, or None
+        """
+        return self.history(symbol, period).value
+    
+    def get_multiple_current_prices(self, symbols: list) -> Dict[str, Dict[str, Any]]:
+        """
+        Get current prices for multiple symbols efficiently
+        """
+        return self.get_batch_quotes(symbols)
+    
+    def get_market_summary(self, symbols: list) -> "pd.DataFrame":
+        """
+        Get a summary DataFrame for multiple symbols
+        """
+        import pandas as pd
+        
+        data_list = []
+        quotes = self.get_batch_quotes(symbols)
+        
+        for symbol in symbols:
+            try:
+                data = quotes.get(symbol)
+                if data:
+                    data_list.append({
+                        'Symbol': symbol,
+                        'Price': data['price'],
+                        'Change': data['change'],
+                        'Change %': data['change_percent'],
+                        'Volume': data.get('volume', 'N/A')
+                    })
+            except Exception as e:
+                continue
+        
+        return pd.DataFrame(data_list) if data_list else pd.DataFrame()
+    
+    def search_symbol(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Search for a symbol and return basic info if found
+        
+        The symbol index only lists the most traded symbols, so a symbol
+        missing from it is unverified rather than unknown: it is checked
+        with one quote fetch like any other, and the result says whether
+        the symbol was listed.
+        """
+        try:
+            # Clean the query
+            query = query.strip().upper()
+            
+            index = self.symbol_index if self.symbol_index is not None else get_symbol_index()
+            listed = index is not None and query in index
+            
+            # Try to get data for the symbol
+            result = self.quote(query)
+            
+            if result.value:
+                return {
+                    'symbol': query,
+                    'found': True,
+                    'listed': listed,
+                    'data': result.value
+                }
+            else:
+                return {
+                    'symbol': query,
+                    'found': False,
+                    'listed': listed,
+                    'data': None,
+                    **({'error': result.error} if result.error else {})
+                }
+                
+        except Exception as e:
+            return {
+                'symbol': query,
+                'found': False,
+                'error': str(e)
+            }
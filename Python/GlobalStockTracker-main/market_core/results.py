@@ -0,0 +1,45 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+@dataclass(frozen=True)
+class FetchResult:
+    """
+    The outcome of one fetch: a value, or why there is none
+
+    value is None both when upstream has no data for the key (error is
+    None) and when fetching failed (error holds the message). stale marks
+    a cached value served past its TTL while it is refreshed.
+    """
+    value: Any = None
+    error: Optional[str] = None
+    stale: bool = False
+
+    @property
+    def ok(self) -> bool:
+        """Whether the fetch completed without an error"""
+        return self.error is None
+
+
+@dataclass(frozen=True)
+class BatchResult:
+    """
+    The outcome of a batched fetch
+
+    values maps keys to the values found; keys with no data are left out.
+    errors maps every key whose chunk failed to that chunk's message.
+    """
+    values: Dict[str, Any] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        """Whether every chunk completed without an error"""
+        return not self.errors
+
+    def failed_chunks(self) -> Dict[str, List[str]]:
+        """Failed keys grouped by error message, one group per failed chunk"""
+        groups = {}
+        for key, message in self.errors.items():
+            groups.setdefault(message, []).append(key)
+        return groups
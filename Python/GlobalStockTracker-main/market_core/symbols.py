@@ -0,0 +1,290 @@
+"""
+Local symbol universe for instant search and validation
+
+The bundled listing (symbol, name, exchange, currency) is compiled once
+into a binary index of fixed-width records sorted by symbol, followed by
+a sorted table of lowercase name words pointing back at their records.
+The index is memory-mapped, so opening it costs a few page faults; exact
+and prefix lookups bisect the mapped tables without decoding them, and
+only fuzzy matching decodes the word table, once per index.
+"""
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Set
+import bisect
+import csv
+import difflib
+import mmap
+import os
+import re
+import struct
+import threading
+
+# Listing compiled into the index; override with MARKET_SYMBOL_LISTING
+DEFAULT_LISTING_PATH = os.environ.get(
+    "MARKET_SYMBOL_LISTING",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "listings.csv")
+)
+
+# Directory holding compiled indexes, next to the local OHLCV store
+INDEX_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".market_data")
+
+# Magic, record count, word count, and the listing's mtime and size it was built from
+_HEADER = struct.Struct("<8sIIqq")
+_MAGIC = b"SYMIDX01"
+
+# Symbol, name, exchange and currency, NUL padded; longer names are truncated
+_RECORD = struct.Struct("<16s48s12s4s")
+
+# Lowercase name word and the record it belongs to
+_WORD = struct.Struct("<20sI")
+
+# Name words that match too many listings to be useful on their own
+STOP_WORDS = {"inc", "corp", "corporation", "co", "company", "plc", "ltd", "the", "and", "of", "group", "holdings", "sa", "ag", "se", "nv"}
+
+# Minimum similarity for a fuzzy match, from difflib.SequenceMatcher.ratio
+FUZZY_CUTOFF = 0.75
+
+_WORD_SPLIT = re.compile(r"[^0-9a-z]+")
+
+
+@dataclass(frozen=True)
+class SymbolRecord:
+    """One listed instrument"""
+    symbol: str
+    name: str
+    exchange: str
+    currency: str
+
+
+def _pack(text: str, width: int) -> bytes:
+    """Encode text into at most width bytes without splitting a character"""
+    return text.encode("utf-8")[:width].decode("utf-8", "ignore").encode("utf-8")
+
+
+def _name_words(name: str) -> List[str]:
+    return [word for word in _WORD_SPLIT.split(name.lower()) if len(word) > 1 and word not in STOP_WORDS]
+
+
+def compile_listing(listing_path: str, index_path: str) -> None:
+    """
+    Compile a listing CSV into a binary symbol index
+
+    The CSV needs symbol, name, exchange and currency columns; symbols are
+    upper-cased and the first row wins for duplicates. The index is
+    written to a temporary file and moved into place, so readers never
+    see a partial one.
+    """
+    stat = os.stat(listing_path)
+    records = {}
+    with open(listing_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            symbol = (row.get("symbol") or "").strip().upper()
+            if symbol and symbol not in records:
+                records[symbol] = SymbolRecord(
+                    symbol, (row.get("name") or "").strip(),
+                    (row.get("exchange") or "").strip(), (row.get("currency") or "").strip()
+                )
+
+    ordered = [records[symbol] for symbol in sorted(records)]
+    words = sorted(
+        (_pack(word, _WORD.size - 4), position)
+        for position, record in enumerate(ordered)
+        for word in set(_name_words(record.name))
+    )
+
+    os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
+    temp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, len(ordered), len(words), stat.st_mtime_ns, stat.st_size))
+        for record in ordered:
+            f.write(_RECORD.pack(
+                _pack(record.symbol, 16), _pack(record.name, 48),
+                _pack(record.exchange, 12), _pack(record.currency, 4)
+            ))
+        for word, position in words:
+            f.write(_WORD.pack(word, position))
+    os.replace(temp_path, index_path)
+
+
+class _Column:
+    """
+    A bytes field of fixed-width rows in a buffer, as a sorted sequence
+
+    bisect only needs __len__ and __getitem__, so lookups touch the
+    O(log n) rows they compare and nothing else.
+    """
+
+    def __init__(self, buffer: mmap.mmap, offset: int, stride: int, width: int, count: int):
+        self.buffer = buffer
+        self.offset = offset
+        self.stride = stride
+        self.width = width
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, i):
+        start = self.offset + i * self.stride
+        return self.buffer[start:start + self.width].rstrip(b"\0")
+
+
+class SymbolIndex:
+    """
+    Memory-mapped index over a listing, for lookups and search
+
+    Use SymbolIndex.open() to compile the listing on first use (and again
+    whenever it changes) and map the result.
+    """
+
+    def __init__(self, index_path: str):
+        self.path = index_path
+        with open(index_path, "rb") as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self._count, self._word_count, self.source_mtime_ns, self.source_size = \
+            _HEADER.unpack_from(self._buffer, 0)
+        expected = _HEADER.size + self._count * _RECORD.size + self._word_count * _WORD.size
+        if magic != _MAGIC or len(self._buffer) != expected:
+            self._buffer.close()
+            raise ValueError(f"{index_path} is not a symbol index")
+
+        self._words_offset = _HEADER.size + self._count * _RECORD.size
+        self._symbols = _Column(self._buffer, _HEADER.size, _RECORD.size, 16, self._count)
+        self._words = _Column(self._buffer, self._words_offset, _WORD.size, _WORD.size - 4, self._word_count)
+        self._vocabulary: Optional[List[str]] = None
+
+    @classmethod
+    def open(cls, listing_path: str = DEFAULT_LISTING_PATH, index_path: Optional[str] = None) -> "SymbolIndex":
+        """Map the index for a listing, compiling it first if it is missing or out of date"""
+        if index_path is None:
+            index_path = os.path.join(INDEX_DIR, os.path.splitext(os.path.basename(listing_path))[0] + ".idx")
+
+        stat = os.stat(listing_path)
+        try:
+            index = cls(index_path)
+            if (index.source_mtime_ns, index.source_size) == (stat.st_mtime_ns, stat.st_size):
+                return index
+            index.close()
+        except (OSError, ValueError, struct.error):
+            pass
+
+        compile_listing(listing_path, index_path)
+        return cls(index_path)
+
+    def close(self) -> None:
+        self._buffer.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, symbol: object) -> bool:
+        return isinstance(symbol, str) and self._find(symbol) is not None
+
+    def __iter__(self) -> Iterator[SymbolRecord]:
+        return (self._record(position) for position in range(self._count))
+
+    def _record(self, position: int) -> SymbolRecord:
+        fields = _RECORD.unpack_from(self._buffer, _HEADER.size + position * _RECORD.size)
+        return SymbolRecord(*(field.rstrip(b"\0").decode("utf-8") for field in fields))
+
+    def _find(self, symbol: str) -> Optional[int]:
+        key = symbol.strip().upper().encode("utf-8")
+        position = bisect.bisect_left(self._symbols, key)
+        if position < self._count and self._symbols[position] == key:
+            return position
+        return None
+
+    def _prefixed(self, column: _Column, prefix: bytes) -> Iterator[int]:
+        """Rows of a sorted column starting with prefix, in order"""
+        row = bisect.bisect_left(column, prefix)
+        while row < len(column) and column[row].startswith(prefix):
+            yield row
+            row += 1
+
+    def _word_position(self, row: int) -> int:
+        return struct.unpack_from("<I", self._buffer, self._words_offset + row * _WORD.size + _WORD.size - 4)[0]
+
+    def _name_matches(self, words: List[str]) -> Set[int]:
+        """Records with a name word starting with each of words"""
+        matched: Optional[Set[int]] = None
+        for word in words:
+            positions = {self._word_position(row) for row in self._prefixed(self._words, word.encode("utf-8"))}
+            matched = positions if matched is None else matched & positions
+            if not matched:
+                return set()
+        return matched or set()
+
+    def lookup(self, symbol: str) -> Optional[SymbolRecord]:
+        """The listing for an exact symbol, or None if it is not listed"""
+        position = self._find(symbol)
+        return self._record(position) if position is not None else None
+
+    def search(self, query: str, limit: int = 10, fuzzy: bool = True) -> List[SymbolRecord]:
+        """
+        Listings matching a partial symbol or company name, best first
+
+        The exact symbol comes first, then symbols starting with the
+        query (shortest first), then listings whose name has a word
+        starting with every word of the query. If nothing matches and
+        fuzzy is set, names with a word close to a query word are
+        returned instead, to catch misspellings.
+        """
+        query = query.strip()
+        if not query or limit <= 0:
+            return []
+
+        positions: List[int] = []
+        seen: Set[int] = set()
+
+        def add(candidates) -> bool:
+            for position in candidates:
+                if position not in seen:
+                    seen.add(position)
+                    positions.append(position)
+                    if len(positions) >= limit:
+                        return True
+            return False
+
+        exact = self._find(query)
+        prefixed = sorted(self._prefixed(self._symbols, query.upper().encode("utf-8")),
+                          key=lambda position: len(self._symbols[position]))
+        words = _name_words(query) or [query.lower()]
+        add([exact] if exact is not None else []) or add(prefixed) or add(sorted(self._name_matches(words)))
+
+        if fuzzy and not positions:
+            vocabulary = self._fuzzy_vocabulary()
+            for close in [close for word in words
+                          for close in difflib.get_close_matches(word, vocabulary, n=limit, cutoff=FUZZY_CUTOFF)]:
+                if add(sorted(self._name_matches([close]))):
+                    break
+
+        return [self._record(position) for position in positions]
+
+    def _fuzzy_vocabulary(self) -> List[str]:
+        """Distinct name words, decoded once for difflib"""
+        if self._vocabulary is None:
+            self._vocabulary = sorted({self._words[row].decode("utf-8") for row in range(self._word_count)})
+        return self._vocabulary
+
+
+_index: Optional[SymbolIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_symbol_index() -> Optional[SymbolIndex]:
+    """
+    The process-wide index of the default listing
+
+    Returns None if the listing cannot be read or compiled, in which
+    case callers should fall back to asking upstream.
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                try:
+                    _index = SymbolIndex.open()
+                except Exception:
+                    return None
+    return _index
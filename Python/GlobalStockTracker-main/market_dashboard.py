@@ -1,8 +1,19 @@
 import streamlit as st
-import requests
 import json
+import pandas as pd
 from datetime import datetime
 import time
+from fetch_engine import iter_completed
+from providers import create_backend
+from utils import style_summary_frame
+from instrumentation import RerunProfile, start_metrics_server, track_upstream
+from diagnostics import diagnostics_enabled, render_diagnostics, save_profile
+
+# Seconds a single quote request may take before it is skipped
+QUOTE_TIMEOUT = 10
+
+# Time spent in each part of this script run
+profile = RerunProfile("market_dashboard")
 
 # Page configuration
 st.set_page_config(
@@ -31,58 +42,40 @@ def format_percentage(value):
     except:
         return 'N/A'
 
+# Quotes come from the chart API backend unless MARKET_DATA_BACKEND picks another
+@st.cache_resource
+def get_quote_backend():
+    return create_backend(default="chart")
+
+quote_backend = get_quote_backend()
+
+# Serve /metrics on MARKET_METRICS_PORT when it is set
+start_metrics_server()
+
+def fetch_yahoo_finance_data(symbol):
+    """Fetch stock data from the quote backend, raising on failure"""
+    with track_upstream(quote_backend.name, "quote"):
+        return quote_backend.fetch_quote(symbol)
+
 def get_yahoo_finance_data(symbol):
     """Get stock data using Yahoo Finance API"""
     try:
-        # Use Yahoo Finance query API
-        url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
-        response = requests.get(url, headers=headers, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
-            
-            if 'chart' in data and data['chart']['result']:
-                result = data['chart']['result'][0]
-                meta = result['meta']
-                
-                current_price = meta.get('regularMarketPrice', 0)
-                previous_close = meta.get('previousClose', current_price)
-                
-                change = current_price - previous_close
-                change_percent = (change / previous_close) * 100 if previous_close != 0 else 0
-                
-                return {
-                    'symbol': symbol,
-                    'price': current_price,
-                    'change': change,
-                    'change_percent': change_percent,
-                    'volume': meta.get('regularMarketVolume', 'N/A'),
-                    'currency': meta.get('currency', 'USD'),
-                    'market_state': meta.get('marketState', 'UNKNOWN')
-                }
-        
-        return None
-        
+        return fetch_yahoo_finance_data(symbol)
     except Exception as e:
         st.error(f"Error fetching data for {symbol}: {str(e)}")
         return None
 
+# Emoji shown for each Yahoo market state
+MARKET_STATE_EMOJIS = {
+    'REGULAR': "🟢",
+    'CLOSED': "🔴",
+    'PRE': "🟡",
+    'POST': "🟠"
+}
+
 def get_market_status_emoji(market_state):
     """Get emoji based on market state"""
-    if market_state == 'REGULAR':
-        return "🟢"
-    elif market_state == 'CLOSED':
-        return "🔴"
-    elif market_state == 'PRE':
-        return "🟡"
-    elif market_state == 'POST':
-        return "🟠"
-    else:
-        return "⚪"
+    return MARKET_STATE_EMOJIS.get(market_state, "⚪")
 
 # Sidebar configuration
 st.sidebar.title("🌍 Global Markets")
@@ -121,43 +114,72 @@ selected_indices = st.sidebar.multiselect(
 st.sidebar.subheader("Search Stocks")
 search_symbol = st.sidebar.text_input("Enter Stock Symbol (e.g., AAPL, GOOGL)")
 
+# Live sections rerun on their own on this cadence instead of the whole script
+live_refresh_every = refresh_interval if auto_refresh else None
+
 # Main dashboard
 st.title("📈 Global Stock Market Dashboard")
 st.markdown("Real-time market data from Yahoo Finance")
 
 # Last update time
-last_update_placeholder = st.empty()
+@st.fragment(run_every=live_refresh_every)
+def render_last_updated():
+    if auto_refresh:
+        st.info(f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} | Auto-refresh: {refresh_interval}s")
+    else:
+        st.info(f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} | Auto-refresh: Disabled")
 
-# Create tabs
-tab1, tab2 = st.tabs(["📊 Market Overview", "🔍 Stock Search"])
+render_last_updated()
 
-with tab1:
-    st.header("Major Global Indices")
+# Create tabs; the diagnostics tab only appears with ?diagnostics=1
+tab_names = ["📊 Market Overview", "🔍 Stock Search"]
+show_diagnostics = diagnostics_enabled()
+if show_diagnostics:
+    tab_names.append("🩺 Diagnostics")
+tab1, tab2, *diagnostics_tab = st.tabs(tab_names)
+
+# Overview cards and summary table; on a price tick only this fragment
+# reruns, so the search tab and the sidebar are not recomputed
+@st.fragment(run_every=live_refresh_every)
+def render_market_overview():
+    # Fragment reruns are profiled on their own
+    overview_profile = RerunProfile("market_dashboard.overview")
     
     if selected_indices:
         # Create progress bar for loading
         progress_bar = st.progress(0)
         status_text = st.empty()
         
-        # Fetch data for selected indices
-        indices_data = []
-        for i, index_name in enumerate(selected_indices):
-            symbol = available_indices[index_name]
-            status_text.text(f"Loading {index_name}...")
-            
-            data = get_yahoo_finance_data(symbol)
-            if data:
-                indices_data.append({
-                    'Index': index_name,
-                    'Symbol': symbol,
-                    'Price': data['price'],
-                    'Change': data['change'],
-                    'Change %': data['change_percent'],
-                    'Volume': data.get('volume', 'N/A'),
-                    'Market State': data.get('market_state', 'UNKNOWN')
-                })
-            
-            progress_bar.progress((i + 1) / len(selected_indices))
+        # Fetch all selected indices concurrently; progress advances as each one lands
+        symbol_names = {available_indices[index_name]: index_name for index_name in selected_indices}
+        quotes = {}
+        
+        with overview_profile.section("fetch"):
+            for i, (symbol, data, error) in enumerate(iter_completed(fetch_yahoo_finance_data, list(symbol_names), timeout=QUOTE_TIMEOUT)):
+                if error is not None:
+                    st.error(f"Error fetching data for {symbol}: {str(error)}")
+                elif data:
+                    quotes[symbol] = data
+                
+                progress_bar.progress((i + 1) / len(symbol_names))
+                status_text.text(f"Loaded {symbol_names[symbol]} ({i + 1}/{len(symbol_names)})")
+        
+        # Keep the display order of the sidebar selection
+        with overview_profile.section("frames"):
+            indices_data = []
+            for index_name in selected_indices:
+                symbol = available_indices[index_name]
+                data = quotes.get(symbol)
+                if data:
+                    indices_data.append({
+                        'Index': index_name,
+                        'Symbol': symbol,
+                        'Price': data['price'],
+                        'Change': data['change'],
+                        'Change %': data['change_percent'],
+                        'Volume': data.get('volume', 'N/A'),
+                        'Market State': data.get('market_state', 'UNKNOWN')
+                    })
         
         progress_bar.empty()
         status_text.empty()
@@ -186,48 +208,30 @@ with tab1:
             # Create summary table
             st.subheader("Summary Table")
             
-            # Create table headers
-            col1, col2, col3, col4, col5 = st.columns([2, 1, 1, 1, 1])
-            with col1:
-                st.write("**Index**")
-            with col2:
-                st.write("**Price**")
-            with col3:
-                st.write("**Change**")
-            with col4:
-                st.write("**Change %**")
-            with col5:
-                st.write("**Status**")
+            # Format whole columns at once and display as one table
+            with overview_profile.section("frames"):
+                df = pd.DataFrame(indices_data)
+                df['Status'] = df['Market State'].map(MARKET_STATE_EMOJIS).fillna("⚪") + " " + df['Market State']
+                summary_table = style_summary_frame(df[['Index', 'Price', 'Change', 'Change %', 'Status']])
             
-            # Add separator
-            st.markdown("---")
-            
-            # Display data rows
-            for data in indices_data:
-                col1, col2, col3, col4, col5 = st.columns([2, 1, 1, 1, 1])
-                with col1:
-                    st.write(data['Index'])
-                with col2:
-                    st.write(format_currency(data['Price']))
-                with col3:
-                    st.write(format_currency(data['Change']))
-                with col4:
-                    color = "green" if data['Change %'] > 0 else "red" if data['Change %'] < 0 else "gray"
-                    st.markdown(f"<span style='color: {color}'>{format_percentage(data['Change %'])}</span>", unsafe_allow_html=True)
-                with col5:
-                    emoji = get_market_status_emoji(data['Market State'])
-                    st.write(f"{emoji} {data['Market State']}")
+            st.dataframe(summary_table, use_container_width=True, hide_index=True)
         else:
             st.warning("No data could be retrieved for the selected indices. Please try again later.")
     
     else:
         st.info("Please select at least one index from the sidebar to display market data.")
+    
+    save_profile("market_dashboard.overview", overview_profile)
+
+with tab1:
+    st.header("Major Global Indices")
+    render_market_overview()
 
 with tab2:
     st.header("Stock Search")
     
     if search_symbol:
-        with st.spinner(f"Searching for {search_symbol.upper()}..."):
+        with st.spinner(f"Searching for {search_symbol.upper()}..."), profile.section("fetch"):
             stock_data = get_yahoo_finance_data(search_symbol.upper())
             
         if stock_data:
@@ -288,25 +292,12 @@ with tab2:
                             delta=f"{format_percentage(stock_data['change_percent'])}"
                         )
 
-# Auto-refresh functionality
-if auto_refresh:
-    last_update_placeholder.info(f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} | Auto-refresh: {refresh_interval}s")
-    
-    # Auto-refresh after specified interval
-    time.sleep(0.1)  # Small delay to prevent immediate refresh
-    
-    # Use session state to track refresh timing
-    if 'last_refresh' not in st.session_state:
-        st.session_state.last_refresh = time.time()
-    
-    if time.time() - st.session_state.last_refresh > refresh_interval:
-        st.session_state.last_refresh = time.time()
-        st.rerun()
+if show_diagnostics:
+    with diagnostics_tab[0]:
+        render_diagnostics(profile)
 
-else:
-    last_update_placeholder.info(f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} | Auto-refresh: Disabled")
-    
-    # Manual refresh button
+# Manual refresh when auto-refresh is off
+if not auto_refresh:
     if st.button("🔄 Refresh Data"):
         st.rerun()
 
@@ -320,4 +311,6 @@ st.markdown(
     </div>
     """,
     unsafe_allow_html=True
-)
\ No newline at end of file
+)
+
+save_profile("market_dashboard", profile)
@@ -0,0 +1,264 @@
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set
+import threading
+import time
+from fetch_engine import iter_completed, chunked
+from market_core import MarketDataProvider, BATCH_CHUNK_SIZE
+from market_calendar import OPEN, PRE, POST, CLOSED, UNKNOWN, calendar_for_symbol
+from chart_api import CHART_ENDPOINT
+from rate_limiter import get_rate_limiter
+
+# Seconds between polls when no session asks for anything faster
+DEFAULT_POLL_INTERVAL = 60
+
+# Fastest poll cadence any session can request
+MIN_POLL_INTERVAL = 15
+
+# Sessions that have not checked in for this many seconds stop being polled
+SESSION_TTL = 600
+
+# Seconds a single batched chunk may take before the poller moves on, on top
+# of the time it may spend waiting for its rate limit permits
+POLL_TIMEOUT = 20
+
+# Pre- and post-market symbols are polled this many times less often
+EXTENDED_HOURS_FACTOR = 4
+
+# Longest the poller sleeps before re-checking its schedule
+MAX_SLEEP = 300
+
+
+class PollSchedule:
+    """
+    Per-symbol poll due times based on each symbol's exchange session
+
+    Symbols are polled every base interval while their market is open,
+    EXTENDED_HOURS_FACTOR times less often in pre- and post-market, and
+    not at all while it is closed or at lunch: the first poll after the
+    close captures the closing quote, and the next is due at the open.
+    Symbols without a known exchange, or whose exchange's holidays are not
+    known for the year, are always treated as open.
+    """
+
+    def __init__(self):
+        self._due = {}  # symbol -> wall-clock time of the next poll
+
+    def interval_for(self, symbol: str, base: float, now: float) -> float:
+        """Seconds from now until a symbol polled at now is due again"""
+        calendar = calendar_for_symbol(symbol)
+        if calendar is None:
+            return base
+
+        state = calendar.state(now)
+        if state in (OPEN, UNKNOWN):
+            return base
+        if state in (PRE, POST):
+            return base * EXTENDED_HOURS_FACTOR
+        return max(base, calendar.next_open(now).timestamp() - now)
+
+    def due(self, symbols: Iterable[str], now: float) -> List[str]:
+        """Symbols whose next poll is due, including ones never polled"""
+        return sorted(symbol for symbol in symbols if self._due.get(symbol, 0.0) <= now)
+
+    def mark_polled(self, symbols: Iterable[str], base: float, now: float) -> None:
+        """Schedule the next poll of symbols that were just fetched"""
+        for symbol in symbols:
+            self._due[symbol] = now + self.interval_for(symbol, base, now)
+
+    def retry(self, symbols: Iterable[str], base: float, now: float) -> None:
+        """Schedule symbols whose fetch failed to be tried again after base seconds"""
+        for symbol in symbols:
+            self._due[symbol] = now + base
+
+    def retain(self, symbols: Set[str]) -> None:
+        """Forget symbols no session watches any more"""
+        for symbol in set(self._due) - symbols:
+            del self._due[symbol]
+
+    def next_due(self, symbols: Iterable[str]) -> Optional[float]:
+        """Earliest due time among symbols, or None if there are none"""
+        return min((self._due.get(symbol, 0.0) for symbol in symbols), default=None)
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    """
+    An immutable view of the latest quotes published by a MarketPoller
+    """
+    quotes: Mapping[str, Mapping[str, Any]] = field(default_factory=lambda: MappingProxyType({}))
+    as_of: float = 0.0      # Wall-clock time of the poll that produced it
+    version: int = 0        # Increases by one with every publish
+
+    def get(self, symbol: str) -> Optional[Mapping[str, Any]]:
+        """Get the quote for a symbol, if it has been polled"""
+        return self.quotes.get(symbol)
+
+
+class MarketPoller:
+    """
+    A single background poller that serves quotes to every Streamlit session
+
+    Sessions register the symbols they display with watch() and read
+    snapshot(); they never call the upstream API themselves. The poller
+    refreshes the union of all watched symbols, so the upstream request
+    rate depends on the number of watched symbols, not the number of open
+    tabs. Each symbol is polled on a PollSchedule that follows its market's
+    trading session, so closed markets are not polled at all.
+    """
+
+    def __init__(self, provider: MarketDataProvider, interval: float = DEFAULT_POLL_INTERVAL,
+                 session_ttl: float = SESSION_TTL):
+        self.provider = provider
+        self.interval = interval
+        self.session_ttl = session_ttl
+
+        self._lock = threading.Lock()
+        self._watchers = {}     # session_id -> (symbols, requested interval, last seen)
+        self._attempted = set() # Symbols polled at least once, with or without data
+        self._snapshot = MarketSnapshot()
+        self._schedule = PollSchedule()
+        self._updated = threading.Condition()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> "MarketPoller":
+        """Start the polling thread if it is not already running"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="market-poller", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the polling thread"""
+        self._stop.set()
+        self._wakeup.set()
+
+    def watch(self, session_id: str, symbols: Iterable[str], interval: Optional[float] = None) -> None:
+        """
+        Register or renew the symbols a session is displaying
+
+        Sessions should call this on every rerun; a session that stops
+        calling it is dropped after session_ttl seconds. Symbols the poller
+        has never seen trigger an immediate poll.
+        """
+        symbols = frozenset(symbols)
+        with self._lock:
+            self._watchers[session_id] = (symbols, interval, time.monotonic())
+            has_new = bool(symbols - self._attempted)
+
+        if has_new:
+            self._wakeup.set()
+
+    def unwatch(self, session_id: str) -> None:
+        """Stop polling on behalf of a session"""
+        with self._lock:
+            self._watchers.pop(session_id, None)
+
+    def watched_symbols(self) -> Set[str]:
+        """Get the union of symbols watched by live sessions"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [sid for sid, (_, _, seen) in self._watchers.items() if now - seen > self.session_ttl]
+            for session_id in expired:
+                del self._watchers[session_id]
+            return set().union(*(symbols for symbols, _, _ in self._watchers.values()))
+
+    def current_interval(self) -> float:
+        """Get the poll interval: the fastest any live session asked for"""
+        with self._lock:
+            requested = [interval for _, interval, _ in self._watchers.values() if interval]
+        return max(MIN_POLL_INTERVAL, min(requested, default=self.interval))
+
+    def snapshot(self) -> MarketSnapshot:
+        """Get the latest published snapshot"""
+        return self._snapshot
+
+    def has_polled(self, symbols: Iterable[str]) -> bool:
+        """Check whether every symbol has been polled at least once"""
+        with self._lock:
+            return set(symbols) <= self._attempted
+
+    def wait_for(self, symbols: Iterable[str], timeout: float) -> MarketSnapshot:
+        """
+        Wait until every symbol has been polled at least once
+
+        Returns the latest snapshot once that happens or timeout seconds
+        pass, whichever comes first.
+        """
+        symbols = set(symbols)
+        deadline = time.monotonic() + timeout
+        with self._updated:
+            while True:
+                remaining = deadline - time.monotonic()
+                if self.has_polled(symbols) or remaining <= 0:
+                    return self._snapshot
+                self._updated.wait(remaining)
+
+    @staticmethod
+    def _with_session(symbol: str, quote: Mapping[str, Any], now: float) -> Mapping[str, Any]:
+        """Tag a quote with its market's session state and an as-of-close marker"""
+        calendar = calendar_for_symbol(symbol)
+        state = calendar.state(now) if calendar is not None else None
+        return MappingProxyType(dict(quote, session=state, as_of_close=state == CLOSED))
+
+    def _poll(self, due: List[str], watched: Set[str]) -> Set[str]:
+        """Fetch due symbols, publish a new snapshot and return the symbols fetched"""
+        # Batched downloads cannot overlap (see providers._download_lock), so
+        # chunks are fetched one at a time; each may also wait for its own
+        # share of chart permits
+        queued = BATCH_CHUNK_SIZE / get_rate_limiter(CHART_ENDPOINT).rate
+        fresh = {}
+        for _, quotes, error in iter_completed(
+            self.provider.refresh_quotes,
+            chunked(due, BATCH_CHUNK_SIZE),
+            max_workers=1,
+            timeout=POLL_TIMEOUT + queued
+        ):
+            if error is None:
+                fresh.update(quotes)
+
+        # Keep the previous quote for symbols that failed or were not due this round
+        now = time.time()
+        quotes = {symbol: quote for symbol, quote in self._snapshot.quotes.items() if symbol in watched}
+        quotes.update((symbol, self._with_session(symbol, quote, now)) for symbol, quote in fresh.items())
+
+        with self._lock:
+            self._attempted = (self._attempted & watched) | set(due)
+
+        with self._updated:
+            self._snapshot = MarketSnapshot(
+                quotes=MappingProxyType(quotes),
+                as_of=now,
+                version=self._snapshot.version + 1
+            )
+            self._updated.notify_all()
+
+        return set(fresh)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            # Clear before reading the watch list so a concurrent watch() is never missed
+            self._wakeup.clear()
+            watched = self.watched_symbols()
+            base = self.current_interval()
+            self._schedule.retain(watched)
+            due = self._schedule.due(watched, time.time())
+
+            if due:
+                fetched = set()
+                try:
+                    fetched = self._poll(due, watched)
+                except Exception:
+                    # Never let one bad round kill the poller
+                    pass
+                now = time.time()
+                self._schedule.mark_polled(fetched, base, now)
+                self._schedule.retry(set(due) - fetched, base, now)
+
+            next_due = self._schedule.next_due(watched)
+            sleep = MAX_SLEEP if next_due is None else next_due - time.time()
+            self._wakeup.wait(timeout=min(MAX_SLEEP, max(0.0, sleep)))
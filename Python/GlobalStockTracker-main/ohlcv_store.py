@@ -0,0 +1,224 @@
+from typing import TYPE_CHECKING, Dict, List, Optional, Any
+import os
+import sqlite3
+import threading
+import time
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Database file used when no path is given; override with MARKET_DATA_STORE
+DEFAULT_STORE_PATH = os.environ.get(
+    "MARKET_DATA_STORE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".market_data", "ohlcv.sqlite")
+)
+
+# Columns kept for every bar
+BAR_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    open REAL,
+    high REAL,
+    low REAL,
+    close REAL,
+    volume REAL,
+    PRIMARY KEY (symbol, interval, ts)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS series (
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    tz TEXT,
+    first_ts INTEGER NOT NULL,
+    last_ts INTEGER NOT NULL,
+    covered_from INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (symbol, interval)
+);
+"""
+
+
+def _to_epoch_seconds(index: "pd.DatetimeIndex") -> List[int]:
+    """Convert a DatetimeIndex to UTC epoch seconds"""
+    import pandas as pd
+
+    if index.tz is None:
+        index = index.tz_localize("UTC")
+    naive_utc = index.tz_convert("UTC").tz_localize(None)
+    return ((naive_utc - pd.Timestamp("1970-01-01")) // pd.Timedelta(seconds=1)).astype("int64").tolist()
+
+
+class OHLCVStore:
+    """
+    A local SQLite store of OHLCV bars keyed by symbol and interval
+
+    Each (symbol, interval) series is kept contiguous from its first stored
+    bar up to the last fetch, so callers only need to download bars newer
+    than last_ts and append them with write(). covered_from records the
+    earliest instant the stored bars are known to be complete from, which
+    is the start of the widest period downloaded in full.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+
+    @classmethod
+    def open_default(cls) -> Optional["OHLCVStore"]:
+        """Open the default store, or return None if it cannot be created"""
+        try:
+            return cls()
+        except (OSError, sqlite3.Error):
+            return None
+
+    def get_series_info(self, symbol: str, interval: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the stored range of a series
+
+        Returns a dict with tz, first_ts, last_ts, covered_from and
+        updated_at, or None if nothing is stored for the series.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT tz, first_ts, last_ts, covered_from, updated_at FROM series "
+                "WHERE symbol = ? AND interval = ?",
+                (symbol, interval)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        return {'tz': row[0], 'first_ts': row[1], 'last_ts': row[2], 'covered_from': row[3], 'updated_at': row[4]}
+
+    def write(self, symbol: str, interval: str, frame: "pd.DataFrame", replace: bool = False,
+              covered_from: Optional[int] = None) -> int:
+        """
+        Upsert bars from a yfinance-style frame and return the number written
+
+        Bars at an existing timestamp are overwritten, so re-fetching the last
+        (possibly still forming) bar is safe. With replace=True the series is
+        cleared first, for when a full download supersedes what is stored.
+        Pass covered_from (UTC epoch seconds) after a full download to record
+        the start of the period it covers.
+        """
+        if frame is None or frame.empty or not all(col in frame.columns for col in BAR_COLUMNS):
+            return 0
+
+        frame = frame[BAR_COLUMNS].dropna()
+        if frame.empty:
+            return 0
+
+        timestamps = _to_epoch_seconds(frame.index)
+        rows = [
+            (symbol, interval, ts, *values)
+            for ts, values in zip(timestamps, frame.itertuples(index=False, name=None))
+        ]
+        tz = str(frame.index.tz) if frame.index.tz is not None else "UTC"
+        first_ts = min(timestamps)
+        if covered_from is None or covered_from > first_ts:
+            covered_from = first_ts
+
+        with self._lock:
+            with self._conn:
+                if replace:
+                    self._conn.execute("DELETE FROM bars WHERE symbol = ? AND interval = ?", (symbol, interval))
+                    self._conn.execute("DELETE FROM series WHERE symbol = ? AND interval = ?", (symbol, interval))
+
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO bars (symbol, interval, ts, open, high, low, close, volume) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                self._conn.execute(
+                    "INSERT INTO series (symbol, interval, tz, first_ts, last_ts, covered_from, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (symbol, interval) DO UPDATE SET "
+                    "tz = excluded.tz, "
+                    "first_ts = MIN(series.first_ts, excluded.first_ts), "
+                    "last_ts = MAX(series.last_ts, excluded.last_ts), "
+                    "covered_from = MIN(series.covered_from, excluded.covered_from), "
+                    "updated_at = excluded.updated_at",
+                    (symbol, interval, tz, first_ts, max(timestamps), covered_from, time.time())
+                )
+
+        return len(rows)
+
+    def read(self, symbol: str, interval: str, start_ts: Optional[int] = None) -> Optional["pd.DataFrame"]:
+        """
+        Read a series as a frame indexed by bar time in the exchange timezone
+
+        Only bars at or after start_ts (UTC epoch seconds) are returned when
+        it is given. Returns None if nothing matches.
+        """
+        info = self.get_series_info(symbol, interval)
+        if info is None:
+            return None
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT ts, open, high, low, close, volume FROM bars "
+                "WHERE symbol = ? AND interval = ? AND ts >= ? ORDER BY ts",
+                (symbol, interval, start_ts if start_ts is not None else info['first_ts'])
+            ).fetchall()
+
+        if not rows:
+            return None
+
+        import pandas as pd
+
+        frame = pd.DataFrame.from_records(rows, columns=['ts'] + BAR_COLUMNS)
+        index = pd.to_datetime(frame.pop('ts'), unit='s', utc=True).dt.tz_convert(info['tz'] or "UTC")
+        frame.index = pd.DatetimeIndex(index, name='Date')
+        return frame
+
+    def trim(self, symbol: str, interval: str, start_ts: int) -> int:
+        """
+        Drop the bars of a series before start_ts and return how many went
+
+        start_ts is in UTC epoch seconds. The series keeps its first bar
+        and covered period in step with what remains.
+        """
+        with self._lock:
+            with self._conn:
+                deleted = self._conn.execute(
+                    "DELETE FROM bars WHERE symbol = ? AND interval = ? AND ts < ?",
+                    (symbol, interval, start_ts)
+                ).rowcount
+                if deleted:
+                    self._conn.execute(
+                        "UPDATE series SET "
+                        "first_ts = (SELECT MIN(ts) FROM bars WHERE symbol = ? AND interval = ?), "
+                        "covered_from = MAX(covered_from, ?) "
+                        "WHERE symbol = ? AND interval = ?",
+                        (symbol, interval, start_ts, symbol, interval)
+                    )
+        return deleted
+
+    def delete(self, symbol: str, interval: Optional[str] = None) -> None:
+        """Drop a stored series, or every interval of a symbol"""
+        with self._lock:
+            with self._conn:
+                if interval is None:
+                    self._conn.execute("DELETE FROM bars WHERE symbol = ?", (symbol,))
+                    self._conn.execute("DELETE FROM series WHERE symbol = ?", (symbol,))
+                else:
+                    self._conn.execute("DELETE FROM bars WHERE symbol = ? AND interval = ?", (symbol, interval))
+                    self._conn.execute("DELETE FROM series WHERE symbol = ? AND interval = ?", (symbol, interval))
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,544 @@
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Set
+from urllib.parse import quote
+import json
+import logging
+import os
+import random
+import threading
+import time
+import zlib
+from fetch_engine import iter_completed
+from http_transport import HttpTransport, get_shared_transport
+from chart_api import CHART_ENDPOINT, fetch_chart_quote, fetch_chart_history
+from rate_limiter import PermitTimeoutError, ThrottledError, get_rate_limiter
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+# Environment variables selecting and configuring the backend
+BACKEND_ENV = "MARKET_DATA_BACKEND"
+REPLAY_DIR_ENV = "MARKET_DATA_REPLAY_DIR"
+REPLAY_LATENCY_ENV = "MARKET_DATA_REPLAY_LATENCY"
+
+# Backend used when neither the caller nor the environment picks one
+DEFAULT_BACKEND = "yfinance"
+
+# Seconds a single chart API quote may take inside a batch
+CHART_QUOTE_TIMEOUT = 10
+
+# Rate limiter for the quoteSummary endpoint behind yfinance's Ticker.info
+QUOTE_SUMMARY_ENDPOINT = "quoteSummary"
+
+# Distinct known symbols whose info must come back empty within the window
+# before that counts as throttling rather than unknown or delisted symbols
+EMPTY_INFO_THRESHOLD = 3
+EMPTY_INFO_WINDOW = 30.0
+
+# yf.download keeps its progress in process-wide state (shared._DFS and
+# friends in 0.2.x, the thread count in every release), so only one batched
+# download may run at a time
+_download_lock = threading.Lock()
+
+_empty_info: Dict[str, float] = {}
+# Symbols whose info has come back with data in this process
+_info_symbols: Set[str] = set()
+_empty_info_lock = threading.Lock()
+
+
+def _is_rate_limited(error: Optional[str]) -> bool:
+    """Whether a yfinance error message reports throttling"""
+    return error is not None and ("RateLimit" in error or "Too Many Requests" in error)
+
+
+def _empty_info_burst(symbol: str) -> bool:
+    """
+    Record an empty info for symbol and tell whether it looks like throttling
+
+    Yahoo answers invalid, delisted and non-equity symbols with an empty
+    info too, so one empty answer says nothing; several symbols coming
+    back empty within EMPTY_INFO_WINDOW seconds does. Only symbols known
+    to exist count: those that returned info before or are in the symbol
+    index, so a user trying out bad tickers cannot trip it.
+    """
+    from market_core import get_symbol_index
+
+    symbol = symbol.upper()
+    index = get_symbol_index()
+    with _empty_info_lock:
+        known = symbol in _info_symbols
+    if not known and (index is None or symbol not in index):
+        return False
+
+    now = time.monotonic()
+    with _empty_info_lock:
+        for seen, at in list(_empty_info.items()):
+            if now - at > EMPTY_INFO_WINDOW:
+                del _empty_info[seen]
+        _empty_info[symbol] = now
+        return len(_empty_info) >= EMPTY_INFO_THRESHOLD
+
+
+def _record_info(symbol: str) -> None:
+    """Remember that symbol exists because its info came back with data"""
+    with _empty_info_lock:
+        _info_symbols.add(symbol.upper())
+
+
+class _ErrorCollector(logging.Handler):
+    """Keeps the messages of the error records logged while it is attached"""
+
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.messages: List[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.messages.append(record.getMessage())
+        except Exception:
+            pass
+
+
+@contextmanager
+def _yfinance_errors() -> Iterator[List[str]]:
+    """
+    Collect the error messages yfinance logs inside a block
+
+    yf.download records per-symbol failures instead of raising them and
+    logs one line per distinct error listing the symbols it hit, e.g.
+    "['AAPL', 'MSFT']: YFRateLimitError(...)". Other threads may log at
+    the same time, so callers match messages against their own symbols.
+    """
+    logger = logging.getLogger("yfinance")
+    collector = _ErrorCollector()
+    logger.addHandler(collector)
+    try:
+        yield collector.messages
+    finally:
+        logger.removeHandler(collector)
+
+
+def quote_from_history(hist: "pd.DataFrame") -> Optional[Dict[str, Any]]:
+    """
+    Build a quote dict from the last two daily bars of a history frame
+
+    Bars carry neither the currency nor the market cap, so the quote has
+    neither rather than guessing; MarketDataProvider fills in the listed
+    currency.
+    """
+    if hist is None or hist.empty or 'Close' not in hist.columns:
+        return None
+
+    hist = hist.dropna(subset=['Close'])
+    if len(hist) < 2:
+        return None
+
+    current_price = hist['Close'].iloc[-1]
+    previous_price = hist['Close'].iloc[-2]
+
+    change = current_price - previous_price
+    change_percent = (change / previous_price) * 100 if previous_price != 0 else 0
+
+    return {
+        'price': current_price,
+        'change': change,
+        'change_percent': change_percent,
+        'volume': hist['Volume'].iloc[-1] if 'Volume' in hist.columns else 'N/A',
+        'previous_close': previous_price
+    }
+
+
+class MarketDataBackend:
+    """
+    Where quotes and bars come from
+
+    Backends only fetch; caching, coalescing and persistence stay in
+    MarketDataProvider. Quotes are dicts with at least price, change,
+    change_percent and volume. History frames have Open, High, Low, Close
+    and Volume columns on a DatetimeIndex.
+    """
+    name = "base"
+
+    def fetch_quote(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Fetch one quote, or None if the symbol has no data"""
+        raise NotImplementedError
+
+    def fetch_quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch quotes for many symbols, leaving out symbols without data"""
+        results = {}
+        for symbol in symbols:
+            data = self.fetch_quote(symbol)
+            if data:
+                results[symbol] = data
+        return results
+
+    def fetch_history(self, symbol: str, interval: str, period: Optional[str] = None,
+                      start: Optional[Any] = None) -> Optional["pd.DataFrame"]:
+        """Fetch bars for a yfinance period code or from a start time onwards"""
+        raise NotImplementedError
+
+
+class YFinanceBackend(MarketDataBackend):
+    """
+    The yfinance library, with batched downloads for many quotes
+
+    Every call takes a permit from its endpoint's rate limiter. Yahoo's
+    throttle signals (YFRateLimitError, and empty info for several symbols
+    in a row) raise ThrottledError so the limiter backs off, rather than
+    being retried through another endpoint.
+    """
+    name = "yfinance"
+
+    def __init__(self, transport: Optional[HttpTransport] = None):
+        # Pooled HTTP client for the chart endpoint fallback
+        self.transport = transport if transport is not None else get_shared_transport()
+
+    def fetch_quote(self, symbol: str) -> Optional[Dict[str, Any]]:
+        import yfinance as yf
+        from yfinance.exceptions import YFRateLimitError
+
+        ticker = yf.Ticker(symbol)
+
+        # Get current data; unknown symbols and throttled clients both get an empty info back
+        with get_rate_limiter(QUOTE_SUMMARY_ENDPOINT).permit():
+            try:
+                info = ticker.info
+            except YFRateLimitError as e:
+                raise ThrottledError(str(e)) from e
+            if not info or all(value is None for value in info.values()):
+                if _empty_info_burst(symbol):
+                    raise ThrottledError(f"Yahoo returned no info for {symbol} and other recent symbols")
+                info = {}
+            else:
+                _record_info(symbol)
+
+        if info and 'regularMarketPrice' in info:
+            current_price = info.get('regularMarketPrice', 0)
+            previous_close = info.get('previousClose', current_price)
+
+            # Calculate change
+            change = current_price - previous_close
+            change_percent = (change / previous_close) * 100 if previous_close != 0 else 0
+
+            return {
+                'price': current_price,
+                'change': change,
+                'change_percent': change_percent,
+                'volume': info.get('regularMarketVolume', 'N/A'),
+                'previous_close': previous_close,
+                'market_cap': info.get('marketCap', 'N/A'),
+                'currency': info.get('currency', 'USD')
+            }
+
+        # Fallback for listings whose info has no live price: the chart
+        # endpoint over the pooled transport
+        return fetch_chart_quote(symbol, self.transport)
+
+    def fetch_quotes(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch quotes for one chunk of symbols with a single batched download
+
+        A symbol counts as throttled when it is missing from the result
+        and the download raised or logged a rate limit error naming it.
+        Downloads are serialized process-wide, see _download_lock.
+        """
+        import pandas as pd
+        import yfinance as yf
+        from yfinance.exceptions import YFRateLimitError
+
+        # The download requests the chart endpoint once per symbol, over one
+        # connection per download thread, each taking a limiter slot
+        limiter = get_rate_limiter(CHART_ENDPOINT)
+        with _download_lock:
+            threads = max(1, min(len(symbols), limiter.stats()['concurrency']))
+            epoch = limiter.acquire(cost=len(symbols), slots=threads)
+            try:
+                with _yfinance_errors() as errors:
+                    frame = yf.download(
+                        tickers=symbols,
+                        period="5d",
+                        interval="1d",
+                        group_by="ticker",
+                        auto_adjust=False,
+                        progress=False,
+                        threads=threads
+                    )
+            except YFRateLimitError as e:
+                limiter.release(epoch, throttled=True, slots=threads)
+                raise ThrottledError(str(e)) from e
+            except BaseException:
+                limiter.release(epoch, succeeded=False, slots=threads)
+                raise
+
+        results = {}
+        for symbol in symbols:
+            try:
+                if isinstance(frame.columns, pd.MultiIndex):
+                    if symbol not in frame.columns.get_level_values(0):
+                        continue
+                    hist = frame[symbol]
+                else:
+                    hist = frame
+
+                data = quote_from_history(hist)
+                if data:
+                    results[symbol] = data
+            except Exception:
+                continue
+
+        rate_limited = [message for message in errors if _is_rate_limited(message)]
+        throttled = [symbol for symbol in symbols if symbol not in results
+                     and any(f"'{symbol.upper()}'" in message for message in rate_limited)]
+        limiter.release(epoch, throttled=bool(throttled), slots=threads)
+
+        # A fully throttled batch is an error, not a batch without data
+        if throttled and not results:
+            raise ThrottledError(f"Yahoo throttled the download of {', '.join(throttled)}")
+        return results
+
+    def fetch_history(self, symbol, interval, period=None, start=None):
+        import yfinance as yf
+        from yfinance.exceptions import YFRateLimitError
+
+        ticker = yf.Ticker(symbol)
+        with get_rate_limiter(CHART_ENDPOINT).permit():
+            try:
+                # Actions come back as Dividends and Stock Splits columns, so
+                # the provider can tell when stored adjusted bars went stale
+                if start is not None:
+                    return ticker.history(start=start, interval=interval, auto_adjust=True, actions=True)
+                return ticker.history(period=period, interval=interval, auto_adjust=True, actions=True)
+            except YFRateLimitError as e:
+                raise ThrottledError(str(e)) from e
+
+
+class ChartApiBackend(MarketDataBackend):
+    """
+    Yahoo's chart endpoint called directly over a pooled HTTP transport
+    """
+    name = "chart"
+
+    def __init__(self, transport: Optional[HttpTransport] = None, max_workers: int = 8):
+        self.transport = transport if transport is not None else get_shared_transport()
+        self.max_workers = max_workers
+
+    def fetch_quote(self, symbol):
+        return fetch_chart_quote(symbol, self.transport)
+
+    def fetch_quotes(self, symbols):
+        # The endpoint has no batch form, so fetch concurrently over the pool
+        results = {}
+        throttled = []
+        timed_out = None
+        for symbol, data, error in iter_completed(self.fetch_quote, symbols, self.max_workers, CHART_QUOTE_TIMEOUT):
+            if isinstance(error, ThrottledError):
+                throttled.append(symbol)
+            elif isinstance(error, PermitTimeoutError):
+                timed_out = error
+            elif error is None and data:
+                results[symbol] = data
+
+        # A fully throttled or unsent batch is an error, not a batch without data
+        if not results:
+            if throttled:
+                raise ThrottledError(f"Yahoo throttled the chart requests for {', '.join(throttled)}")
+            if timed_out is not None:
+                raise timed_out
+        return results
+
+    def fetch_history(self, symbol, interval, period=None, start=None):
+        return fetch_chart_history(symbol, interval, period=period, start=start, transport=self.transport)
+
+
+# Calendar days covered by each yfinance period code, for synthetic series;
+# intraday periods reach back over weekends like yfinance does
+PERIOD_DAYS = {
+    "1d": 4, "5d": 9, "1mo": 31, "3mo": 92, "6mo": 183,
+    "1y": 366, "2y": 731, "5y": 1827, "10y": 3653, "ytd": 366, "max": 3653
+}
+
+# Bar length in seconds for each interval code
+INTERVAL_SECONDS = {
+    "1m": 60, "2m": 120, "5m": 300, "15m": 900, "30m": 1800, "60m": 3600, "90m": 5400, "1h": 3600,
+    "1d": 86400, "5d": 5 * 86400, "1wk": 7 * 86400, "1mo": 30 * 86400
+}
+
+
+class ReplayBackend(MarketDataBackend):
+    """
+    Recorded or synthetic data served locally, with optional simulated latency
+
+    Quotes are read from root/quotes.json and bars from
+    root/history/<symbol>_<interval>.csv (symbol URL-quoted), as written by
+    record_quotes and record_history. Anything not recorded is synthesized
+    as a deterministic function of symbol and bar time, so repeated runs
+    and overlapping windows always see identical prices. Each call sleeps
+    latency seconds plus up to jitter seconds drawn from a seeded RNG.
+    """
+    name = "replay"
+
+    def __init__(self, root: Optional[str] = None, latency: float = 0.0, jitter: float = 0.0, seed: int = 0):
+        self.root = root
+        self.latency = latency
+        self.jitter = jitter
+        self.seed = seed
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._quotes = None
+
+    def _delay(self) -> None:
+        with self._rng_lock:
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _recorded_quotes(self) -> Dict[str, Dict[str, Any]]:
+        if self._quotes is None:
+            path = os.path.join(self.root, "quotes.json") if self.root else None
+            if path and os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    self._quotes = json.load(f)
+            else:
+                self._quotes = {}
+        return self._quotes
+
+    def _history_path(self, symbol: str, interval: str) -> Optional[str]:
+        if not self.root:
+            return None
+        return os.path.join(self.root, "history", f"{quote(symbol, safe='')}_{interval}.csv")
+
+    def _synthetic(self, symbol: str, interval: str, start: "pd.Timestamp", end: "pd.Timestamp") -> "pd.DataFrame":
+        """Weekday bars between start and end, priced by a hash of symbol and bar time"""
+        import numpy as np
+        import pandas as pd
+
+        step = INTERVAL_SECONDS.get(interval, 86400)
+        first = int(start.timestamp()) // step * step
+        times = np.arange(first, int(end.timestamp()) + 1, step, dtype=np.int64)
+
+        if step >= 86400:
+            # Daily and longer bars are labelled with the local midnight, as yfinance does
+            index = pd.to_datetime(times, unit='s').tz_localize("America/New_York")
+        else:
+            index = pd.to_datetime(times, unit='s', utc=True).tz_convert("America/New_York")
+        keep = index.weekday < 5
+        if step < 86400:
+            minutes = index.hour * 60 + index.minute
+            keep &= (minutes >= 9 * 60 + 30) & (minutes < 16 * 60)
+        times, index = times[keep], index[keep]
+
+        key = zlib.crc32(f"{symbol}|{self.seed}".encode())
+        base = 50 + key % 450
+
+        def noise(t: "np.ndarray", salt: int) -> "np.ndarray":
+            # Counter-based hash in [-0.5, 0.5), independent of the window
+            h = (t.astype(np.uint64) * np.uint64(2654435761) + np.uint64(key + salt)) % np.uint64(2 ** 32)
+            return h.astype(float) / 2 ** 32 - 0.5
+
+        def price(t: "np.ndarray") -> "np.ndarray":
+            years = t / (365.25 * 86400)
+            phase = key % 628 / 100
+            return base * np.exp(
+                0.15 * np.sin(2 * np.pi * years + phase) +
+                0.05 * np.sin(2 * np.pi * years * 12 + phase * 2) +
+                0.01 * noise(t, 0)
+            )
+
+        close = price(times)
+        open_ = price(times - step)
+        spread = np.abs(noise(times, 1)) * 0.01 + 0.001
+        return pd.DataFrame({
+            'Open': open_,
+            'High': np.maximum(open_, close) * (1 + spread),
+            'Low': np.minimum(open_, close) * (1 - spread),
+            'Close': close,
+            'Volume': np.rint(1e6 * (1 + noise(times, 2))).astype(float)
+        }, index=pd.DatetimeIndex(index, name='Date'))
+
+    def fetch_quote(self, symbol):
+        self._delay()
+        recorded = self._recorded_quotes().get(symbol)
+        if recorded is not None:
+            return dict(recorded)
+
+        import pandas as pd
+
+        now = pd.Timestamp.now(tz="UTC")
+        return quote_from_history(self._synthetic(symbol, "1d", now - pd.Timedelta(days=7), now))
+
+    def fetch_quotes(self, symbols):
+        # One simulated round trip for the whole batch, like a batched download
+        import pandas as pd
+
+        self._delay()
+        recorded = self._recorded_quotes()
+        now = pd.Timestamp.now(tz="UTC")
+        results = {}
+        for symbol in symbols:
+            data = recorded.get(symbol)
+            if data is None:
+                data = quote_from_history(self._synthetic(symbol, "1d", now - pd.Timedelta(days=7), now))
+            if data:
+                results[symbol] = dict(data)
+        return results
+
+    def fetch_history(self, symbol, interval, period=None, start=None):
+        import pandas as pd
+
+        self._delay()
+        now = pd.Timestamp.now(tz="UTC")
+        begin = pd.Timestamp(start) if start is not None else now - pd.Timedelta(days=PERIOD_DAYS.get(period, 31))
+        if begin.tzinfo is None:
+            begin = begin.tz_localize("UTC")
+
+        path = self._history_path(symbol, interval)
+        if path and os.path.exists(path):
+            hist = pd.read_csv(path, index_col='Date')
+            hist.index = pd.to_datetime(hist.index, utc=True)
+            return hist[hist.index >= begin]
+
+        return self._synthetic(symbol, interval, begin, now)
+
+    @staticmethod
+    def record_quotes(root: str, quotes: Dict[str, Dict[str, Any]]) -> None:
+        """Write quotes for a replay backend reading from root"""
+        os.makedirs(root, exist_ok=True)
+        with open(os.path.join(root, "quotes.json"), "w", encoding="utf-8") as f:
+            json.dump(quotes, f, indent=2, default=lambda value: value.item() if hasattr(value, "item") else str(value))
+
+    @staticmethod
+    def record_history(root: str, symbol: str, interval: str, hist: "pd.DataFrame") -> None:
+        """Write bars for a replay backend reading from root"""
+        directory = os.path.join(root, "history")
+        os.makedirs(directory, exist_ok=True)
+        hist = hist[['Open', 'High', 'Low', 'Close', 'Volume']].rename_axis('Date')
+        hist.to_csv(os.path.join(directory, f"{quote(symbol, safe='')}_{interval}.csv"))
+
+
+BACKENDS = {
+    YFinanceBackend.name: YFinanceBackend,
+    ChartApiBackend.name: ChartApiBackend,
+    ReplayBackend.name: ReplayBackend
+}
+
+
+def create_backend(name: Optional[str] = None, default: str = DEFAULT_BACKEND,
+                   transport: Optional[HttpTransport] = None) -> MarketDataBackend:
+    """
+    Create a backend by name
+
+    Without a name the MARKET_DATA_BACKEND environment variable decides,
+    then default. The replay backend reads its directory and latency from
+    MARKET_DATA_REPLAY_DIR and MARKET_DATA_REPLAY_LATENCY.
+    """
+    name = name or os.environ.get(BACKEND_ENV) or default
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown market data backend '{name}'; choose from {', '.join(BACKENDS)}")
+
+    if name == ReplayBackend.name:
+        return ReplayBackend(
+            root=os.environ.get(REPLAY_DIR_ENV),
+            latency=float(os.environ.get(REPLAY_LATENCY_ENV, 0) or 0)
+        )
+    return BACKENDS[name](transport=transport)
@@ -0,0 +1,149 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+import threading
+import time
+
+# Seconds an entry stays fresh, per data type
+DEFAULT_TTLS = {
+    "current": 60,    # Quotes
+    "history": 300    # Historical bars
+}
+
+# Seconds past the TTL during which an expired entry may still be served
+# while it is refreshed in the background (stale-while-revalidate)
+DEFAULT_STALE_GRACE = {
+    "current": 120,
+    "history": 900
+}
+
+# Entry states returned by TTLCache.lookup
+FRESH = "fresh"
+STALE = "stale"
+
+# Maximum number of entries held across all data types
+DEFAULT_MAX_SIZE = 2048
+
+
+class TTLCache:
+    """
+    A bounded, thread-safe cache with LRU eviction and a TTL per data type
+
+    Entries are keyed by (data_type, key). Once max_size entries are held,
+    storing a new one evicts the least recently used entry, so memory stays
+    flat no matter how many distinct symbols are requested.
+
+    Expired entries are kept for a further stale grace window so lookup()
+    can hand them out as STALE while the caller refreshes them.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE, ttls: Optional[Dict[str, float]] = None,
+                 default_ttl: float = 60, stale_grace: Optional[Dict[str, float]] = None):
+        self.max_size = max_size
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self.stale_grace = dict(DEFAULT_STALE_GRACE if stale_grace is None else stale_grace)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def ttl_for(self, data_type: str) -> float:
+        """Get the TTL in seconds for a data type"""
+        return self.ttls.get(data_type, self.default_ttl)
+
+    def grace_for(self, data_type: str) -> float:
+        """Get the stale grace window in seconds for a data type"""
+        return self.stale_grace.get(data_type, 0)
+
+    def lookup(self, key: Hashable, data_type: str = "current",
+               allow_stale: bool = True) -> Tuple[Optional[Any], Optional[str]]:
+        """
+        Get a value together with its state
+
+        Returns (value, FRESH) within the TTL, (value, STALE) within the
+        stale grace window after it, and (None, None) otherwise. With
+        allow_stale=False a stale entry counts as a miss.
+        """
+        cache_key = (data_type, key)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                self.misses += 1
+                return None, None
+
+            value, stored_at = entry
+            age = time.monotonic() - stored_at
+            ttl = self.ttl_for(data_type)
+
+            if age >= ttl + self.grace_for(data_type):
+                del self._entries[cache_key]
+                self.misses += 1
+                return None, None
+
+            if age >= ttl:
+                if not allow_stale:
+                    self.misses += 1
+                    return None, None
+                self._entries.move_to_end(cache_key)
+                self.stale_hits += 1
+                return value, STALE
+
+            self._entries.move_to_end(cache_key)
+            self.hits += 1
+            return value, FRESH
+
+    def get(self, key: Hashable, data_type: str = "current") -> Optional[Any]:
+        """Get a value if it is cached and still fresh"""
+        value, _ = self.lookup(key, data_type, allow_stale=False)
+        return value
+
+    def age(self, key: Hashable, data_type: str = "current") -> Optional[float]:
+        """Get the seconds since an entry was stored, or None if it is not cached; counts as no lookup"""
+        with self._lock:
+            entry = self._entries.get((data_type, key))
+            return None if entry is None else time.monotonic() - entry[1]
+
+    def set(self, key: Hashable, value: Any, data_type: str = "current") -> None:
+        """Store a value, evicting the least recently used entries if full"""
+        cache_key = (data_type, key)
+        with self._lock:
+            self._entries[cache_key] = (value, time.monotonic())
+            self._entries.move_to_end(cache_key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable, data_type: str = "current") -> None:
+        """Drop a single entry"""
+        with self._lock:
+            self._entries.pop((data_type, key), None)
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.stale_hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get size and hit/miss/eviction counters"""
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits + self.stale_hits) / lookups if lookups else 0.0
+            }
@@ -0,0 +1,264 @@
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+import os
+import threading
+import time
+from instrumentation import Sample, get_metrics
+
+# Highest request rate per endpoint, in requests per second; override with MARKET_RATE_LIMIT
+DEFAULT_MAX_RATE = float(os.environ.get("MARKET_RATE_LIMIT", 0) or 20.0)
+
+# Lowest rate a throttled endpoint backs off to
+MIN_RATE = 0.2
+
+# Requests an idle endpoint may send back to back: one full download chunk
+DEFAULT_BURST = 50
+
+# Concurrent requests per endpoint: where it starts and the most it grows to
+INITIAL_CONCURRENCY = 4
+MAX_CONCURRENCY = 16
+
+# Rate and concurrency gained per second of unthrottled traffic
+RATE_INCREASE = 0.5
+CONCURRENCY_INCREASE = 1.0
+
+# Factor applied to rate and concurrency on a throttle signal
+DECREASE_FACTOR = 0.5
+
+# Seconds a caller waits for a permit beyond the time its queue needs to drain
+DEFAULT_ACQUIRE_TIMEOUT = 10.0
+
+
+class ThrottledError(Exception):
+    """
+    Raised when upstream signals throttling
+
+    Callers should treat it like any other failed fetch rather than retry
+    elsewhere, since every retry adds to the load being throttled.
+    """
+
+
+class PermitTimeoutError(Exception):
+    """
+    Raised when no permit is free in time
+
+    This is local queueing, not an upstream signal: the limiter is left
+    as it is and nothing was sent.
+    """
+
+
+class AdaptiveLimiter:
+    """
+    A token bucket and an AIMD concurrency limit for one upstream endpoint
+
+    Each request takes a permit: a token from a bucket refilled at rate
+    per second, and one of the concurrent slots. Every unthrottled
+    request grows the rate by RATE_INCREASE / rate and the concurrency by
+    CONCURRENCY_INCREASE / concurrency, which adds about RATE_INCREASE
+    requests per second each second and one slot per full window. A
+    throttle signal halves both and empties the bucket.
+
+    Only one decrease happens per window: throttles from requests that
+    were admitted before the last decrease are ignored, so a burst of
+    429s from one overloaded moment backs off once instead of collapsing
+    to the minimum. The rate therefore oscillates just under the highest
+    rate upstream accepts instead of alternating between bursts and bans.
+
+    Requests may cost more than one token, for batched downloads that
+    fan out upstream; a costly request is let through once a token is
+    available and leaves the bucket in debt, so the average rate holds.
+    Requests that open several connections at once take as many slots;
+    one wider than the concurrency runs once nothing else is in flight.
+    Waiting callers are served first come, first served, and get as long
+    as the debt and the cost queued ahead of them take to pay off at the
+    current rate, plus acquire_timeout, so batches queue behind each other
+    instead of timing out.
+    """
+
+    def __init__(self, endpoint: str, max_rate: float = DEFAULT_MAX_RATE, burst: int = DEFAULT_BURST,
+                 min_rate: float = MIN_RATE, initial_concurrency: int = INITIAL_CONCURRENCY,
+                 max_concurrency: int = MAX_CONCURRENCY, acquire_timeout: float = DEFAULT_ACQUIRE_TIMEOUT):
+        self.endpoint = endpoint
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, max_rate)
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.acquire_timeout = acquire_timeout
+
+        self.rate = max_rate
+        self.concurrency = float(min(initial_concurrency, max_concurrency))
+        self.tokens = float(burst)
+        self.in_flight = 0
+        # Callers waiting in acquire(), in arrival order, and the tokens they want
+        self._waiters = deque()
+        self.queued = 0.0
+
+        # Bumped on every decrease; permits remember the epoch they were granted in
+        self._epoch = 0
+        self._refilled_at = time.monotonic()
+        self._changed = threading.Condition()
+
+        self.requests = 0
+        self.throttles = 0
+        self.decreases = 0
+        self.timeouts = 0
+        self.waited_seconds = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def acquire(self, cost: float = 1, timeout: Optional[float] = None, slots: int = 1) -> int:
+        """
+        Wait for a token and slots free slots, and return the permit's epoch
+
+        Raises PermitTimeoutError if none is free within timeout seconds;
+        by default that is acquire_timeout plus the time the bucket takes
+        to pay off its debt and the cost of the waiters ahead at the
+        current rate.
+        """
+        start = time.monotonic()
+        with self._changed:
+            self._refill(start)
+            if timeout is None:
+                backlog = max(0.0, 1 - self.tokens) + self.queued
+                timeout = self.acquire_timeout + backlog / self.rate
+            deadline = start + timeout
+
+            ticket = object()
+            self._waiters.append(ticket)
+            self.queued += cost
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    is_next = self._waiters[0] is ticket
+                    has_slot = self.in_flight == 0 or self.in_flight + slots <= int(self.concurrency)
+                    if is_next and has_slot and self.tokens >= 1:
+                        self.tokens -= cost
+                        self.in_flight += slots
+                        self.requests += 1
+                        self.waited_seconds += now - start
+                        return self._epoch
+
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self.waited_seconds += now - start
+                        self.timeouts += 1
+                        raise PermitTimeoutError(
+                            f"Waited {timeout:.1f}s for a local {self.endpoint} request permit")
+
+                    # Behind others or without a slot only a grant or release helps;
+                    # otherwise wait for the next token
+                    wait = remaining if not (is_next and has_slot) else min(remaining, (1 - self.tokens) / self.rate)
+                    self._changed.wait(wait)
+            finally:
+                self._waiters.remove(ticket)
+                self.queued -= cost
+                self._changed.notify_all()
+
+    def release(self, epoch: int, throttled: bool = False, succeeded: bool = True, slots: int = 1) -> None:
+        """
+        Return a permit and adapt to how its request went
+
+        slots must match what the permit was acquired with. throttled
+        backs off rate and concurrency unless a later permit already did;
+        succeeded grows them. A request that failed for another reason
+        leaves both as they are.
+        """
+        with self._changed:
+            self.in_flight -= slots
+            if throttled:
+                self.throttles += 1
+                if epoch == self._epoch:
+                    self._epoch += 1
+                    self.decreases += 1
+                    self._refill(time.monotonic())
+                    self.rate = max(self.min_rate, self.rate * DECREASE_FACTOR)
+                    self.concurrency = max(1.0, self.concurrency * DECREASE_FACTOR)
+                    self.tokens = min(self.tokens, 0.0)
+            elif succeeded:
+                self.rate = min(self.max_rate, self.rate + RATE_INCREASE / self.rate)
+                self.concurrency = min(self.max_concurrency, self.concurrency + CONCURRENCY_INCREASE / self.concurrency)
+            self._changed.notify_all()
+
+    @contextmanager
+    def permit(self, cost: float = 1, slots: int = 1) -> Iterator[None]:
+        """
+        Run a block as one rate-limited request
+
+        ThrottledError raised inside the block counts as a throttle
+        signal and is re-raised; other exceptions count as neither
+        success nor throttle.
+        """
+        epoch = self.acquire(cost, slots=slots)
+        try:
+            yield
+        except ThrottledError:
+            self.release(epoch, throttled=True, slots=slots)
+            raise
+        except BaseException:
+            self.release(epoch, succeeded=False, slots=slots)
+            raise
+        self.release(epoch, slots=slots)
+
+    def stats(self) -> Dict[str, float]:
+        """Current limits and counters"""
+        with self._changed:
+            return {
+                'rate': self.rate,
+                'concurrency': int(self.concurrency),
+                'in_flight': self.in_flight,
+                'requests': self.requests,
+                'throttles': self.throttles,
+                'decreases': self.decreases,
+                'timeouts': self.timeouts,
+                'waited_seconds': self.waited_seconds
+            }
+
+
+_limiters: Dict[str, AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def collect_metrics() -> List[Sample]:
+    """Limits and counters of every endpoint limiter as metric samples"""
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+
+    samples = []
+    for limiter in limiters:
+        stats = limiter.stats()
+        labels = {'endpoint': limiter.endpoint}
+        samples.extend([
+            ("market_rate_limit_rate", "gauge", "Requests per second an endpoint is currently allowed",
+             labels, stats['rate']),
+            ("market_rate_limit_concurrency", "gauge", "Concurrent requests an endpoint is currently allowed",
+             labels, stats['concurrency']),
+            ("market_rate_limit_in_flight", "gauge", "Requests holding a permit", labels, stats['in_flight']),
+            ("market_rate_limit_requests_total", "counter", "Permits granted", labels, stats['requests']),
+            ("market_rate_limit_throttles_total", "counter", "Upstream throttle signals", labels, stats['throttles']),
+            ("market_rate_limit_decreases_total", "counter", "Times rate and concurrency were cut",
+             labels, stats['decreases']),
+            ("market_rate_limit_timeouts_total", "counter", "Callers that gave up waiting for a permit",
+             labels, stats['timeouts']),
+            ("market_rate_limit_wait_seconds_total", "counter", "Time callers spent waiting for permits",
+             labels, stats['waited_seconds'])
+        ])
+    return samples
+
+
+def get_rate_limiter(endpoint: str) -> AdaptiveLimiter:
+    """
+    Get the process-wide limiter for an upstream endpoint, creating it on first use
+
+    Every backend and provider in the process shares it, since upstream
+    throttles by client address rather than by caller.
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(endpoint)
+        if limiter is None:
+            limiter = _limiters[endpoint] = AdaptiveLimiter(endpoint)
+            get_metrics().register_collector("rate_limiter", collect_metrics)
+        return limiter
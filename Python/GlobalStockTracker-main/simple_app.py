@@ -1,7 +1,18 @@
 import streamlit as st
-import yfinance as yf
+import pandas as pd
 from datetime import datetime
 import time
+from fetch_engine import iter_completed
+from utils import style_summary_frame
+from providers import create_backend
+from instrumentation import RerunProfile, start_metrics_server, track_upstream
+from diagnostics import diagnostics_enabled, render_diagnostics, save_profile
+
+# Seconds a single quote request may take before it is skipped
+QUOTE_TIMEOUT = 15
+
+# Time spent in each part of this script run
+profile = RerunProfile("simple_app")
 
 # Page configuration
 st.set_page_config(
@@ -30,33 +41,25 @@ def format_percentage(value):
     except:
         return 'N/A'
 
+# Quotes come from the yfinance backend unless MARKET_DATA_BACKEND picks another
+@st.cache_resource
+def get_quote_backend():
+    return create_backend(default="yfinance")
+
+quote_backend = get_quote_backend()
+
+# Serve /metrics on MARKET_METRICS_PORT when it is set
+start_metrics_server()
+
+def fetch_stock_data(symbol):
+    """Fetch current stock data, raising on failure"""
+    with track_upstream(quote_backend.name, "quote"):
+        return quote_backend.fetch_quote(symbol)
+
 def get_stock_data(symbol):
     """Get current stock data"""
     try:
-        ticker = yf.Ticker(symbol)
-        info = ticker.info
-        
-        if 'regularMarketPrice' in info:
-            current_price = info.get('regularMarketPrice', 0)
-            previous_close = info.get('previousClose', current_price)
-        else:
-            # Fallback to historical data
-            hist = ticker.history(period="2d")
-            if not hist.empty and len(hist) >= 2:
-                current_price = hist['Close'].iloc[-1]
-                previous_close = hist['Close'].iloc[-2]
-            else:
-                return None
-        
-        change = current_price - previous_close
-        change_percent = (change / previous_close) * 100 if previous_close != 0 else 0
-        
-        return {
-            'price': current_price,
-            'change': change,
-            'change_percent': change_percent,
-            'volume': info.get('regularMarketVolume', 'N/A')
-        }
+        return fetch_stock_data(symbol)
     except Exception as e:
         st.error(f"Error fetching data for {symbol}: {str(e)}")
         return None
@@ -105,8 +108,12 @@ st.markdown("Real-time market data and interactive charts")
 # Last update time
 last_update_placeholder = st.empty()
 
-# Create tabs
-tab1, tab2 = st.tabs(["📊 Market Overview", "🔍 Stock Search"])
+# Create tabs; the diagnostics tab only appears with ?diagnostics=1
+tab_names = ["📊 Market Overview", "🔍 Stock Search"]
+show_diagnostics = diagnostics_enabled()
+if show_diagnostics:
+    tab_names.append("🩺 Diagnostics")
+tab1, tab2, *diagnostics_tab = st.tabs(tab_names)
 
 with tab1:
     st.header("Major Global Indices")
@@ -116,24 +123,35 @@ with tab1:
         progress_bar = st.progress(0)
         status_text = st.empty()
         
-        # Fetch data for selected indices
-        indices_data = []
-        for i, index_name in enumerate(selected_indices):
-            symbol = available_indices[index_name]
-            status_text.text(f"Loading {index_name}...")
-            
-            data = get_stock_data(symbol)
-            if data:
-                indices_data.append({
-                    'Index': index_name,
-                    'Symbol': symbol,
-                    'Price': data['price'],
-                    'Change': data['change'],
-                    'Change %': data['change_percent'],
-                    'Volume': data.get('volume', 'N/A')
-                })
-            
-            progress_bar.progress((i + 1) / len(selected_indices))
+        # Fetch all selected indices concurrently; progress advances as each one lands
+        symbol_names = {available_indices[index_name]: index_name for index_name in selected_indices}
+        quotes = {}
+        
+        with profile.section("fetch"):
+            for i, (symbol, data, error) in enumerate(iter_completed(fetch_stock_data, list(symbol_names), timeout=QUOTE_TIMEOUT)):
+                if error is not None:
+                    st.error(f"Error fetching data for {symbol}: {str(error)}")
+                elif data:
+                    quotes[symbol] = data
+                
+                progress_bar.progress((i + 1) / len(symbol_names))
+                status_text.text(f"Loaded {symbol_names[symbol]} ({i + 1}/{len(symbol_names)})")
+        
+        # Keep the display order of the sidebar selection
+        with profile.section("frames"):
+            indices_data = []
+            for index_name in selected_indices:
+                symbol = available_indices[index_name]
+                data = quotes.get(symbol)
+                if data:
+                    indices_data.append({
+                        'Index': index_name,
+                        'Symbol': symbol,
+                        'Price': data['price'],
+                        'Change': data['change'],
+                        'Change %': data['change_percent'],
+                        'Volume': data.get('volume', 'N/A')
+                    })
         
         progress_bar.empty()
         status_text.empty()
@@ -155,18 +173,12 @@ with tab1:
             # Create summary table
             st.subheader("Summary Table")
             
-            # Format the data for display
-            table_data = []
-            for data in indices_data:
-                table_data.append([
-                    data['Index'],
-                    format_currency(data['Price']),
-                    format_currency(data['Change']),
-                    format_percentage(data['Change %'])
-                ])
+            # Format whole columns at once and display as one table
+            with profile.section("frames"):
+                df = pd.DataFrame(indices_data)
+                summary_table = style_summary_frame(df[['Index', 'Price', 'Change', 'Change %']])
             
-            # Display as a simple table
-            st.table(table_data)
+            st.dataframe(summary_table, use_container_width=True, hide_index=True)
     
     else:
         st.info("Please select at least one index from the sidebar to display market data.")
@@ -175,7 +187,7 @@ with tab2:
     st.header("Stock Search")
     
     if search_symbol:
-        with st.spinner(f"Searching for {search_symbol.upper()}..."):
+        with st.spinner(f"Searching for {search_symbol.upper()}..."), profile.section("fetch"):
             stock_data = get_stock_data(search_symbol.upper())
             
         if stock_data:
@@ -210,6 +222,13 @@ with tab2:
                 st.session_state.search_symbol = stock
                 st.rerun()
 
+if show_diagnostics:
+    with diagnostics_tab[0]:
+        render_diagnostics(profile)
+
+# The auto-refresh check below may rerun the script, so record this run first
+save_profile("simple_app", profile)
+
 # Auto-refresh functionality
 if auto_refresh:
     last_update_placeholder.info(f"Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} | Auto-refresh: {refresh_interval}s")
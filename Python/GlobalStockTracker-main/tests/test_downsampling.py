@@ -0,0 +1,53 @@
+"""
+downsample_ohlc bucket merging and labelling
+"""
+import numpy as np
+import pandas as pd
+from downsampling import downsample_ohlc
+
+
+def _bars(n: int) -> pd.DataFrame:
+    close = np.arange(n, dtype=float) + 100
+    return pd.DataFrame({
+        'Open': close - 0.5,
+        'High': close + 1,
+        'Low': close - 1,
+        'Close': close,
+        'Volume': np.full(n, 10.0)
+    }, index=pd.date_range("2026-01-05", periods=n, freq="D", name="Date"))
+
+
+def test_short_series_is_returned_unchanged():
+    hist = _bars(5)
+
+    merged, positions = downsample_ohlc(hist, 5)
+
+    assert merged is hist
+    assert positions.tolist() == [0, 1, 2, 3, 4]
+
+
+def test_buckets_keep_the_true_range_and_total_volume():
+    hist = _bars(6)
+    hist.loc[hist.index[1], 'High'] = 500.0
+    hist.loc[hist.index[4], 'Low'] = 1.0
+
+    merged, positions = downsample_ohlc(hist, 2)
+
+    assert positions.tolist() == [2, 5]
+    assert merged['Open'].tolist() == [99.5, 102.5]
+    assert merged['High'].tolist() == [500.0, 106.0]
+    assert merged['Low'].tolist() == [99.0, 1.0]
+    assert merged['Close'].tolist() == [102.0, 105.0]
+    assert merged['Volume'].tolist() == [30.0, 30.0]
+
+
+def test_buckets_are_labelled_with_the_row_of_their_close():
+    hist = _bars(7)
+
+    merged, positions = downsample_ohlc(hist, 3)
+
+    # Buckets of 3 with a short last one
+    assert positions.tolist() == [2, 5, 6]
+    assert merged.index.equals(hist.index[[2, 5, 6]])
+    assert merged['Close'].tolist() == hist['Close'].iloc[[2, 5, 6]].tolist()
+    assert merged['Volume'].tolist() == [30.0, 30.0, 10.0]
@@ -0,0 +1,121 @@
+"""
+SingleFlight.do_many coalescing, failures and abandoned calls
+
+A leader is held inside its call with an Event, so other callers are
+known to arrive while the key is in flight.
+"""
+import threading
+import pytest
+from fetch_engine import FetchTimeoutError, SingleFlight
+
+
+class _HeldCall:
+    """Runs do_many on a thread and blocks inside the batch call until released"""
+
+    def __init__(self, flight: SingleFlight, keys, values=None, error=None):
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.result = None
+        self.error = None
+        self.calls = []
+
+        def fn(owned):
+            self.calls.append(list(owned))
+            self.entered.set()
+            self.release.wait(5)
+            if error is not None:
+                raise error
+            return values if values is not None else {key: key.lower() for key in owned}
+
+        def run():
+            try:
+                self.result = flight.do_many(keys, fn)
+            except BaseException as e:
+                self.error = e
+
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
+        assert self.entered.wait(5)
+
+    def finish(self) -> None:
+        self.release.set()
+        self.thread.join(5)
+
+
+def test_free_keys_are_fetched_in_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    def fn(owned):
+        calls.append(owned)
+        return {"AAPL": 1}
+
+    assert flight.do_many(["AAPL", "MSFT", "AAPL"], fn) == {"AAPL": 1, "MSFT": None}
+    assert calls == [["AAPL", "MSFT"]]
+    assert flight.in_flight() == 0
+
+
+def test_keys_in_flight_are_waited_on_instead_of_fetched_again():
+    flight = SingleFlight()
+    leader = _HeldCall(flight, ["AAPL", "MSFT"])
+    claimed = threading.Event()
+    calls = []
+    results = []
+
+    def fn(owned):
+        # Keys are claimed or joined before the batch call starts
+        calls.append(owned)
+        claimed.set()
+        return {key: key for key in owned}
+
+    waiter = threading.Thread(target=lambda: results.append(flight.do_many(["MSFT", "NVDA"], fn)))
+    waiter.start()
+    assert claimed.wait(5)
+    leader.finish()
+    waiter.join(5)
+
+    assert leader.result == {"AAPL": "aapl", "MSFT": "msft"}
+    assert calls == [["NVDA"]]
+    assert results == [{"NVDA": "NVDA", "MSFT": "msft"}]
+    assert leader.calls == [["AAPL", "MSFT"]]
+
+
+def test_failure_is_raised_to_the_caller_and_none_to_waiters():
+    flight = SingleFlight()
+    leader = _HeldCall(flight, ["AAPL"], error=RuntimeError("upstream down"))
+    results = []
+
+    waiter = threading.Thread(target=lambda: results.append(flight.do_many(["AAPL"], lambda owned: {})))
+    waiter.start()
+    leader.finish()
+    waiter.join(5)
+
+    assert isinstance(leader.error, RuntimeError)
+    assert results == [{"AAPL": None}]
+    assert flight.in_flight() == 0
+
+
+def test_call_past_its_timeout_is_abandoned_and_its_keys_freed():
+    flight = SingleFlight(timeout=0.2)
+    leader = _HeldCall(flight, ["AAPL"])
+
+    # The waiter gives up at the deadline instead of waiting for the leader
+    assert flight.do_many(["AAPL"], lambda owned: {"AAPL": "waiter"}) == {"AAPL": None}
+    assert flight.in_flight() == 0
+
+    # The next caller runs its own call while the abandoned one is still going
+    assert flight.do_many(["AAPL"], lambda owned: {"AAPL": "retry"}) == {"AAPL": "retry"}
+
+    leader.finish()
+    assert leader.result == {"AAPL": "aapl"}
+    assert flight.in_flight() == 0
+
+
+def test_do_raises_when_the_joined_call_times_out():
+    flight = SingleFlight(timeout=0.2)
+    leader = _HeldCall(flight, ["AAPL"])
+
+    with pytest.raises(FetchTimeoutError):
+        flight.do("AAPL", lambda: "never runs")
+
+    leader.finish()
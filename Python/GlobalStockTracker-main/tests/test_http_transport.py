@@ -0,0 +1,162 @@
+"""
+HttpTransport against a local stub server
+
+Each path is given a script of (status, headers, body) responses that
+the server plays back in order, repeating the last one, and counts how
+many requests it received.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Tuple
+import socket
+import threading
+import time
+import pytest
+from http_transport import HttpTransport, ResponseTooLargeError, TransportError
+
+Reply = Tuple[int, Dict[str, str], bytes]
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            script = server.scripts.get(self.path, [(404, {}, b"")])
+            count = server.counts.get(self.path, 0)
+            server.counts[self.path] = count + 1
+        status, headers, body = script[min(count, len(script) - 1)]
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if "Content-Length" not in headers:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _StubHandler)
+        self.lock = threading.Lock()
+        self.scripts: Dict[str, List[Reply]] = {}
+        self.counts: Dict[str, int] = {}
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}{path}"
+
+
+@pytest.fixture
+def server():
+    stub = _StubServer()
+    thread = threading.Thread(target=stub.serve_forever, daemon=True)
+    thread.start()
+    yield stub
+    stub.shutdown()
+    stub.server_close()
+
+
+@pytest.fixture
+def transport():
+    client = HttpTransport(max_retries=3, backoff_base=0.01, backoff_max=0.05, timeout=5)
+    yield client
+    client.close()
+
+
+def test_retries_server_errors_until_success(server, transport):
+    server.scripts["/flaky"] = [(503, {}, b""), (502, {}, b""), (200, {}, b'{"ok": true}')]
+
+    response = transport.get(server.url("/flaky"))
+
+    assert response.status_code == 200
+    assert response.json() == {"ok": True}
+    assert response.attempts == 3
+    assert server.counts["/flaky"] == 3
+
+
+def test_returns_last_server_error_after_max_retries(server, transport):
+    server.scripts["/down"] = [(500, {}, b"")]
+
+    response = transport.get(server.url("/down"))
+
+    assert response.status_code == 500
+    assert response.attempts == transport.max_retries + 1
+    assert server.counts["/down"] == transport.max_retries + 1
+
+
+def test_retry_after_is_honoured_beyond_backoff_max(server, transport):
+    server.scripts["/busy"] = [(503, {"Retry-After": "1"}, b""), (200, {}, b"{}")]
+
+    start = time.monotonic()
+    response = transport.get(server.url("/busy"))
+    elapsed = time.monotonic() - start
+
+    assert response.status_code == 200
+    assert response.attempts == 2
+    assert elapsed >= 1.0 > transport.backoff_max
+
+
+def test_retry_after_over_limit_is_returned_without_waiting(server, transport):
+    transport.retry_after_max = 5
+    server.scripts["/maintenance"] = [(503, {"Retry-After": "3600"}, b""), (200, {}, b"{}")]
+
+    start = time.monotonic()
+    response = transport.get(server.url("/maintenance"))
+
+    assert response.status_code == 503
+    assert response.attempts == 1
+    assert time.monotonic() - start < 1.0
+    assert server.counts["/maintenance"] == 1
+
+
+def test_throttled_response_is_passed_through_without_retry(server, transport):
+    server.scripts["/throttled"] = [(429, {"Retry-After": "0"}, b"slow down"), (200, {}, b"{}")]
+
+    response = transport.get(server.url("/throttled"))
+
+    assert response.status_code == 429
+    assert response.content == b"slow down"
+    assert response.attempts == 1
+    assert server.counts["/throttled"] == 1
+
+
+def test_declared_length_over_limit_is_refused(server):
+    client = HttpTransport(max_response_bytes=1024)
+    server.scripts["/large"] = [(200, {}, b"x" * 2048)]
+
+    with pytest.raises(ResponseTooLargeError):
+        client.get(server.url("/large"))
+    assert server.counts["/large"] == 1
+    client.close()
+
+
+def test_undeclared_body_over_limit_is_refused_while_streaming(server):
+    client = HttpTransport(max_response_bytes=1024)
+    # Without a usable Content-Length the limit is enforced on the bytes read
+    server.scripts["/stream"] = [(200, {"Content-Length": "", "Connection": "close"}, b"x" * 200_000)]
+
+    with pytest.raises(ResponseTooLargeError):
+        client.get(server.url("/stream"))
+    client.close()
+
+
+def test_connection_failures_raise_after_max_retries(transport):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    with pytest.raises(TransportError):
+        transport.get(f"http://127.0.0.1:{port}/")
+
+
+def test_get_json_rejects_non_200(server, transport):
+    server.scripts["/missing"] = [(404, {}, b'{"error": "no"}')]
+
+    with pytest.raises(TransportError):
+        transport.get_json(server.url("/missing"))
@@ -0,0 +1,76 @@
+"""
+Symbol to exchange mapping and session states at fixed local times
+"""
+from datetime import datetime
+import pytest
+import pytz
+from market_calendar import (
+    BREAK, CLOSED, OPEN, POST, PRE, UNKNOWN, calendar_for_symbol, exchange_for_symbol, get_calendar
+)
+
+
+def _ts(timezone: str, *local) -> float:
+    return pytz.timezone(timezone).localize(datetime(*local)).timestamp()
+
+
+@pytest.mark.parametrize("symbol, code", [
+    ("AAPL", "XNYS"),
+    ("BRK-B", "XNYS"),
+    ("^GSPC", "XNYS"),
+    ("^FTSE", "XLON"),
+    ("000001.SS", "XSHG"),
+    ("HSBA.L", "XLON"),
+    ("SAP.DE", "XETR"),
+    ("ASML.AS", "XPAR"),
+    ("RY.TO", "XTSE"),
+    ("NESN.SW", "XSWX"),
+    ("7203.T", "XTKS"),
+    ("0700.HK", "XHKG"),
+    ("bhp.ax", "XASX"),
+])
+def test_listed_symbols_map_to_their_exchange(symbol, code):
+    assert exchange_for_symbol(symbol) == code
+
+
+@pytest.mark.parametrize("symbol", [
+    "^XYZ", "BTC-USD", "ETH-USD", "EURUSD=X", "GC=F", "CL=F", "005930.KS", "RELIANCE.NS"
+])
+def test_symbols_without_a_known_calendar_map_to_none(symbol):
+    assert exchange_for_symbol(symbol) is None
+    assert calendar_for_symbol(symbol) is None
+
+
+@pytest.mark.parametrize("local, state", [
+    ((2026, 10, 13, 11, 0), OPEN),
+    ((2026, 10, 13, 8, 0), PRE),
+    ((2026, 10, 13, 17, 0), POST),
+    ((2026, 10, 13, 21, 0), CLOSED),
+    ((2026, 12, 25, 11, 0), CLOSED),     # Christmas
+    ((2026, 11, 27, 14, 0), POST),       # Half day after Thanksgiving
+])
+def test_nyse_session_states(local, state):
+    assert get_calendar("XNYS").state(_ts("America/New_York", *local)) == state
+
+
+def test_indices_only_follow_the_regular_session():
+    pre_market = _ts("America/New_York", 2026, 10, 13, 8, 0)
+
+    assert calendar_for_symbol("AAPL").state(pre_market) == PRE
+    assert calendar_for_symbol("^GSPC").state(pre_market) == CLOSED
+
+
+def test_lunch_break_between_sessions():
+    assert get_calendar("XHKG").state(_ts("Asia/Hong_Kong", 2026, 10, 13, 12, 30)) == BREAK
+
+
+def test_years_without_known_lunar_holidays_are_unknown():
+    shanghai = get_calendar("XSHG")
+
+    assert shanghai.state(_ts("Asia/Shanghai", 2026, 10, 6, 10, 0)) == CLOSED
+    assert shanghai.state(_ts("Asia/Shanghai", 2027, 3, 9, 10, 0)) == UNKNOWN
+
+
+def test_next_open_skips_holidays_and_weekends():
+    christmas_eve = _ts("America/New_York", 2026, 12, 24, 14, 0)
+
+    assert get_calendar("XNYS").next_open(christmas_eve) == datetime(2026, 12, 28, 14, 30, tzinfo=pytz.utc)
@@ -0,0 +1,88 @@
+"""
+TTLCache.lookup states and counters against a controlled clock
+"""
+from types import SimpleNamespace
+import pytest
+import quote_cache
+from quote_cache import FRESH, STALE, TTLCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = _Clock()
+    monkeypatch.setattr(quote_cache, "time", SimpleNamespace(monotonic=fake.monotonic))
+    return fake
+
+
+@pytest.fixture
+def cache(clock):
+    return TTLCache(max_size=3, ttls={"current": 60}, stale_grace={"current": 120})
+
+
+def test_entry_is_fresh_within_ttl(cache, clock):
+    cache.set("AAPL", {"price": 1})
+    clock.advance(59)
+
+    assert cache.lookup("AAPL") == ({"price": 1}, FRESH)
+    assert cache.stats()["hits"] == 1
+
+
+def test_entry_is_stale_within_grace(cache, clock):
+    cache.set("AAPL", 1)
+    clock.advance(60)
+
+    assert cache.lookup("AAPL") == (1, STALE)
+    assert cache.stats()["stale_hits"] == 1
+
+
+def test_stale_entry_is_a_miss_when_stale_is_not_allowed(cache, clock):
+    cache.set("AAPL", 1)
+    clock.advance(90)
+
+    assert cache.lookup("AAPL", allow_stale=False) == (None, None)
+    assert cache.get("AAPL") is None
+    # The entry is kept for callers that accept stale values
+    assert cache.lookup("AAPL") == (1, STALE)
+
+
+def test_entry_past_grace_is_dropped(cache, clock):
+    cache.set("AAPL", 1)
+    clock.advance(180)
+
+    assert cache.lookup("AAPL") == (None, None)
+    assert len(cache) == 0
+    assert cache.stats()["misses"] == 1
+
+
+def test_data_types_are_separate_entries_with_their_own_ttl(cache, clock):
+    cache.set("AAPL", "quote")
+    cache.set("AAPL", "bars", data_type="history")
+    clock.advance(30)
+
+    assert cache.lookup("AAPL") == ("quote", FRESH)
+    # No TTL configured for history: the default applies, with no grace
+    assert cache.lookup("AAPL", data_type="history") == ("bars", FRESH)
+    clock.advance(30)
+    assert cache.lookup("AAPL", data_type="history") == (None, None)
+
+
+def test_lookup_keeps_entries_from_eviction(cache):
+    for symbol in ("A", "B", "C"):
+        cache.set(symbol, symbol)
+    cache.lookup("A")
+    cache.set("D", "D")
+
+    assert cache.lookup("A") == ("A", FRESH)
+    assert cache.lookup("B") == (None, None)
+    assert cache.stats()["evictions"] == 1
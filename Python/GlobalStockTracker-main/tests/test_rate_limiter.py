@@ -0,0 +1,107 @@
+"""
+AdaptiveLimiter grants, backoff and slot accounting
+
+Limiters are built with a full bucket so only slots and the adaptive
+limits decide whether a permit is granted.
+"""
+import threading
+import pytest
+from rate_limiter import (
+    DECREASE_FACTOR, AdaptiveLimiter, PermitTimeoutError, ThrottledError
+)
+
+
+@pytest.fixture
+def limiter():
+    return AdaptiveLimiter("test", max_rate=100.0, burst=100, initial_concurrency=2, max_concurrency=4,
+                           acquire_timeout=0.1)
+
+
+def test_success_grows_concurrency_up_to_the_maximum(limiter):
+    for _ in range(20):
+        with limiter.permit():
+            pass
+
+    stats = limiter.stats()
+    assert stats["concurrency"] == 4
+    assert stats["requests"] == 20
+    assert stats["in_flight"] == 0
+
+
+def test_throttle_halves_rate_and_concurrency_once_per_window(limiter):
+    first = limiter.acquire()
+    second = limiter.acquire()
+
+    limiter.release(first, throttled=True)
+    # Admitted before the decrease, so it does not back off again
+    limiter.release(second, throttled=True)
+
+    stats = limiter.stats()
+    assert stats["rate"] == pytest.approx(100.0 * DECREASE_FACTOR)
+    assert stats["concurrency"] == 1
+    assert stats["throttles"] == 2
+    assert stats["decreases"] == 1
+
+
+def test_throttled_error_in_a_permit_counts_as_a_throttle(limiter):
+    with pytest.raises(ThrottledError):
+        with limiter.permit():
+            raise ThrottledError("429")
+
+    assert limiter.stats()["decreases"] == 1
+
+
+def test_other_errors_leave_the_limits_alone(limiter):
+    with pytest.raises(ValueError):
+        with limiter.permit():
+            raise ValueError("bad payload")
+
+    stats = limiter.stats()
+    assert stats["rate"] == 100.0
+    assert stats["concurrency"] == 2
+    assert stats["in_flight"] == 0
+
+
+def test_acquire_times_out_without_a_free_slot(limiter):
+    held = [limiter.acquire(), limiter.acquire()]
+
+    with pytest.raises(PermitTimeoutError):
+        limiter.acquire(timeout=0.05)
+    assert limiter.stats()["timeouts"] == 1
+
+    for epoch in held:
+        limiter.release(epoch)
+
+
+def test_released_slot_is_handed_to_a_waiter(limiter):
+    held = [limiter.acquire(), limiter.acquire()]
+    granted = []
+
+    waiter = threading.Thread(target=lambda: granted.append(limiter.acquire(timeout=5)))
+    waiter.start()
+    limiter.release(held.pop())
+    waiter.join(5)
+
+    assert len(granted) == 1
+    assert limiter.stats()["in_flight"] == 2
+
+
+def test_permits_take_their_slots(limiter):
+    epoch = limiter.acquire(slots=2)
+
+    with pytest.raises(PermitTimeoutError):
+        limiter.acquire(timeout=0.05)
+
+    limiter.release(epoch, slots=2)
+    assert limiter.stats()["in_flight"] == 0
+
+
+def test_permit_wider_than_the_concurrency_runs_alone(limiter):
+    single = limiter.acquire()
+    with pytest.raises(PermitTimeoutError):
+        limiter.acquire(slots=8, timeout=0.05)
+    limiter.release(single)
+
+    with limiter.permit(slots=8):
+        assert limiter.stats()["in_flight"] == 8
+    assert limiter.stats()["in_flight"] == 0
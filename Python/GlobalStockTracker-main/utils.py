@@ -1,6 +1,11 @@
-from datetime import datetime
-import pytz
-from typing import Dict, Any
+import warnings
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, Optional, Union
+from market_calendar import EXCHANGES, OPEN, PRE, POST, BREAK, CLOSED, UNKNOWN, calendar_for_symbol, exchange_for_symbol
+
+# Trading periods per year used to annualize the Sharpe ratio
+TRADING_DAYS_PER_YEAR = 252
 
 def format_currency(value: float, currency: str = "USD") -> str:
     """
@@ -51,41 +56,29 @@ def get_color_for_change(change: float) -> str:
     except (TypeError, ValueError):
         return "gray"
 
+# Display names for calendar session states
+MARKET_STATUS_LABELS = {
+    OPEN: "Open",
+    PRE: "Pre-Market",
+    POST: "After Hours",
+    BREAK: "Lunch Break",
+    CLOSED: "Closed",
+    UNKNOWN: "Unknown"
+}
+
 def get_market_status(symbol: str) -> str:
     """
     Get market status based on symbol and current time
-    This is a simplified version. In reality, you'd need more complex logic
-    to handle different market hours for different exchanges.
+    
+    Uses the exchange calendar, so holidays, half days, lunch breaks and
+    US extended hours are reported correctly whatever the server's timezone.
     """
     try:
-        now = datetime.now()
-        current_hour = now.hour
-        
-        # Simplified market hours (US Eastern Time basis)
-        # This is a basic implementation
-        market_hours = {
-            '^GSPC': (9, 16),  # S&P 500 (US)
-            '^IXIC': (9, 16),  # NASDAQ (US)
-            '^DJI': (9, 16),   # Dow Jones (US)
-            '^FTSE': (8, 16),  # FTSE (UK)
-            '^N225': (9, 15),  # Nikkei (Japan)
-            '^GDAXI': (9, 17), # DAX (Germany)
-            '^FCHI': (9, 17),  # CAC 40 (France)
-            '^HSI': (9, 16),   # Hang Seng (Hong Kong)
-            '000001.SS': (9, 15), # Shanghai
-            '^AXJO': (10, 16)  # ASX (Australia)
-        }
+        calendar = calendar_for_symbol(symbol)
+        if calendar is None:
+            return "Unknown"
         
-        if symbol in market_hours:
-            open_hour, close_hour = market_hours[symbol]
-            
-            # Simple check - this would need timezone handling in reality
-            if open_hour <= current_hour < close_hour:
-                return "Open"
-            else:
-                return "Closed"
-        
-        return "Unknown"
+        return MARKET_STATUS_LABELS[calendar.state()]
         
     except Exception:
         return "Unknown"
@@ -94,58 +87,16 @@ def get_timezone_for_market(symbol: str) -> str:
     """
     Get timezone for different markets
     """
-    market_timezones = {
-        '^GSPC': 'US/Eastern',     # S&P 500
-        '^IXIC': 'US/Eastern',     # NASDAQ
-        '^DJI': 'US/Eastern',      # Dow Jones
-        '^FTSE': 'Europe/London',  # FTSE 100
-        '^N225': 'Asia/Tokyo',     # Nikkei 225
-        '^GDAXI': 'Europe/Berlin', # DAX
-        '^FCHI': 'Europe/Paris',   # CAC 40
-        '^HSI': 'Asia/Hong_Kong',  # Hang Seng
-        '000001.SS': 'Asia/Shanghai', # Shanghai Composite  
-        '^AXJO': 'Australia/Sydney'   # ASX 200
-    }
-    
-    return market_timezones.get(symbol, 'UTC')
+    code = exchange_for_symbol(symbol)
+    return EXCHANGES[code].timezone if code else 'UTC'
 
 def is_market_open(symbol: str) -> bool:
     """
-    Check if a specific market is currently open
+    Check if a specific market is currently in its regular session
     """
     try:
-        market_timezone = get_timezone_for_market(symbol)
-        tz = pytz.timezone(market_timezone)
-        local_time = datetime.now(tz)
-        
-        # Get current day of week (0 = Monday, 6 = Sunday)
-        weekday = local_time.weekday()
-        
-        # Skip weekends
-        if weekday >= 5:  # Saturday = 5, Sunday = 6
-            return False
-        
-        current_hour = local_time.hour
-        
-        # Market hours by exchange
-        market_hours = {
-            '^GSPC': (9, 16),      # NYSE: 9:30 AM - 4:00 PM ET
-            '^IXIC': (9, 16),      # NASDAQ: 9:30 AM - 4:00 PM ET  
-            '^DJI': (9, 16),       # NYSE: 9:30 AM - 4:00 PM ET
-            '^FTSE': (8, 16),      # LSE: 8:00 AM - 4:30 PM GMT
-            '^N225': (9, 15),      # TSE: 9:00 AM - 3:00 PM JST
-            '^GDAXI': (9, 17),     # XETRA: 9:00 AM - 5:30 PM CET
-            '^FCHI': (9, 17),      # Euronext: 9:00 AM - 5:30 PM CET
-            '^HSI': (9, 16),       # HKEX: 9:30 AM - 4:00 PM HKT
-            '000001.SS': (9, 15),  # SSE: 9:30 AM - 3:00 PM CST
-            '^AXJO': (10, 16)      # ASX: 10:00 AM - 4:00 PM AEST
-        }
-        
-        if symbol in market_hours:
-            open_hour, close_hour = market_hours[symbol]
-            return open_hour <= current_hour < close_hour
-        
-        return False
+        calendar = calendar_for_symbol(symbol)
+        return calendar is not None and calendar.is_open()
         
     except Exception:
         return False
@@ -172,6 +123,118 @@ def format_volume(volume) -> str:
     except (TypeError, ValueError):
         return 'N/A'
 
+def _as_float_array(values) -> np.ndarray:
+    """Convert a column to floats, with NaN for None, 'N/A' and other non-numbers"""
+    return pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=float)
+
+def _format_masked(result: np.ndarray, mask: np.ndarray, fmt: str, values: np.ndarray) -> None:
+    """Printf-format only the values selected by mask into result"""
+    if mask.any():
+        result[mask] = np.char.mod(fmt, values[mask])
+
+def format_currency_array(values) -> np.ndarray:
+    """
+    Vectorized format_currency for a whole column
+    
+    Uses T/B/M suffixes from one million up and a thousands separator
+    below that. Missing or non-numeric values become 'N/A'. Each value is
+    formatted once, by the branch its magnitude selects.
+    """
+    values = _as_float_array(values)
+    magnitude = np.abs(values)
+    result = np.full(len(values), 'N/A', dtype=object)
+    
+    # Work in whole cents so rounding cannot produce "1,1000.00"
+    cents = np.rint(np.nan_to_num(values) * 100).astype(np.int64)
+    thousands, rest = np.divmod(np.abs(cents), 100000)
+    
+    plain = (magnitude < 1e6) & (thousands == 0)
+    grouped = (magnitude < 1e6) & (thousands > 0) & (thousands < 1000)
+    # Just under a million can round up to 1,000,000.00, which needs two separators
+    rounded_up = (magnitude < 1e6) & (thousands >= 1000)
+    
+    _format_masked(result, plain, '$%.2f', cents / 100)
+    if grouped.any():
+        result[grouped] = np.char.add(
+            np.char.mod('$%d,', (np.sign(cents) * thousands)[grouped]),
+            np.char.mod('%06.2f', rest[grouped] / 100)
+        )
+    if rounded_up.any():
+        result[rounded_up] = [f"${value:,.2f}" for value in values[rounded_up]]
+    
+    bands = ((1e6, 1e9, 'M'), (1e9, 1e12, 'B'), (1e12, np.inf, 'T'))
+    for low, high, suffix in bands:
+        _format_masked(result, (magnitude >= low) & (magnitude < high), f'$%.2f{suffix}', values / low)
+    
+    return result.astype(str)
+
+def format_percentage_array(values) -> np.ndarray:
+    """
+    Vectorized format_percentage for a whole column
+    """
+    values = _as_float_array(values)
+    result = np.full(len(values), 'N/A', dtype=object)
+    
+    _format_masked(result, values > 0, '%+.2f%%', values)
+    _format_masked(result, values <= 0, '%.2f%%', values)
+    
+    return result.astype(str)
+
+def format_volume_array(values) -> np.ndarray:
+    """
+    Vectorized format_volume for a whole column, using K/M/B suffixes
+    """
+    values = _as_float_array(values)
+    result = np.full(len(values), 'N/A', dtype=object)
+    
+    _format_masked(result, values < 1e3, '%.0f', values)
+    bands = ((1e3, 1e6, 'K'), (1e6, 1e9, 'M'), (1e9, np.inf, 'B'))
+    for low, high, suffix in bands:
+        _format_masked(result, (values >= low) & (values < high), f'%.1f{suffix}', values / low)
+    
+    return result.astype(str)
+
+def format_summary_frame(
+    df: pd.DataFrame,
+    currency_columns=('Price', 'Change'),
+    percent_columns=('Change %',),
+    volume_columns=('Volume',)
+) -> pd.DataFrame:
+    """
+    Format the numeric columns of a summary table, one column at a time
+    
+    Columns that are not present in df are skipped; other columns are
+    passed through unchanged.
+    """
+    formatters = [
+        (currency_columns, format_currency_array),
+        (percent_columns, format_percentage_array),
+        (volume_columns, format_volume_array)
+    ]
+    
+    display = df.copy()
+    for columns, formatter in formatters:
+        for column in columns:
+            if column in display.columns:
+                display[column] = formatter(df[column])
+    return display
+
+def style_summary_frame(df: pd.DataFrame, change_columns=('Change', 'Change %'), **format_options):
+    """
+    Format a summary table and colour its change columns green, red or gray
+    
+    Returns a pandas Styler for st.dataframe. Colours are computed per
+    column from the signs of the numeric values before formatting.
+    """
+    display = format_summary_frame(df, **format_options)
+    
+    def change_colors(column: pd.Series) -> np.ndarray:
+        values = _as_float_array(df[column.name])
+        return np.select([values > 0, values < 0], ['color: green', 'color: red'], 'color: gray')
+    
+    styled = [column for column in change_columns if column in display.columns]
+    return display.style.apply(change_colors, subset=styled) if styled else display.style
+
 def calculate_performance_metrics(historical_data) -> Dict[str, Any]:
     """
     Calculate various performance metrics from historical data
@@ -213,6 +276,120 @@ def calculate_performance_metrics(historical_data) -> Dict[str, Any]:
     except Exception as e:
         return {'error': str(e)}
 
+def stack_history_frames(histories: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """
+    Align per-symbol OHLCV frames into one wide frame per field
+    
+    Returns a dict keyed by 'close', 'high', 'low' and 'volume'; each value
+    has the union of all dates as its index and one column per symbol, with
+    NaN where a symbol did not trade.
+    """
+    histories = {symbol: hist for symbol, hist in histories.items() if hist is not None and not hist.empty}
+    fields = {'close': 'Close', 'high': 'High', 'low': 'Low', 'volume': 'Volume'}
+    
+    if not histories:
+        return {name: pd.DataFrame() for name in fields}
+    
+    return {
+        name: pd.concat({symbol: hist[column] for symbol, hist in histories.items()}, axis=1).sort_index()
+        for name, column in fields.items()
+    }
+
+def _as_matrix(values, index, columns) -> Optional[np.ndarray]:
+    """Convert a wide frame or 2-D array to a float matrix aligned to close"""
+    if values is None:
+        return None
+    if isinstance(values, pd.DataFrame):
+        values = values.reindex(index=index, columns=columns)
+    return np.asarray(values, dtype=float)
+
+def calculate_batch_performance_metrics(
+    close: Union[pd.DataFrame, np.ndarray],
+    high: Optional[Union[pd.DataFrame, np.ndarray]] = None,
+    low: Optional[Union[pd.DataFrame, np.ndarray]] = None,
+    volume: Optional[Union[pd.DataFrame, np.ndarray]] = None,
+    symbols: Optional[list] = None,
+    risk_free_rate: float = 0.0,
+    periods_per_year: int = TRADING_DAYS_PER_YEAR
+) -> pd.DataFrame:
+    """
+    Calculate performance metrics for many symbols in one vectorized pass
+    
+    Inputs are wide frames (dates x symbols) or 2-D arrays of the same
+    shape; high, low and volume are aligned to close. NaN marks a date a
+    symbol did not trade, so symbols on different calendars can share one
+    frame: returns are taken between each symbol's consecutive valid
+    closes. Returns one row per symbol with the same metrics as
+    calculate_performance_metrics plus max_drawdown and sharpe_ratio.
+    """
+    if isinstance(close, pd.DataFrame):
+        index, columns = close.index, close.columns
+        symbols = list(columns)
+    else:
+        index = columns = None
+    
+    prices = np.asarray(close, dtype=float)
+    if prices.ndim == 1:
+        prices = prices[:, None]
+    rows, count = prices.shape
+    if symbols is None:
+        symbols = list(range(count))
+    
+    result_columns = ['total_return', 'volatility', 'period_high', 'period_low', 'avg_volume',
+                      'max_drawdown', 'sharpe_ratio', 'current_price', 'start_price']
+    if rows == 0 or count == 0:
+        return pd.DataFrame(index=pd.Index(symbols, name='Symbol'), columns=result_columns, dtype=float)
+    
+    valid = ~np.isnan(prices)
+    has_data = valid.any(axis=0)
+    positions = np.arange(rows)[:, None]
+    
+    # First and last valid close per symbol
+    first_row = np.argmax(valid, axis=0)
+    last_row = rows - 1 - np.argmax(valid[::-1], axis=0)
+    col = np.arange(count)
+    start_price = np.where(has_data, prices[first_row, col], np.nan)
+    current_price = np.where(has_data, prices[last_row, col], np.nan)
+    
+    # Forward-fill each column so every close is compared with the symbol's
+    # previous valid close, skipping days its market was shut
+    last_valid_row = np.maximum.accumulate(np.where(valid, positions, -1), axis=0)
+    filled = np.where(last_valid_row >= 0, prices[np.clip(last_valid_row, 0, None), col], np.nan)
+    
+    with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        
+        returns = np.where(valid[1:], filled[1:] / filled[:-1] - 1, np.nan)
+        return_std = np.nanstd(returns, axis=0, ddof=1)
+        return_mean = np.nanmean(returns, axis=0)
+        
+        total_return = (current_price - start_price) / start_price * 100
+        volatility = return_std * 100
+        sharpe_ratio = (return_mean - risk_free_rate / periods_per_year) / return_std * np.sqrt(periods_per_year)
+        
+        # Largest peak-to-trough fall, as a negative percentage
+        running_peak = np.fmax.accumulate(filled, axis=0)
+        max_drawdown = np.nanmin(filled / running_peak - 1, axis=0) * 100
+        
+        high_values = _as_matrix(high, index, columns)
+        low_values = _as_matrix(low, index, columns)
+        volume_values = _as_matrix(volume, index, columns)
+        period_high = np.nanmax(high_values if high_values is not None else prices, axis=0)
+        period_low = np.nanmin(low_values if low_values is not None else prices, axis=0)
+        avg_volume = np.nanmean(volume_values, axis=0) if volume_values is not None else np.full(count, np.nan)
+    
+    return pd.DataFrame({
+        'total_return': total_return,
+        'volatility': volatility,
+        'period_high': period_high,
+        'period_low': period_low,
+        'avg_volume': avg_volume,
+        'max_drawdown': max_drawdown,
+        'sharpe_ratio': np.where(return_std > 0, sharpe_ratio, np.nan),
+        'current_price': current_price,
+        'start_price': start_price
+    }, index=pd.Index(symbols, name='Symbol'))
+
 def get_market_emoji(change_percent: float) -> str:
     """
     Get emoji based on market performance
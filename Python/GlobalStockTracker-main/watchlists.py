@@ -0,0 +1,257 @@
+from typing import TYPE_CHECKING, Iterable, List, Mapping, Optional, Sequence, Tuple, Any
+from collections import OrderedDict
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from market_core import SymbolIndex
+
+# Database file used when no path is given; override with MARKET_WATCHLIST_STORE
+DEFAULT_WATCHLIST_PATH = os.environ.get(
+    "MARKET_WATCHLIST_STORE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".market_data", "watchlists.sqlite")
+)
+
+# Most symbols a single watchlist may hold
+MAX_WATCHLIST_SIZE = 5000
+
+# Columns a watchlist table can be sorted by
+SORT_COLUMNS = ("Symbol", "Name", "Price", "Change", "Change %", "Volume")
+
+# Built tables kept per process, keyed by symbol list and snapshot version
+TABLE_CACHE_SIZE = 16
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS watchlists (
+    name TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS watchlist_symbols (
+    name TEXT NOT NULL REFERENCES watchlists(name) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    symbol TEXT NOT NULL,
+    PRIMARY KEY (name, position)
+) WITHOUT ROWID;
+"""
+
+
+def normalize_symbols(symbols: Iterable[str]) -> List[str]:
+    """Upper-case and strip symbols, dropping blanks and repeats but keeping order"""
+    return list(dict.fromkeys(symbol.strip().upper() for symbol in symbols if symbol and symbol.strip()))
+
+
+class WatchlistStore:
+    """
+    Named symbol lists kept in a local SQLite database
+
+    Lists keep the order their symbols were added in and hold each symbol
+    once; every change replaces the stored list in one transaction.
+    """
+
+    def __init__(self, path: str = DEFAULT_WATCHLIST_PATH):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock:
+            if path != ":memory:":
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+
+    @classmethod
+    def open_default(cls) -> Optional["WatchlistStore"]:
+        """Open the default store, or return None if it cannot be created"""
+        try:
+            return cls()
+        except (OSError, sqlite3.Error):
+            return None
+
+    def names(self) -> List[str]:
+        """Get the names of all watchlists, alphabetically"""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT name FROM watchlists ORDER BY name")]
+
+    def get(self, name: str) -> List[str]:
+        """Get the symbols of a watchlist in order, or an empty list if it does not exist"""
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                "SELECT symbol FROM watchlist_symbols WHERE name = ? ORDER BY position", (name,)
+            )]
+
+    def save(self, name: str, symbols: Iterable[str]) -> List[str]:
+        """
+        Create or replace a watchlist and return the symbols stored
+
+        Raises ValueError if the name is blank or the list is longer than
+        MAX_WATCHLIST_SIZE.
+        """
+        name = name.strip()
+        symbols = normalize_symbols(symbols)
+        if not name:
+            raise ValueError("Watchlist name is required")
+        if len(symbols) > MAX_WATCHLIST_SIZE:
+            raise ValueError(f"A watchlist holds at most {MAX_WATCHLIST_SIZE} symbols")
+
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT INTO watchlists (name, updated_at) VALUES (?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET updated_at = excluded.updated_at",
+                    (name, time.time())
+                )
+                self._conn.execute("DELETE FROM watchlist_symbols WHERE name = ?", (name,))
+                self._conn.executemany(
+                    "INSERT INTO watchlist_symbols (name, position, symbol) VALUES (?, ?, ?)",
+                    [(name, position, symbol) for position, symbol in enumerate(symbols)]
+                )
+        return symbols
+
+    def add(self, name: str, symbols: Iterable[str]) -> List[str]:
+        """Append symbols not already in a watchlist, creating it if needed"""
+        return self.save(name, self.get(name) + list(symbols))
+
+    def remove(self, name: str, symbols: Iterable[str]) -> List[str]:
+        """Remove symbols from a watchlist"""
+        removed = set(normalize_symbols(symbols))
+        return self.save(name, [symbol for symbol in self.get(name) if symbol not in removed])
+
+    def delete(self, name: str) -> None:
+        """Delete a watchlist and its symbols"""
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM watchlists WHERE name = ?", (name,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _as_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class WatchlistTable:
+    """
+    Quotes for a watchlist held column-wise for paging
+
+    Each field is one NumPy array over the whole list, built in a single
+    pass over the quotes. query() filters, sorts and slices those arrays
+    and only turns the requested page into a DataFrame, so formatting and
+    rendering cost follows the page size rather than the list size.
+    Symbols without a quote yet have NaN prices and sort last; names come
+    from the symbol index when one is given.
+    """
+
+    def __init__(self, symbols: Sequence[str], quotes: Mapping[str, Mapping[str, Any]],
+                 symbol_index: Optional["SymbolIndex"] = None):
+        count = len(symbols)
+        records = [symbol_index.lookup(symbol) if symbol_index is not None else None for symbol in symbols]
+        self.symbols = np.array(symbols, dtype=object)
+        self.names = np.array([record.name if record else "" for record in records], dtype=object)
+        self.columns = {column: np.full(count, np.nan) for column in ("Price", "Change", "Change %", "Volume")}
+
+        price, change, change_pct, volume = (self.columns[column] for column in ("Price", "Change", "Change %", "Volume"))
+        for i, symbol in enumerate(symbols):
+            quote = quotes.get(symbol)
+            if quote:
+                price[i] = _as_float(quote.get('price'))
+                change[i] = _as_float(quote.get('change'))
+                change_pct[i] = _as_float(quote.get('change_percent'))
+                volume[i] = _as_float(quote.get('volume'))
+
+        # Upper-cased "SYMBOL<tab>NAME" per row, searched by the filter
+        self._haystack = np.char.upper(np.array(
+            [f"{symbol}\t{name}" for symbol, name in zip(symbols, self.names)], dtype=str
+        )) if count else np.array([], dtype=str)
+
+        # Symbols and names never change, so their sort orders are computed once
+        self._text_orders = {}
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    @property
+    def loaded(self) -> int:
+        """Number of symbols that have a price"""
+        return int(np.count_nonzero(~np.isnan(self.columns["Price"])))
+
+    def _order(self, sort_by: str, descending: bool) -> np.ndarray:
+        if sort_by in self.columns:
+            values = self.columns[sort_by]
+            # Negating keeps NaN last in both directions
+            return np.argsort(-values if descending else values, kind="stable")
+
+        order = self._text_orders.get(sort_by)
+        if order is None:
+            values = self.symbols if sort_by == "Symbol" else self.names
+            order = self._text_orders[sort_by] = np.argsort(values.astype(str), kind="stable")
+        return order[::-1] if descending else order
+
+    def query(self, text: str = "", sort_by: str = "Symbol", descending: bool = False,
+              page: int = 0, page_size: int = 50) -> Tuple[pd.DataFrame, int]:
+        """
+        Get one page of rows matching a filter, in sort order
+
+        text matches anywhere in the symbol or name, ignoring case. Pages
+        count from zero and are clamped to the last one. Returns the page
+        as a DataFrame and the number of matching rows.
+        """
+        if sort_by not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort by {sort_by!r}; choose one of {', '.join(SORT_COLUMNS)}")
+
+        order = self._order(sort_by, descending)
+        text = text.strip().upper()
+        if text:
+            matches = np.char.find(self._haystack, text) >= 0
+            order = order[matches[order]]
+
+        total = len(order)
+        page_size = max(1, page_size)
+        page = min(max(0, page), max(0, (total - 1) // page_size))
+        rows = order[page * page_size:(page + 1) * page_size]
+
+        frame = pd.DataFrame({
+            'Symbol': self.symbols[rows],
+            'Name': self.names[rows],
+            **{column: values[rows] for column, values in self.columns.items()}
+        })
+        return frame, total
+
+
+_tables: "OrderedDict[Tuple[Tuple[str, ...], int], WatchlistTable]" = OrderedDict()
+_tables_lock = threading.Lock()
+
+
+def get_watchlist_table(symbols: Sequence[str], quotes: Mapping[str, Mapping[str, Any]], version: int,
+                        symbol_index: Optional["SymbolIndex"] = None) -> WatchlistTable:
+    """
+    Get the table for a symbol list at a snapshot version, building it once
+
+    Sessions showing the same list between two polls share one table;
+    the least recently used tables are dropped past TABLE_CACHE_SIZE.
+    """
+    key = (tuple(symbols), version)
+    with _tables_lock:
+        table = _tables.get(key)
+        if table is not None:
+            _tables.move_to_end(key)
+            return table
+
+    table = WatchlistTable(symbols, quotes, symbol_index)
+    with _tables_lock:
+        _tables[key] = table
+        while len(_tables) > TABLE_CACHE_SIZE:
+            _tables.popitem(last=False)
+    return table